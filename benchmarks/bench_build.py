@@ -0,0 +1,267 @@
+"""
+Benchmarks of full and incremental builds of a synthetic project, and of
+the functions where most of the time of a build is spent.
+
+The results are saved as JSON, and can be compared with the results of a
+previous run (for example, of the last release) to find regressions.
+
+Usage:
+
+    python benchmarks/bench_build.py [--pages N] [--variants N] ... \\
+        [--repeat N] [--jobs N] [--output results.json] [--compare old.json]
+
+Run `python benchmarks/bench_build.py --help` for all the options.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import typing as t
+from collections.abc import Callable
+from importlib import metadata
+from pathlib import Path
+
+import sitegen
+
+from writeadoc import Docs, search
+from writeadoc.cache import CACHE_FOLDER
+from writeadoc.md import render_markdown
+from writeadoc.minify import minify_html
+from writeadoc.types import PageData
+
+
+# A benchmark is timed after calling its setup function, if any
+TBenchmark = tuple[Callable[[], t.Any] | None, Callable[[], t.Any]]
+
+# Slower than this ratio is reported as a regression
+THRESHOLD = 1.1
+
+
+class Benchmarks:
+    def __init__(self, root: Path, spec: sitegen.SiteSpec, *, jobs: int = 1):
+        self.root = root
+        self.spec = spec
+        self.jobs = jobs
+        # The development build updated by the `rebuild` benchmarks
+        self.docs: Docs | None = None
+        self.page: tuple[str, PageData] | None = None
+        self.html_docs: Docs | None = None
+        self.html = ""
+
+    def get_benchmarks(self) -> dict[str, TBenchmark]:
+        return {
+            "build.cold": (self.reset, self.build),
+            "build.warm": (self.setup_warm, self.build),
+            "build.no_cache": (self.reset, self.build_no_cache),
+            "rebuild.page": (self.setup_rebuild, self.rebuild_page),
+            "rebuild.view": (self.setup_rebuild, self.rebuild_view),
+            "render_markdown": (None, self.render_markdown),
+            "extract_search_data": (None, self.extract_search_data),
+            "process_html": (None, self.process_html),
+            "minify_html": (None, self.minify_html),
+        }
+
+    # Builds
+
+    def make_docs(self) -> Docs:
+        docs = sitegen.make_docs(self.root, self.spec)
+        docs.build_dir = self.root / "build"
+        return docs
+
+    def reset(self) -> None:
+        shutil.rmtree(self.root / "build", ignore_errors=True)
+        shutil.rmtree(self.root / CACHE_FOLDER, ignore_errors=True)
+
+    def build(self) -> None:
+        self.make_docs().build(devmode=False, boring=True, jobs=self.jobs)
+
+    def setup_warm(self) -> None:
+        if not (self.root / CACHE_FOLDER).exists():
+            self.build()
+
+    def build_no_cache(self) -> None:
+        docs = self.make_docs()
+        docs.cache = None
+        for variant in docs.variants.values():
+            variant.cache = None
+        docs.build(devmode=False, boring=True, jobs=self.jobs)
+
+    def setup_rebuild(self) -> None:
+        if self.docs is None:
+            self.docs = self.make_docs()
+            self.docs.build(devmode=True, boring=True, jobs=self.jobs)
+
+    def rebuild_page(self) -> None:
+        assert self.docs
+        path = self.root / "content" / sitegen.get_filenames(self.spec)[-1]
+        # A different content each time, so the cache is not used
+        path.write_text(f"{path.read_text()}\n\nEdited at {time.time_ns()}.\n")
+        self.docs.rebuild([path])
+
+    def rebuild_view(self) -> None:
+        assert self.docs
+        # Used by every page
+        path = self.root / "views" / "page_pager.jx"
+        path.write_text(f"{path.read_text()}\n<!-- {time.time_ns()} -->\n")
+        self.docs.rebuild([path])
+
+    # Hot functions
+
+    def get_page(self) -> tuple[str, PageData]:
+        """Return the Markdown source of the first page, and the page rendered."""
+        if self.page is None:
+            path = self.root / "content" / sitegen.get_filenames(self.spec)[0]
+            source = path.read_text().split("---", 2)[2]
+            html, _ = render_markdown(source)
+            self.page = (source, PageData(
+                url="/docs/bench/",
+                content=html,
+                meta={"id": "bench", "title": "Bench"},
+            ))
+        return self.page
+
+    def render_markdown(self) -> None:
+        source, _ = self.get_page()
+        render_markdown(source)
+
+    def extract_search_data(self) -> None:
+        _, page = self.get_page()
+        search.extract_search_data(page)
+
+    def get_html_docs(self) -> Docs:
+        """Return a prefixed documentation, and read the HTML of a built page."""
+        if self.html_docs is None:
+            self.setup_rebuild()
+            self.html_docs = self.make_docs()
+            self.html_docs.prefix = "prefix"
+            self.html_docs.asset_fingerprints = self.html_docs._get_asset_fingerprints()
+            path = self.root / "build" / "docs" / "folder-0" / "page-1" / "index.html"
+            self.html = path.read_text()
+        return self.html_docs
+
+    def process_html(self) -> None:
+        """Apply the output filters (fingerprints and prefix) to a built page."""
+        self.get_html_docs()._process_html(self.html)
+
+    def minify_html(self) -> None:
+        self.get_html_docs()
+        minify_html(self.html)
+
+
+def run(
+    spec: sitegen.SiteSpec,
+    *,
+    repeat: int = 3,
+    jobs: int = 1,
+    only: list[str] | None = None,
+) -> dict[str, t.Any]:
+    """Generate a synthetic project, run the benchmarks, and return the results."""
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="wad-bench-") as tmp:
+        root = Path(tmp) / "project"
+        sitegen.generate(root, spec)
+        benchmarks = Benchmarks(root, spec, jobs=jobs)
+
+        for name, (setup, func) in benchmarks.get_benchmarks().items():
+            if only and not any(name.startswith(prefix) for prefix in only):
+                continue
+            # The fast functions are called many times per run
+            number = 1 if name.startswith(("build", "rebuild")) else 20
+            runs = []
+            for _ in range(repeat):
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if setup:
+                        setup()
+                    start = time.perf_counter()
+                    for _ in range(number):
+                        func()
+                    runs.append((time.perf_counter() - start) / number)
+            results[name] = {
+                "min": min(runs),
+                "median": statistics.median(runs),
+                "runs": runs,
+            }
+            print(f"  {name:<24} {results[name]['median'] * 1000:10.2f} ms")
+
+    try:
+        version = metadata.version("writeadoc")
+    except metadata.PackageNotFoundError:
+        version = ""
+
+    return {
+        "version": 1,
+        "date": datetime.datetime.now(tz=datetime.timezone.utc).isoformat(),
+        "writeadoc": version,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "spec": spec.__dict__,
+        "jobs": jobs,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare(old: dict[str, t.Any], new: dict[str, t.Any]) -> bool:
+    """Print the ratio of the new median times to the old ones.
+    Return `False` if any benchmark is slower than the threshold."""
+    if old.get("spec") != new.get("spec"):
+        print("Warning: the results were measured with different projects.")
+
+    ok = True
+    print(f"\n  {'':<24} {'old':>10} {'new':>10}")
+    for name, result in new["results"].items():
+        if name not in old["results"]:
+            continue
+        old_time = old["results"][name]["median"]
+        new_time = result["median"]
+        ratio = new_time / old_time if old_time else 1.0
+        flag = ""
+        if ratio > THRESHOLD:
+            flag = "  SLOWER"
+            ok = False
+        elif ratio < 1 / THRESHOLD:
+            flag = "  faster"
+        print(
+            f"  {name:<24} {old_time * 1000:8.2f}ms {new_time * 1000:8.2f}ms "
+            f"{ratio:6.2f}x{flag}"
+        )
+    return ok
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the builds of a synthetic project")
+    sitegen.add_arguments(parser)
+    parser.add_argument("--repeat", type=int, default=3, metavar="N")
+    parser.add_argument("--jobs", "-j", type=int, default=1, metavar="N")
+    parser.add_argument(
+        "--only",
+        nargs="+",
+        metavar="NAME",
+        help="Run only the benchmarks starting with these names",
+    )
+    parser.add_argument("--output", type=Path, help="Save the results to this JSON file")
+    parser.add_argument("--compare", type=Path, help="Compare with the results in this JSON file")
+    args = parser.parse_args(argv)
+
+    spec = sitegen.get_spec(args)
+    print(f"Benchmarking a project of {spec.pages} pages and {spec.variants} variants")
+    results = run(spec, repeat=args.repeat, jobs=args.jobs, only=args.only)
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding="utf-8")
+
+    if args.compare:
+        old = json.loads(args.compare.read_text(encoding="utf-8"))
+        if not compare(old, results):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
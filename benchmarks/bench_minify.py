@@ -0,0 +1,69 @@
+"""
+Benchmark of the minification of the HTML of the pages of a real site.
+
+Builds the documentation in memory, without minifying it, and reports
+the time to minify its pages, and their size before and after, raw
+and compressed with gzip.
+
+Usage:
+
+    python benchmarks/bench_minify.py [DOCS_PY]
+
+Without arguments, it uses the documentation of WriteADoc (`docs/docs.py`).
+"""
+import contextlib
+import gzip
+import io
+import runpy
+import sys
+import timeit
+from pathlib import Path
+
+from writeadoc import Docs
+from writeadoc.minify import minify_html
+
+
+DOCS_PY = Path(__file__).parent.parent / "docs" / "docs.py"
+
+
+def build_pages(docs_py: Path) -> dict[str, str]:
+    """Build the documentation in memory and return its HTML files."""
+    docs: Docs = runpy.run_path(str(docs_py))["docs"]
+    docs.memory_files = {}
+    for variant in docs.variants.values():
+        variant.memory_files = docs.memory_files
+    with contextlib.redirect_stdout(io.StringIO()):
+        docs.build(devmode=True, boring=True)
+    return {
+        relpath: data.decode("utf-8")
+        for relpath, data in docs.memory_files.items()
+        if relpath.endswith(".html")
+    }
+
+
+def main(argv: list[str]) -> None:
+    docs_py = Path(argv[0]) if argv else DOCS_PY
+    pages = build_pages(docs_py)
+    html = list(pages.values())
+    minified = [minify_html(text) for text in html]
+
+    number = 5
+    seconds = min(
+        timeit.repeat(lambda: [minify_html(text) for text in html], number=number, repeat=5)
+    ) / number
+
+    size = sum(len(text.encode("utf-8")) for text in html)
+    min_size = sum(len(text.encode("utf-8")) for text in minified)
+    gz_size = sum(len(gzip.compress(text.encode("utf-8"), 9)) for text in html)
+    min_gz_size = sum(len(gzip.compress(text.encode("utf-8"), 9)) for text in minified)
+
+    print(f"{len(pages)} pages, {size / 1024:.0f} KB")
+    print(f"  time:   {seconds * 1000:.2f} ms ({size / 1024 / 1024 / seconds:.1f} MB/s)")
+    print(f"  raw:    {size / 1024:8.1f} KB -> {min_size / 1024:8.1f} KB "
+          f"(-{(1 - min_size / size) * 100:.1f}%)")
+    print(f"  gzip:   {gz_size / 1024:8.1f} KB -> {min_gz_size / 1024:8.1f} KB "
+          f"(-{(1 - min_gz_size / gz_size) * 100:.1f}%)")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,142 @@
+"""
+Micro-benchmark of the extraction of the search data of a page.
+
+Compares the single-pass `TextExtractor` with the previous approach, that
+cleaned the HTML with three regular expressions before parsing it with
+`html.parser.HTMLParser`.
+
+Usage:
+
+    python benchmarks/bench_search.py [HTML_FILE ...]
+
+Without arguments, it uses a synthetic page.
+"""
+import re
+import sys
+import timeit
+from html.parser import HTMLParser
+from pathlib import Path
+
+from writeadoc.search import (
+    HTML_FRAGMENT_SEP,
+    HTML_HEADER,
+    REMOVE_SELF_CLOSING_TAGS,
+    REMOVE_TAGS_AND_CONTENTS,
+    REMOVE_TAGS_KEEP_CONTENT,
+    TextExtractor,
+    extract_search_data,
+)
+from writeadoc.types import PageData
+
+
+RX_REMOVE_SELF_CLOSING = re.compile(
+    rf"<(?:{'|'.join(REMOVE_SELF_CLOSING_TAGS)})\b[^>]*/?>",
+    flags=re.IGNORECASE,
+)
+RX_REMOVE_TAGS_AND_CONTENTS = re.compile(
+    rf"<({'|'.join(REMOVE_TAGS_AND_CONTENTS)})\b[^>]*>.*?</\1\s*>",
+    flags=re.DOTALL | re.IGNORECASE,
+)
+RX_REMOVE_TAGS_KEEP_CONTENT = re.compile(
+    rf"</?(?:{'|'.join(REMOVE_TAGS_KEEP_CONTENT)})\b[^>]*>",
+    flags=re.IGNORECASE,
+)
+
+SECTION = """
+<h2 id="section-{i}">Section {i}&nbsp;<a class="headerlink" href="#section-{i}"></a></h2>
+<p>Some <strong>text</strong> with <a href="/docs/{i}/">a link</a>, <code>code</code>
+and an image <img src="/assets/{i}.png" alt="">.</p>
+<div class="language-python highlight"><pre><code><span class="kn">import</span> <span class="nn">os</span>
+<span class="k">def</span> <span class="nf">f{i}</span><span class="p">():</span>
+    <span class="k">return</span> <span class="n">os</span><span class="o">.</span><span class="n">getcwd</span><span class="p">()</span>
+</code></pre></div>
+<nav><a href="#a">Skip</a><a href="#b">me</a></nav>
+<table><tr><td>Cell <em>{i}</em></td><td>Other cell</td></tr></table>
+<svg viewBox="0 0 10 10"><path d="M0 0"/></svg>
+"""
+
+
+class LegacyTextExtractor(HTMLParser):
+    _tag: str = "p"
+    _in_header: bool = False
+
+    # The text processing is the same
+    process_text = TextExtractor.process_text
+    save_fragment = TextExtractor.save_fragment
+
+    def __init__(self, page: PageData):
+        super().__init__()
+        self.docs = {}
+        self._page = page
+        self._hash = ""
+        self._title = []
+        self._content = []
+        self._id = 1
+
+    def handle_starttag(self, tag, attrs):
+        self._tag = tag
+        if tag in HTML_FRAGMENT_SEP and self._content:
+            self.save_fragment()
+        if tag in HTML_HEADER:
+            self._title = []
+            self._in_header = True
+            if "id" in dict(attrs):
+                self._hash = dict(attrs)["id"]
+
+    def handle_endtag(self, tag):
+        if tag in HTML_HEADER:
+            self._in_header = False
+
+    def handle_data(self, data):
+        self.process_text(data)
+
+    def close(self):
+        if self._content:
+            self.save_fragment()
+        super().close()
+
+
+def legacy_extract_search_data(page: PageData):
+    """The previous path: three regex passes, then the parser."""
+    html = page.content
+    html = RX_REMOVE_SELF_CLOSING.sub("", html)
+    html = RX_REMOVE_TAGS_AND_CONTENTS.sub("", html)
+    html = RX_REMOVE_TAGS_KEEP_CONTENT.sub("", html)
+    html = html.strip()
+    if not html:
+        return {}
+    parser = LegacyTextExtractor(page)
+    parser.feed(html)
+    parser.close()
+    return parser.docs
+
+
+def bench(name: str, html: str, number: int) -> None:
+    page = PageData(
+        content=html,
+        url="/docs/bench/",
+        section_title="Bench",
+        meta={"id": "bench", "title": "Bench"},
+    )
+    assert extract_search_data(page) == legacy_extract_search_data(page)
+
+    legacy = min(timeit.repeat(lambda: legacy_extract_search_data(page), number=number, repeat=5))
+    current = min(timeit.repeat(lambda: extract_search_data(page), number=number, repeat=5))
+    print(
+        f"{name} ({len(html) // 1024} KB): "
+        f"legacy {legacy / number * 1000:.2f} ms, "
+        f"single-pass {current / number * 1000:.2f} ms "
+        f"({legacy / current:.2f}x)"
+    )
+
+
+def main(paths: list[str]) -> None:
+    if not paths:
+        bench("synthetic", "".join(SECTION.format(i=i) for i in range(500)), number=5)
+        return
+    for path in paths:
+        bench(path, Path(path).read_text(encoding="utf-8"), number=20)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
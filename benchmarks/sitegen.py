@@ -0,0 +1,269 @@
+"""
+Generator of synthetic documentation projects, used by the benchmarks.
+
+The projects use the views and assets of the blueprint (the ones of a new
+project), and pages with a configurable number of sections, code blocks,
+tables, tab sets, and autodoc blocks. The content is random but, for the
+same arguments, always the same, so the results of different runs can be
+compared.
+
+Usage:
+
+    python benchmarks/sitegen.py DEST [--pages N] [--variants N] ...
+
+Then build it with `python DEST/docs.py build`.
+"""
+import argparse
+import random
+import shutil
+import typing as t
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+from writeadoc import Docs
+
+
+BLUEPRINT = Path(__file__).parent.parent / "src" / "writeadoc" / "blueprint"
+
+WORDS = (
+    "the documentation page build render search index view component asset link "
+    "section example option value default function method class module argument "
+    "returns raises configuration server client request response cache file folder "
+    "markdown template theme language version variant prefix output input user data "
+    "simple fast small large every each only also just then when while because"
+).split()
+
+CODE = {
+    "python": """\
+def {name}(items: list[str], *, limit: int = {n}) -> dict[str, int]:
+    \"\"\"Count the items, up to a limit.\"\"\"
+    counts = {{}}
+    for item in items[:limit]:
+        counts[item] = counts.get(item, 0) + 1
+    return counts
+""",
+    "js": """\
+export function {name}(items, limit = {n}) {{
+  const counts = new Map();
+  for (const item of items.slice(0, limit)) {{
+    counts.set(item, (counts.get(item) || 0) + 1);
+  }}
+  return counts;
+}}
+""",
+    "bash": """\
+# Install and run {name}
+pip install {name}=={n}.0
+{name} --limit {n} ./content
+""",
+    "html": """\
+<div class="{name}" data-limit="{n}">
+  <button type="button">Count</button>
+  <output></output>
+</div>
+""",
+}
+
+AUTODOC = (
+    "writeadoc.search.tokenize",
+    "writeadoc.utils.sync_folder",
+    "writeadoc.cache.RenderCache",
+    "writeadoc.linkcheck.LinkChecker",
+)
+
+
+@dataclass
+class SiteSpec:
+    pages: int = 100
+    """Number of pages of the main documentation."""
+    pages_per_folder: int = 10
+    """Number of pages in each section of the navigation."""
+    sections: int = 6
+    """Number of `##` sections in each page."""
+    code_blocks: int = 3
+    """Number of code blocks in each page."""
+    tables: int = 1
+    """Number of tables in each page."""
+    tabs: int = 1
+    """Number of tab sets, of three tabs each, in each page."""
+    autodoc: int = 0
+    """Number of pages, of each 10, with an autodoc block."""
+    variants: int = 0
+    """Number of variants, each one with the same pages."""
+    seed: int = 0
+
+
+def generate(dest: Path, spec: SiteSpec) -> None:
+    """Generate a synthetic project in the `dest` folder, replacing
+    the previous one, if any."""
+    if dest.exists():
+        shutil.rmtree(dest)
+    dest.mkdir(parents=True)
+    shutil.copytree(BLUEPRINT / "views", dest / "views")
+    shutil.copytree(BLUEPRINT / "assets", dest / "assets")
+
+    filenames = get_filenames(spec)
+    content_dirs = [dest / "content"] + [
+        dest / "content" / prefix for prefix in get_variant_prefixes(spec)
+    ]
+    for num, content_dir in enumerate(content_dirs):
+        rnd = random.Random(f"{spec.seed}-{num}")
+        for index, filename in enumerate(filenames):
+            path = content_dir / filename
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_text(make_page(rnd, spec, index, filenames), encoding="utf-8")
+
+    (dest / "docs.py").write_text(
+        "import sys\n"
+        f"sys.path.insert(0, {str(Path(__file__).parent)!r})\n"
+        "from sitegen import SiteSpec, make_docs\n\n"
+        f"docs = make_docs(__file__, SiteSpec(**{asdict(spec)!r}))\n\n"
+        "if __name__ == '__main__':\n"
+        "    docs.cli()\n",
+        encoding="utf-8",
+    )
+
+
+def make_docs(root: str | Path, spec: SiteSpec) -> Docs:
+    """Return the `Docs` of a project generated with this `spec`."""
+    site = {
+        "name": "Synthetic",
+        "base_url": "https://example.com",
+        "version": "1.0",
+    }
+    variants = {
+        prefix: Docs(str(root), pages=get_pages(spec), site={**site, "lang": "es"})
+        for prefix in get_variant_prefixes(spec)
+    }
+    return Docs(str(root), pages=get_pages(spec), site=site, variants=variants)
+
+
+def get_filenames(spec: SiteSpec) -> list[str]:
+    return [
+        f"folder-{index // spec.pages_per_folder}/page-{index}.md"
+        for index in range(spec.pages)
+    ]
+
+
+def get_pages(spec: SiteSpec) -> list[str | dict[str, t.Any]]:
+    """Return the pages structure, with a navigation section for each folder."""
+    pages: list[str | dict[str, t.Any]] = []
+    filenames = get_filenames(spec)
+    for start in range(0, len(filenames), spec.pages_per_folder):
+        folder = filenames[start:start + spec.pages_per_folder]
+        if len(folder) == 1:
+            pages.append(folder[0])
+            continue
+        pages.append({
+            "title": f"Section {start // spec.pages_per_folder}",
+            "path": folder[0],
+            "pages": folder[1:],
+        })
+    return pages
+
+
+def get_variant_prefixes(spec: SiteSpec) -> list[str]:
+    return [f"v{num}" for num in range(1, spec.variants + 1)]
+
+
+def make_page(rnd: random.Random, spec: SiteSpec, index: int, filenames: list[str]) -> str:
+    lines = [
+        "---",
+        f"title: Page {index} {sentence(rnd, 3)}",
+        "---",
+        "",
+        paragraph(rnd, filenames),
+        "",
+    ]
+    if spec.autodoc and index % 10 < spec.autodoc:
+        lines += [f"::: api {AUTODOC[index % len(AUTODOC)]}", ""]
+
+    # Spread the blocks among the sections
+    blocks = (
+        ["code"] * spec.code_blocks
+        + ["table"] * spec.tables
+        + ["tabs"] * spec.tabs
+    )
+    for num in range(spec.sections):
+        lines += [f"## {sentence(rnd, 4)} {num}", "", paragraph(rnd, filenames), ""]
+        if num % 3 == 2:
+            lines += [
+                "::: note",
+                paragraph(rnd, filenames),
+                ":::",
+                "",
+            ]
+        for block in blocks[num::spec.sections]:
+            if block == "code":
+                lines += [code_block(rnd), ""]
+            elif block == "table":
+                lines += [table(rnd), ""]
+            else:
+                lines += [tab_set(rnd), ""]
+        lines += [paragraph(rnd, filenames), ""]
+    return "\n".join(lines)
+
+
+def sentence(rnd: random.Random, num_words: int) -> str:
+    return " ".join(rnd.choice(WORDS) for _ in range(num_words)).capitalize()
+
+
+def paragraph(rnd: random.Random, filenames: list[str]) -> str:
+    words: list[str] = [rnd.choice(WORDS) for _ in range(rnd.randint(40, 90))]
+    words[rnd.randrange(len(words))] = f"**{rnd.choice(WORDS)}**"
+    words[rnd.randrange(len(words))] = f"`{rnd.choice(WORDS)}()`"
+    target = rnd.choice(filenames)
+    words[rnd.randrange(len(words))] = f"[{rnd.choice(WORDS)}](/docs/{target[:-3]}/)"
+    return " ".join(words).capitalize() + "."
+
+
+def code_block(rnd: random.Random) -> str:
+    lang = rnd.choice(sorted(CODE))
+    code = CODE[lang].format(name=rnd.choice(WORDS), n=rnd.randint(1, 100))
+    return f"```{lang}\n{code}```"
+
+
+def table(rnd: random.Random) -> str:
+    rows = ["| Option | Default | Description |", "|---|---|---|"]
+    for _ in range(rnd.randint(3, 8)):
+        rows.append(
+            f"| `{rnd.choice(WORDS)}` | `{rnd.randint(0, 1000)}` | {sentence(rnd, 8)} |"
+        )
+    return "\n".join(rows)
+
+
+def tab_set(rnd: random.Random) -> str:
+    tabs = []
+    for lang in ("python", "js", "bash"):
+        code = CODE[lang].format(name=rnd.choice(WORDS), n=rnd.randint(1, 100))
+        tabs.append(f"::: tab | {lang}\n```{lang}\n{code}```\n:::")
+    return "\n\n".join(tabs)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add an option to the parser for each field of `SiteSpec`."""
+    defaults = SiteSpec()
+    for field in fields(SiteSpec):
+        parser.add_argument(
+            f"--{field.name.replace('_', '-')}",
+            type=int,
+            default=getattr(defaults, field.name),
+            metavar="N",
+        )
+
+
+def get_spec(args: argparse.Namespace) -> SiteSpec:
+    return SiteSpec(**{field.name: getattr(args, field.name) for field in fields(SiteSpec)})
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate a synthetic documentation project")
+    parser.add_argument("dest", type=Path)
+    add_arguments(parser)
+    args = parser.parse_args()
+    generate(args.dest, get_spec(args))
+    print(f"Project generated in {args.dest}")
+
+
+if __name__ == "__main__":
+    main()
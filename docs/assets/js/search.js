@@ -51,31 +51,105 @@ function getQuery(variable) {
   return null;
 }
 
+function buildIndex(store) {
+  return lunr(function () {
+    this.field('id');
+    this.field('title', { boost: 10 });
+    this.field('section');
+    this.field('content');
+    for (var key in store) {
+      this.add({
+        'id': key,
+        'title': store[key].title,
+        'section': store[key].section,
+        'content': store[key].content
+      });
+    }
+  });
+}
+
+function fetchJSON(url) {
+  return fetch(url).then(response => response.json());
+}
+
+// Must match the `tokenize()` function of `search.py`
+function tokenize(text) {
+  return text.toLowerCase().match(/[\p{L}\p{N}_]+/gu) || [];
+}
+
+async function searchShards(manifestUrl, searchTerm) {
+  var manifest = await fetchJSON(manifestUrl);
+  var shardUrl = name => new URL(name, new URL(manifestUrl, window.location.href)).href;
+  var tokens = tokenize(searchTerm);
+
+  // Only fetch the shards that can have terms starting with the typed words
+  var names = new Set();
+  for (var prefix in manifest.terms) {
+    if (tokens.some(tok => tok.startsWith(prefix) || prefix.startsWith(tok))) {
+      names.add(manifest.terms[prefix]);
+    }
+  }
+  var shards = await Promise.all([...names].map(name => fetchJSON(shardUrl(name))));
+
+  var scores = new Map();
+  shards.forEach(shard => {
+    for (var term in shard) {
+      tokens.forEach(tok => {
+        if (!term.startsWith(tok)) return;
+        // Exact matches rank higher than prefix matches
+        var boost = term === tok ? 1 : 0.5;
+        shard[term].forEach(([docId, weight]) => {
+          scores.set(docId, (scores.get(docId) || 0) + weight * boost);
+        });
+      });
+    }
+  });
+  var results = [...scores.entries()]
+    .sort((a, b) => b[1] - a[1])
+    .map(([docId, score]) => ({ ref: docId, score: score }));
+
+  // Fetch only the documents shards of the results
+  var docShards = new Map();
+  results.forEach(result => {
+    var i = manifest.docs.findLastIndex(([firstId]) => firstId <= result.ref);
+    docShards.set(i, manifest.docs[i]);
+  });
+  var store = {};
+  await Promise.all([...docShards.values()].map(async ([firstId, name]) => {
+    var docs = await fetchJSON(shardUrl(name));
+    docs.forEach((doc, i) => { store[firstId + i] = doc; });
+  }));
+  return [results, store];
+}
+
+async function loadSearch(searchResults) {
+  var indexUrl = searchResults.dataset.index;
+  var [store, index] = await Promise.all([
+    fetchJSON(searchResults.dataset.store),
+    indexUrl ? fetchJSON(indexUrl) : null,
+  ]);
+  // Use the prebuilt index if available
+  return [store, index ? lunr.Index.load(index) : buildIndex(store)];
+}
+
 export function ready() {
   var searchTerm = getQuery('q');
-  if (searchTerm) {
+  var searchResults = document.getElementById('search-results');
+  if (searchTerm && searchResults) {
     var searchBoxes = document.querySelectorAll('.search-box');
     searchBoxes.forEach(searchBox => {
       searchBox.setAttribute('value', searchTerm);
     });
-    var idx = lunr(function () {
-      this.field('id');
-      this.field('title', { boost: 10 });
-      this.field('author');
-      this.field('section');
-      this.field('content');
-      for (var key in window.store) {
-        this.add({
-          'id': key,
-          'title': window.store[key].title,
-          'author': window.store[key].author,
-          'section': window.store[key].section,
-          'content': window.store[key].content
-        });
-      }
-    });
-    var results = idx.search(searchTerm);
-    showResults(results, window.store, searchTerm);
+    if (searchResults.dataset.manifest) {
+      searchShards(searchResults.dataset.manifest, searchTerm).then(([results, store]) => {
+        showResults(results, store, searchTerm);
+      });
+    } else {
+      loadSearch(searchResults).then(([store, idx]) => {
+        var results = idx.search(searchTerm);
+        showResults(results, store, searchTerm);
+      });
+    }
   }
 
   document.querySelectorAll('.search').forEach(form => {
@@ -5,14 +5,16 @@ from dataclasses import dataclass, field
 from importlib import import_module
 from textwrap import dedent
 
-from docstring_parser import parse
-from docstring_parser.common import (
-    DocstringDeprecated,
-    DocstringExample,
-    DocstringParam,
-    DocstringRaises,
-    DocstringReturns,
-)
+
+if t.TYPE_CHECKING:
+    import docstring_parser
+    from docstring_parser.common import (
+        DocstringDeprecated,
+        DocstringExample,
+        DocstringParam,
+        DocstringRaises,
+        DocstringReturns,
+    )
 
 
 RX_AUTODOC = re.compile(
@@ -50,15 +52,15 @@ class Docstring:
     description: str = ""
 
     # Deprecation notes
-    deprecation: DocstringDeprecated | None = None
+    deprecation: "DocstringDeprecated | None" = None
     # A list of examples.
-    examples: list[DocstringExample] = field(default_factory=list)
+    examples: "list[DocstringExample]" = field(default_factory=list)
     # Return information.
-    returns: DocstringReturns | None = None
+    returns: "DocstringReturns | None" = None
     # A list of multiple return values.
-    many_returns: list[DocstringReturns] = field(default_factory=list)
+    many_returns: "list[DocstringReturns]" = field(default_factory=list)
     # A list of exceptions that the function may raise.
-    raises: list[DocstringRaises] = field(default_factory=list)
+    raises: "list[DocstringRaises]" = field(default_factory=list)
 
     # Inheritance information
     bases: list[str] = field(default_factory=list)
@@ -199,7 +201,7 @@ def autodoc_class(
 ) -> Docstring:
     init = getattr(obj, "__init__", None)
     obj_name = obj.__name__
-    ds = parse(obj.__doc__ or init.__doc__ or "")
+    ds = parse_docstring(obj.__doc__ or init.__doc__ or "")
 
     description = (ds.description or "").strip()
     short_description, long_description = split_description(description)
@@ -269,7 +271,7 @@ def autodoc_function(
     symbol: str = "",
 ) -> Docstring:
     obj_name = obj.__name__
-    ds = parse(obj.__doc__ or "")
+    ds = parse_docstring(obj.__doc__ or "")
 
     description = (ds.description or "").strip()
     short_description, long_description = split_description(description)
@@ -317,7 +319,7 @@ def autodoc_property(
     show_name: bool = True,
     symbol: str = "attr",
 ) -> Docstring:
-    ds = parse(obj.__doc__ or "")
+    ds = parse_docstring(obj.__doc__ or "")
     description = (ds.description or "").strip()
     short_description, long_description = split_description(description)
 
@@ -336,8 +338,16 @@ def autodoc_property(
     )
 
 
+def parse_docstring(docstring: str) -> "docstring_parser.Docstring":
+    # Imported here, so `docstring_parser` is only loaded by the pages
+    # with autodoc blocks
+    from docstring_parser import parse
+
+    return parse(docstring)
+
+
 def autodoc_attr(
-    attr: DocstringParam,
+    attr: "DocstringParam",
     *,
     show_name: bool = True,
     symbol: str = "attr",
@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import typing as t
+from functools import cache
+from importlib import metadata
+from pathlib import Path
+from uuid import uuid4
+
+from .utils import logger
+
+
+CACHE_FOLDER = ".writeadoc-cache"
+
+
+class RenderCache:
+    """A content-addressed, on-disk cache of rendered data.
+
+    Each entry is a JSON file named after the hash of everything used to
+    produce it, so entries never need to be invalidated: if anything changes,
+    the key changes too. Old entries are evicted, least-recently-used first,
+    when the size of the cache exceeds `max_size`.
+    """
+
+    folder: Path
+    max_size: int
+
+    def __init__(self, folder: Path, *, max_size: int = 256 * 1024 * 1024):
+        self.folder = folder
+        self.max_size = max_size
+
+    def key(self, *parts: t.Any) -> str:
+        """Return a hash of the given parts and the current renderer fingerprint."""
+        data = json.dumps(
+            [get_fingerprint(), *parts],
+            ensure_ascii=False,
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> t.Any | None:
+        path = self._path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        # Mark it as recently used
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def set(self, key: str, value: t.Any) -> None:
+        path = self._path(key)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            # Write and rename, so concurrent builds never read a partial entry
+            tmp_path = path.with_name(f"{path.name}.{uuid4().hex}.tmp")
+            tmp_path.write_text(json.dumps(value, ensure_ascii=False), encoding="utf-8")
+            os.replace(tmp_path, path)
+        except OSError as err:
+            logger.debug("Could not write cache entry %s: %s", path, err)
+
+    def prune(self) -> None:
+        """Remove the least-recently-used entries until the cache is
+        under its maximum size."""
+        if not self.folder.exists():
+            return
+
+        entries = []
+        total = 0
+        for path in self.folder.rglob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+            total += stat.st_size
+
+        if total <= self.max_size:
+            return
+
+        entries.sort()
+        for _, size, path in entries:
+            path.unlink(missing_ok=True)
+            total -= size
+            if total <= self.max_size:
+                break
+
+    def _path(self, key: str) -> Path:
+        return self.folder / key[:2] / f"{key[2:]}.json"
+
+
+@cache
+def get_fingerprint() -> str:
+    """Return a fingerprint of everything, other than the page itself,
+    that affects how a page is rendered: the versions of writeadoc and
+    its rendering libraries, and the source code of the Markdown plugins.
+    """
+    hasher = hashlib.sha256()
+    for package in ("writeadoc", "mistune", "pygments"):
+        try:
+            version = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            version = ""
+        hasher.update(f"{package}={version};".encode())
+
+    here = Path(__file__).parent
+    for path in sorted((here / "md").glob("*.py")) + [here / "search.py"]:
+        hasher.update(path.read_bytes())
+
+    return hasher.hexdigest()
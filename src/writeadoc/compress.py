@@ -0,0 +1,77 @@
+"""
+Precompression of the files of a build, so the web servers can send them
+compressed as they are, instead of compressing them on every request.
+
+The `.br` files are only written if the optional `brotli` package
+is installed.
+"""
+import gzip
+import posixpath
+from pathlib import Path
+
+
+# The extensions of the files worth compressing
+COMPRESSIBLE = (
+    ".html",
+    ".xml",
+    ".txt",
+    ".json",
+    ".css",
+    ".js",
+    ".mjs",
+    ".map",
+    ".svg",
+    ".md",
+)
+# Smaller files are not compressed, the gain is not worth it
+MIN_SIZE = 1024
+
+# The extension of the compressed files of each encoding,
+# in order of preference
+ENCODINGS = {
+    "br": ".br",
+    "gzip": ".gz",
+}
+
+
+def get_encodings() -> list[str]:
+    """Return the encodings the files can be compressed with."""
+    try:
+        import brotli  # noqa: F401
+    except ImportError:
+        return ["gzip"]
+    return list(ENCODINGS)
+
+
+def is_compressible(relpath: str, size: int) -> bool:
+    """Whether a file of the build, of this size, is worth compressing."""
+    return relpath.endswith(COMPRESSIBLE) and size >= MIN_SIZE
+
+
+def is_compressed(relpath: str) -> bool:
+    """Whether this is the compressed copy of a file."""
+    name, ext = posixpath.splitext(relpath)
+    return ext in ENCODINGS.values() and name.endswith(COMPRESSIBLE)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    """Compress the data, with the best compression of the encoding.
+
+    The result is always the same for the same data, so the compressed
+    files only change if the original file does.
+    """
+    if encoding == "br":
+        import brotli
+
+        return brotli.compress(data, quality=11)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=9, mtime=0)
+    raise ValueError(f"Unknown encoding: {encoding!r}")
+
+
+def compress_file(path: Path, encoding: str) -> bytes:
+    """Write the compressed copy of the file next to it, and return
+    its content."""
+    data = compress(path.read_bytes(), encoding)
+    path.with_name(f"{path.name}{ENCODINGS[encoding]}").write_bytes(data)
+    return data
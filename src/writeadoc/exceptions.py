@@ -1,5 +1,10 @@
-__all__ = ("InvalidFrontMatter",)
+__all__ = ("InvalidFrontMatter", "BuildCancelled")
 
 
 class InvalidFrontMatter(Exception):
     pass
+
+
+class BuildCancelled(Exception):
+    """Raised to stop a rebuild because newer changes arrived."""
+    pass
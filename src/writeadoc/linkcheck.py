@@ -0,0 +1,234 @@
+import asyncio
+import http.client
+import json
+import os
+import time
+import typing as t
+import urllib.request
+from collections.abc import Iterable
+from pathlib import Path
+from urllib.error import HTTPError, URLError
+from urllib.parse import quote, urljoin, urlsplit
+from uuid import uuid4
+
+from .utils import logger
+
+
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+# The server is limiting the requests, so the URL couldn't be checked
+RATE_LIMITED = 429
+USER_AGENT = "writeadoc-linkcheck"
+# Characters allowed unquoted in the path and query of a request
+SAFE_CHARS = "/%:@!$&'()*+,;=-._~"
+
+
+class TLinkResult(t.TypedDict):
+    status: int
+    """The final HTTP status code, or 0 if the request failed."""
+    error: str
+    """The reason of the failure, if any."""
+    checked: float
+    """When the URL was checked, as a timestamp."""
+
+
+class LinkChecker:
+    """Check that external URLs are reachable.
+
+    The URLs are checked concurrently, with at most `max_connections` open
+    connections in total and `per_host` for the same host. Each URL is
+    requested with `HEAD` first and, if that fails (many servers don't
+    support it), with `GET`. Redirects are followed. A URL of a server that
+    is limiting the requests (429) is neither reachable nor broken, and is
+    checked again the next time.
+
+    The requests are made with `urllib.request`, each one in a thread, so
+    the proxies set in the environment are used.
+
+    The results are saved in a JSON file, so repeated builds only check
+    again the URLs that are new, that failed, or whose result is older
+    than `ttl` seconds.
+    """
+
+    cache_path: Path | None
+    ttl: float
+    per_host: int
+    max_connections: int
+    timeout: float
+    max_redirects: int
+
+    def __init__(
+        self,
+        cache_path: Path | None = None,
+        *,
+        ttl: float = 24 * 60 * 60,
+        per_host: int = 4,
+        max_connections: int = 32,
+        timeout: float = 10,
+        max_redirects: int = 5,
+    ):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self.per_host = per_host
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_redirects = max_redirects
+
+    def check(self, urls: Iterable[str]) -> dict[str, TLinkResult]:
+        """Check the URLs and return the result for each one.
+
+        Arguments:
+            urls: The absolute `http` or `https` URLs to check.
+
+        """
+        urls = sorted({url.partition("#")[0] for url in urls})
+        results = self._load_cache()
+        now = time.time()
+        pending = [
+            url for url in urls
+            if url not in results
+            or not is_ok(results[url])
+            or now - results[url]["checked"] > self.ttl
+        ]
+        if pending:
+            logger.debug("Checking %s external links", len(pending))
+            results.update(asyncio.run(self._check_all(pending)))
+            self._save_cache(results)
+        return {url: results[url] for url in urls}
+
+    # Private
+
+    def _load_cache(self) -> dict[str, TLinkResult]:
+        if not self.cache_path:
+            return {}
+        try:
+            data = json.loads(self.cache_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
+        return data if isinstance(data, dict) else {}
+
+    def _save_cache(self, results: dict[str, TLinkResult]) -> None:
+        if not self.cache_path:
+            return
+        # Forget the URLs that wouldn't be used anyway
+        now = time.time()
+        results = {
+            url: result for url, result in results.items()
+            if now - result["checked"] <= self.ttl
+        }
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.cache_path.with_name(f"{self.cache_path.name}.{uuid4().hex}.tmp")
+            tmp_path.write_text(json.dumps(results, indent=0, sort_keys=True), encoding="utf-8")
+            os.replace(tmp_path, self.cache_path)
+        except OSError as err:
+            logger.debug("Could not write the links cache %s: %s", self.cache_path, err)
+
+    async def _check_all(self, urls: list[str]) -> dict[str, TLinkResult]:
+        connections = asyncio.Semaphore(self.max_connections)
+        hosts: dict[str, asyncio.Semaphore] = {}
+        # Made here, so it uses the proxies set in the environment now
+        opener = urllib.request.build_opener(NoRedirectHandler)
+
+        async def request(method: str, url: str) -> tuple[int, str]:
+            host = urlsplit(url).netloc.lower()
+            if host not in hosts:
+                hosts[host] = asyncio.Semaphore(self.per_host)
+            # The host first, so the URLs of one host waiting for their turn
+            # don't take the connections that the other hosts could use
+            async with hosts[host], connections:
+                return await asyncio.wait_for(
+                    asyncio.to_thread(fetch_status, method, url, self.timeout, opener),
+                    timeout=self.timeout,
+                )
+
+        async def check_url(url: str) -> tuple[str, TLinkResult]:
+            status, error = 0, ""
+            for method in ("HEAD", "GET"):
+                status, error = await self._follow(request, method, url)
+                if status and (status < 400 or status == RATE_LIMITED):
+                    break
+            return url, {"status": status, "error": error, "checked": time.time()}
+
+        return dict(await asyncio.gather(*(check_url(url) for url in urls)))
+
+    async def _follow(
+        self,
+        request: t.Callable[[str, str], t.Awaitable[tuple[int, str]]],
+        method: str,
+        url: str,
+    ) -> tuple[int, str]:
+        """Request the URL, following the redirects, and return the
+        final status code and error message."""
+        for _ in range(self.max_redirects + 1):
+            try:
+                status, location = await request(method, url)
+            except TimeoutError:
+                return 0, "timeout"
+            except URLError as err:
+                if isinstance(err.reason, TimeoutError):
+                    return 0, "timeout"
+                return 0, str(err.reason) or err.__class__.__name__
+            except (OSError, ValueError, http.client.HTTPException) as err:
+                return 0, str(err) or err.__class__.__name__
+            if status not in REDIRECT_STATUSES or not location:
+                return status, ""
+            url = urljoin(url, location)
+            if urlsplit(url).scheme not in ("http", "https"):
+                return 0, f"redirected to {url}"
+        return 0, "too many redirects"
+
+
+def is_ok(result: TLinkResult) -> bool:
+    """Return whether the result is of a reachable URL."""
+    return 200 <= result["status"] < 400
+
+
+def is_rate_limited(result: TLinkResult) -> bool:
+    """Return whether the URL couldn't be checked because the server
+    is limiting the requests."""
+    return result["status"] == RATE_LIMITED
+
+
+def describe(result: TLinkResult) -> str:
+    """Return a short description of a failed result."""
+    return str(result["status"]) if result["status"] else result["error"]
+
+
+class NoRedirectHandler(urllib.request.HTTPRedirectHandler):
+    """Return the redirects as responses, instead of following them."""
+
+    def redirect_request(self, req, fp, code, msg, headers, newurl):
+        return None
+
+
+def fetch_status(
+    method: str,
+    url: str,
+    timeout: float = 10,
+    opener: urllib.request.OpenerDirector | None = None,
+) -> tuple[int, str]:
+    """Make a single request and return the status code and the
+    `Location` header, if any. The body of the response is never read.
+
+    The redirects are not followed. Pass an `opener` to reuse it between
+    requests.
+    """
+    opener = opener or urllib.request.build_opener(NoRedirectHandler)
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ValueError(f"invalid URL: {url}")
+    path = quote(parts.path or "/", safe=SAFE_CHARS)
+    if parts.query:
+        path = f"{path}?{quote(parts.query, safe=SAFE_CHARS + '?')}"
+    request = urllib.request.Request(
+        f"{parts.scheme}://{parts.netloc}{path}",
+        method=method,
+        headers={"User-Agent": USER_AGENT, "Accept": "*/*"},
+    )
+    try:
+        with opener.open(request, timeout=timeout) as response:
+            return response.status, response.headers.get("Location", "")
+    except HTTPError as err:
+        # The error statuses, and the redirects not followed
+        with err:
+            return err.code, err.headers.get("Location", "")
@@ -1,37 +1,79 @@
 import argparse
 import datetime
+import hashlib
 import json
+import os
+import posixpath
 import re
 import shutil
-import signal
+import threading
 import typing as t
-from collections.abc import Sequence
-from functools import partial
-from multiprocessing import Process
+from collections.abc import Iterable, Sequence
+from fnmatch import fnmatch
+from functools import cache
+from importlib import metadata
 from pathlib import Path
-from tempfile import mkdtemp
+from urllib.parse import unquote
 
 # from textwrap import dedent
 import jx
 from jx.tools import check_all
 from markupsafe import Markup
 
-from . import utils
-from .pages import PagesProcessor
-from .types import PageData, SiteData
+from . import compress, profiling, search, utils
+from .autodoc import RX_AUTODOC
+from .cache import CACHE_FOLDER, RenderCache
+from .exceptions import BuildCancelled
+from .md import highlight
+from .md.links import RX_HTML_ID
+from .minify import minify_html
+from .pages import RX_INCLUDE_DIRECTIVE, PagesProcessor
+from .profiling import Profiler
+from .types import PageData, SiteData, TSearchData
 from .utils import get_random_messages, logger
 
 
+EXTRA_FILES = (
+    "not_found.html",
+    "sitemap.xml",
+    "robots.txt",
+    "humans.txt",
+)
+
+RX_VIEW_IMPORT = re.compile(r"""\{#\s*import\s+["']([^"']+)["']""")
+RX_ASSET_URL = re.compile(r"""\b(href|src)=(["'])/assets/([^"'?#]+)\2""")
+RX_MD_LINK = re.compile(r"\[([^\]]*)\]\(([^)\s]+)(?:\s[^)]*)?\)")
+RX_EXTERNAL_URL = re.compile(r"^(https?://|mailto:|tel:)")
+RX_HTTP_URL = re.compile(r"^https?://", re.IGNORECASE)
+RX_PREFIXED_URL = re.compile(
+    r"""\b(href|src|action|poster|data|srcset|data-src)=("|')/(docs|assets|search)/"""
+)
+ASSETS_MANIFEST = "assets-manifest.json"
+# Where the hashes of the files of each build folder are saved between builds
+OUTPUTS_FOLDER = "outputs"
+
+# The keys of the views already validated by this process, without errors
+_valid_views: set[str] = set()
+
+
 class Docs:
     pages: Sequence[str | dict[str, t.Any]]
     site: SiteData
     prefix: str = ""
     variants: "dict[str, Docs]"
     is_main: bool = True
+    # The main documentation, if this is a variant
+    parent: "Docs | None" = None
     skip_home: bool = False
+    search_shard_size: int = 0
+    search_from_ast: bool = False
 
     strings: dict[str, str]
     catalog: jx.Catalog
+    cache: RenderCache | None
+    cache_dir: Path | None
+    # Content hash of each asset, by its path relative to the assets folder
+    asset_fingerprints: dict[str, str]
 
     root_dir: Path
     content_dir: Path
@@ -40,6 +82,32 @@ class Docs:
     build_dir: Path
 
     debug: bool = False
+    # How to copy the assets to the build folder (see `utils.sync_folder`)
+    assets_mode: str = "copy"
+    # The hashes of the files written by the current build, by path relative
+    # to the build folder. Only tracked when building for deployment.
+    outputs: dict[str, str] | None = None
+    # The files added, changed, and removed by the last deployment build
+    changes: dict[str, list[str]] | None = None
+    # Write a compressed copy of the text files of a deployment build
+    precompress: bool = False
+    # Minify the HTML files of the build (see `minify.py`)
+    minify: bool = False
+    # The content of the files of a development build, by path relative to
+    # the build folder, if kept in memory instead of written to the disk
+    memory_files: dict[str, bytes] | None = None
+    # The files of the last complete development build kept in memory,
+    # the ones served while a full build writes new `memory_files`
+    served_files: dict[str, bytes] | None = None
+    # The files changed by the current development rebuild, by path relative
+    # to the build folder. Only tracked while rebuilding.
+    written: set[str] | None = None
+    # Insert the script that reloads the pages when they change (only for
+    # the development server)
+    livereload: bool = False
+    # Only build the navigation, and render each page, and the search page,
+    # when requested (only for the development server)
+    lazy: bool = False
 
     def __init__(
         self,
@@ -51,6 +119,9 @@ class Docs:
         prefix: str = "",
         variants: "dict[str, Docs] | None" = None,
         skip_home: bool = False,
+        search_shard_size: int = 0,
+        search_from_ast: bool = False,
+        cache_dir: str | Path | None = CACHE_FOLDER,
     ):
         """
         Initialize the Docs object.
@@ -62,6 +133,16 @@ class Docs:
             prefix: The URL prefix for the documentation.
             variants: A dictionary of documentation variants.
             skip_home: Whether to skip generating the home page.
+            search_shard_size: If set, split the search index into shards
+                of about this many bytes, so the search page only loads the
+                ones needed for the query. Useful for very large sites.
+            search_from_ast: Build the search data from the Markdown tokens
+                while rendering the pages, instead of parsing their HTML
+                afterwards. Pages using components are still parsed.
+            cache_dir: The folder where the rendered pages, the checked
+                links, and the list of the built files are cached between
+                builds, relative to the root folder. Set it to `None` to
+                disable the cache.
 
         """
         root_dir = Path(root).resolve()
@@ -75,20 +156,31 @@ class Docs:
         self.views_dir = root_dir / "views"
         self.archive_dir = root_dir / "archive"
         self.build_dir = root_dir / "build"
+        self.cache_dir = root_dir / cache_dir if cache_dir is not None else None
+        self.cache = RenderCache(self.cache_dir / "render") if self.cache_dir else None
+        self.asset_fingerprints = {}
 
         self.pages = pages
         self.site = SiteData(**(site or {}))
         self.prefix = prefix.strip("/").strip()
         self.skip_home = skip_home
+        self.search_shard_size = search_shard_size
+        self.search_from_ast = search_from_ast
 
         variants = variants or {}
         for prefix, variant in variants.items():
             variant.content_dir = self.content_dir / prefix
             variant.prefix = f"{self.prefix}/{prefix}" if self.prefix else prefix
             variant.is_main = False
+            variant.parent = self
         self.variants = variants
 
         self.pages_processor = PagesProcessor(self)
+        # Pages and files waiting to be rendered by a cancelled rebuild
+        self._pending_pages: set[str] = set()
+        self._pending_files: set[str] = set()
+        # The URLs of the pages whose content is not loaded yet, if lazy
+        self._unloaded: set[str] = set()
 
         self.catalog = jx.Catalog(
             site=self.site,
@@ -98,7 +190,6 @@ class Docs:
             _insert_asset=self.insert_asset,
         )
         self.init_catalog()
-        self.check_catalog()
 
     def init_catalog(self):
         strings_file = self.views_dir / "strings.json"
@@ -110,16 +201,44 @@ class Docs:
         self.catalog.add_folder(self.views_dir)
 
     def check_catalog(self):
+        # The variants share the views of the main documentation, and the
+        # views rarely change between runs, so the views are validated again
+        # only if their content (or the version of jx) changed.
+        key = self._get_views_key()
+        if key in _valid_views or (self.cache and self.cache.get(key)):
+            return
+
         print("\nValidating views...")
         errors, checked = check_all(self.catalog)
         for error in errors:
             print(f"{error.file}:{error.line} - {error.message}")
+        # Only valid views are remembered, so the errors are shown every time
+        if not errors:
+            _valid_views.add(key)
+            if self.cache:
+                self.cache.set(key, {"checked": checked})
 
     def cli(self):
         parser = argparse.ArgumentParser(description="WriteADoc CLI")
         subparsers = parser.add_subparsers(dest="command")
 
-        subparsers.add_parser("run", help="Run and watch for changes")
+        run_parser = subparsers.add_parser("run", help="Run and watch for changes")
+        run_parser.add_argument(
+            "--delay",
+            type=float,
+            default=0.3,
+            metavar="SECONDS",
+            help="Wait for this many seconds without changes before rebuilding (default: 0.3)"
+        )
+        run_parser.add_argument(
+            "--lazy",
+            action="store_true",
+            default=False,
+            help=(
+                "Start serving right away and render each page the first time"
+                " it is requested, instead of building all of them first"
+            ),
+        )
 
         build_parser = subparsers.add_parser("build", help="Build the documentation for deployment")
         build_parser.add_argument(
@@ -140,44 +259,214 @@ class Docs:
             default=False,
             help="Remove the random messages from the log output"
         )
+        build_parser.add_argument(
+            "--jobs",
+            "-j",
+            type=int,
+            default=1,
+            metavar="N",
+            help="Render the pages using N processes (0 = one per CPU)"
+        )
+        build_parser.add_argument(
+            "--no-cache",
+            action="store_true",
+            default=False,
+            help=f"Do not use or update the rendering cache in `{CACHE_FOLDER}`"
+        )
+        build_parser.add_argument(
+            "--check-external",
+            action="store_true",
+            default=False,
+            help="Check that the external links are reachable (needs network access)"
+        )
+        build_parser.add_argument(
+            "--assets-mode",
+            choices=utils.SYNC_MODES,
+            default="copy",
+            help=(
+                "How to copy the changed assets to the build folder: as regular copies,"
+                " hard links, or copy-on-write clones (default: copy)"
+            ),
+        )
+        build_parser.add_argument(
+            "--minify",
+            action="store_true",
+            default=False,
+            help=(
+                "Remove the comments and the extra whitespace of the HTML files,"
+                " keeping the code blocks as they are"
+            ),
+        )
+        build_parser.add_argument(
+            "--precompress",
+            action="store_true",
+            default=False,
+            help=(
+                "Also write a gzip (and, if the `brotli` package is installed, brotli)"
+                " compressed copy of the text files, for the web servers that can use them"
+            ),
+        )
+        build_parser.add_argument(
+            "--profile",
+            metavar="PATH",
+            default=None,
+            help=(
+                "Time the stages of the build and the steps of every page, print"
+                " a summary, and save the full report as a JSON file"
+            ),
+        )
+        build_parser.add_argument(
+            "--profile-top",
+            type=int,
+            default=10,
+            metavar="N",
+            help="Number of the slowest pages to list in the profile summary (default: 10)",
+        )
+        build_parser.add_argument(
+            "--profile-trace",
+            metavar="PATH",
+            default=None,
+            help="Also save the profile as a Chrome trace file (for ui.perfetto.dev)",
+        )
+        build_parser.add_argument(
+            "--profile-pstats",
+            metavar="PATH",
+            default=None,
+            help="Also run cProfile in the main process and save the stats to this file",
+        )
+        build_parser.add_argument(
+            "--changes",
+            metavar="PATH",
+            default=None,
+            help=(
+                "Write a JSON file with the lists of files added, changed,"
+                " and removed since the last build"
+            ),
+        )
 
         args = parser.parse_args()
 
         if args.command == "build":
-            self.cli_build(archive=args.archive, llm=args.llm, boring=args.boring)
-        elif args.command in (None, "run"):
+            self.cli_build(
+                archive=args.archive,
+                llm=args.llm,
+                boring=args.boring,
+                jobs=args.jobs,
+                no_cache=args.no_cache,
+                check_external=args.check_external,
+                assets_mode=args.assets_mode,
+                minify=args.minify,
+                precompress=args.precompress,
+                changes=args.changes,
+                profile=args.profile,
+                profile_top=args.profile_top,
+                profile_trace=args.profile_trace,
+                profile_pstats=args.profile_pstats,
+            )
+        elif args.command == "run":
+            self.cli_run(delay=args.delay, lazy=args.lazy)
+        elif args.command is None:
             self.cli_run()
         else:
             parser.print_help()
 
-    def cli_run(self) -> None:
+    def cli_run(self, *, delay: float = 0.3, lazy: bool = False) -> None:
         """Run the documentation server and watch for changes.
+
+        Arguments:
+            delay:
+                Seconds to wait, after a file changes, for more changes
+                before rebuilding.
+            lazy:
+                Only build the navigation before starting the server, and
+                render each page the first time it is requested. The search
+                page, that needs the content of all the pages, is also
+                rendered when requested, and the links of each page are
+                validated after rendering it.
+
         """
-        self.build_dir = Path(mkdtemp(prefix="wad-"))
+        # Imported here, so the server and `watchdog` are only loaded
+        # by the development server
+        from .server import LiveReload, RecentPages, start_server
+        from .watcher import start_observer
+
+        # The pages are kept in memory and served from there, and the
+        # assets are served from their folder, so nothing is written
+        self.memory_files = {}
+        self.livereload = True
+        self.lazy = lazy
         for variant in self.variants.values():
-            variant.build_dir = self.build_dir
+            variant.memory_files = self.memory_files
+            variant.livereload = True
+            variant.lazy = lazy
 
         self.build(devmode=True)  # Initial build
         print()
-        p = Process(
-            target=utils.start_server,
-            args=(str(self.build_dir),),
-            daemon=True
+        livereload = LiveReload()
+        recent = RecentPages()
+        assets_url = f"/{self.prefix}/assets/" if self.prefix else "/assets/"
+        # The pages rendered on demand, by the threads of the server, must
+        # not be rendered while rebuilding
+        lock = threading.Lock()
+
+        def render(relpath: str) -> bytes | None:
+            with lock:
+                return self.render_on_demand(relpath)
+
+        server = start_server(
+            files=lambda: self.served_files or {},
+            folders={assets_url: self.assets_dir},
+            livereload=livereload,
+            render=render if lazy else None,
+            recent=recent,
         )
-        p.start()
-        utils.start_observer(self.root_dir, partial(self.build, devmode=True))
 
-        def shutdown(*args):
-            p.terminate()
-            p.join()
-            exit(0)
+        def rebuild(paths: list[str], *, cancel: threading.Event | None = None) -> None:
+            # Reload the open pages that changed, rendering first, and
+            # reloading before the rest, the pages viewed recently
+            with lock:
+                urls = self.rebuild(
+                    paths,
+                    cancel=cancel,
+                    priority=recent.get(),
+                    notify=livereload.notify,
+                )
+            livereload.notify(urls)
 
-        signal.signal(signal.SIGINT, shutdown)
-        signal.signal(signal.SIGTERM, shutdown)
+        try:
+            start_observer(self.root_dir, rebuild, delay=delay)
+        finally:
+            livereload.close()
+            server.shutdown()
 
-    def cli_build(self, *, archive: bool, llm: bool = False, boring: bool = False) -> None:
+    def cli_build(
+        self,
+        *,
+        archive: bool,
+        llm: bool = False,
+        boring: bool = False,
+        jobs: int = 1,
+        no_cache: bool = False,
+        check_external: bool = False,
+        assets_mode: str = "copy",
+        minify: bool = False,
+        precompress: bool = False,
+        changes: str | Path | None = None,
+        profile: str | Path | None = None,
+        profile_top: int = 10,
+        profile_trace: str | Path | None = None,
+        profile_pstats: str | Path | None = None,
+    ) -> None:
         """Build the documentation for deployment.
         """
+        if jobs < 1:
+            jobs = os.cpu_count() or 1
+        if no_cache:
+            self.cache = None
+        self.assets_mode = assets_mode
+        self.minify = minify
+        self.precompress = precompress
+
         if archive:
             self.build_dir = self.archive_dir
             self.prefix = f"{self.prefix}/{self.site.version}" if self.prefix else self.site.version
@@ -188,57 +477,240 @@ class Docs:
         for prefix, variant in self.variants.items():
             variant.build_dir = self.build_dir
             variant.prefix = f"{self.prefix}/{prefix}" if self.prefix else prefix
-
-        self.build(devmode=False, llm=llm, boring=boring)
+            variant.cache = self.cache
+            variant.cache_dir = self.cache_dir
+            variant.minify = minify
+
+        profiler = Profiler() if (profile or profile_trace or profile_pstats) else None
+        pstats = None
+        if profile_pstats:
+            import cProfile
+
+            pstats = cProfile.Profile()
+        with profiling.enabled(profiler):
+            if pstats:
+                pstats.enable()
+            with profiling.stage("build"):
+                self.build(devmode=False, llm=llm, boring=boring, jobs=jobs)
+            if check_external:
+                with profiling.stage("check external links"):
+                    self._check_external_links()
+            if pstats:
+                pstats.disable()
+
+        if profiler:
+            print(f"\n{profiler.summary(profile_top)}")
+            if profile:
+                profiler.save(profile)
+            if profile_trace:
+                profiler.save_trace(profile_trace)
+        if pstats and profile_pstats:
+            pstats.dump_stats(profile_pstats)
+        if changes and self.changes is not None:
+            Path(changes).write_text(json.dumps(self.changes, indent=2), encoding="utf-8")
         print("\nDocumentation built successfully.")
         if archive:
             print(f"Archived documentation is available in the `archive/{self.site.version}` folder.")
         else:
             print("Documentation is available in the `build` folder.")
 
-    def build(self, *, devmode: bool = True, llm: bool = False, boring: bool = False) -> None:
-        if not boring:
-            messages = get_random_messages(3)
+    def build(
+        self,
+        *,
+        devmode: bool = True,
+        llm: bool = False,
+        boring: bool = False,
+        jobs: int = 1,
+    ) -> None:
+        messages = [] if boring else get_random_messages(3)
+        if messages:
             print(f"{messages[0]}...")
 
+        if self.is_main:
+            # Validated here, and not when created, so the options of the
+            # build, like `--no-cache`, are already set
+            for docs in (self, *self.variants.values()):
+                docs.check_catalog()
+            highlight.clear_cache()
+            if self.memory_files is not None:
+                # Everything is written again, to a new dict, so the server
+                # keeps serving the previous build until this one is complete
+                self.memory_files = {}
+                for variant in self.variants.values():
+                    variant.memory_files = self.memory_files
+            # Computed before rendering anything, so the URLs of the assets
+            # can be fingerprinted as each page is rendered.
+            with profiling.stage("fingerprint assets"):
+                self.asset_fingerprints = {} if devmode else self._get_asset_fingerprints()
+            self.outputs = None if devmode else {}
+
         for variant in self.variants.values():
-            variant.build(devmode=devmode, llm=llm)
+            # The variants use the assets of the main documentation
+            variant.asset_fingerprints = self.asset_fingerprints
+            # and are written to the same build folder
+            variant.outputs = self.outputs
+
+        # The variants don't depend on each other, or on the main documentation,
+        # so all of them are built at the same time, each in its own process
+        # (if there are enough CPUs), splitting the `jobs` between them.
+        # Not in development, where the build runs next to the threads of
+        # the server and the watcher.
+        all_docs = [*self.variants.values(), self]
+        options = {
+            "llm": llm,
+            "jobs": max(1, jobs // len(all_docs)),
+        }
+        results = utils.parallel_map(
+            _build_docs,
+            range(len(all_docs)),
+            shared=(all_docs, options, messages[1:]),
+            jobs=1 if devmode else min(len(all_docs), os.cpu_count() or 1),
+        )
+        for docs, state in zip(all_docs, results, strict=True):
+            docs._set_build_state(state)
 
-        print("Processing pages...")
-        nav, pages = self.pages_processor.run(self.pages)
-        if not boring:
-            print(f"{messages[1]}...")
+        if self.is_main:
+            if self.cache:
+                self.cache.prune()
+            with profiling.stage("extra files"):
+                self._render_extra()
+            if devmode:
+                # The assets of the builds kept in memory are served from
+                # their own folder
+                if self.memory_files is None:
+                    self._symlink_assets()
+                self.served_files = self.memory_files
+            else:
+                print("Copying assets...")
+                with profiling.stage("copy assets"):
+                    self._copy_assets()
+                    self._write_assets_manifest()
+                if self.precompress:
+                    print("Compressing files...")
+                    with profiling.stage("precompress"):
+                        self._precompress()
+                with profiling.stage("outputs manifest"):
+                    self.changes = self._update_outputs_manifest()
+
+    def rebuild(
+        self,
+        changed: Iterable[str | Path],
+        *,
+        cancel: threading.Event | None = None,
+        priority: Sequence[str] = (),
+        notify: t.Callable[[list[str]], None] | None = None,
+    ) -> list[str]:
+        """Update the development build after some source files changed.
+
+        Only the pages affected by the changes are processed and rendered
+        again, and so are the search page and the other extra files, only if
+        their content could have changed. A change to a Markdown file that is
+        not a page reloads the pages that include other files, and a change
+        to a Python file, or any change after a full build that failed,
+        triggers a full build.
 
-        self.site.nav = nav
-        self.site.pages = pages
+        Arguments:
+            changed:
+                The paths of the files that changed.
+            cancel:
+                An optional event that, when set, stops the rebuild by raising
+                a `BuildCancelled` exception. The pages that were not rendered
+                yet are rendered by the next rebuild.
+            priority:
+                The URLs of the pages to render before the others, in order.
+                For example, the pages open in the browser.
+            notify:
+                If set, called with the URLs of the files changed so far,
+                right after rendering the pages in `priority`, if there are
+                more pages to render. Those URLs are not returned again.
+
+        Returns:
+            The URLs of the files of the build that changed, including the
+            assets, or `["*"]` after a full build.
 
-        if self.prefix and not self.site.base_url.endswith(f"/{self.prefix}"):
-            self.site.base_url = f"{self.site.base_url}/{self.prefix}"
+        """
+        paths = {Path(path).resolve() for path in changed}
+        if (
+            not self.site.pages
+            or any(path.suffix == ".py" for path in paths)
+            # The previous full build failed before completing
+            or self.memory_files is not self.served_files
+        ):
+            self.build(devmode=True)
+            return ["*"]
+
+        # The files written by a cancelled rebuild are kept,
+        # and reported by the next one
+        if self.written is None:
+            self.written = set()
+        # The documentation of the priority pages is rebuilt first
+        all_docs = []
+        for url in priority:
+            docs = self._get_docs_of(url)
+            if docs not in all_docs:
+                all_docs.append(docs)
+        all_docs.extend(
+            docs for docs in (*self.variants.values(), self) if docs not in all_docs
+        )
+        # A Markdown file that isn't a page could be included by one
+        page_paths = {page.filepath for docs in all_docs for page in docs.site.pages}
+        included = any(path.suffix == ".md" and path not in page_paths for path in paths)
+        for docs in all_docs:
+            docs.written = self.written
+            docs._rebuild(
+                paths, included=included, cancel=cancel, priority=priority, notify=notify
+            )
 
-        print("Rendering pages...")
-        for page in pages:
-            self._render_page(page)
-        if not boring:
-            print(f"{messages[2]}...")
+        # The assets are linked, not copied, in development builds
+        assets_url = f"/{self.prefix}/assets" if self.prefix else "/assets"
+        urls = [
+            f"{assets_url}/{path.relative_to(self.assets_dir).as_posix()}"
+            for path in paths
+            if path.is_relative_to(self.assets_dir)
+        ]
+        urls.extend(self._pop_written_urls())
+        self.written = None
+        for variant in self.variants.values():
+            variant.written = None
+        return sorted(urls)
 
-        if llm:
-            print("Building llms.txt...")
-            self._render_llm_file()
+    def render_on_demand(self, relpath: str) -> bytes | None:
+        """Render a file of a lazy development build, of this documentation
+        or of its variants, that was not rendered yet.
 
-        self._render_search_page()
-        self._render_redirect_pages()
-        self._add_prefix_to_urls()
-        self._validate_links()
+        Arguments:
+            relpath:
+                The path of the file, relative to the build folder.
 
-        if self.is_main:
-            self._render_extra()
-            if devmode:
-                self._symlink_assets()
-            else:
-                print("Copying assets...")
-                self._copy_assets()
-                print("Fingerprinting assets URLs...")
-                self._fingerprint_assets()
+        Returns:
+            The content of the file, or `None` if there is no such file.
+
+        """
+        if self.memory_files is None:
+            return None
+        data = self.memory_files.get(relpath)
+        if data is not None:
+            return data
+
+        for docs in (*self.variants.values(), self):
+            search_dir = posixpath.join(docs.prefix, "search")
+            if relpath.startswith(f"{search_dir}/"):
+                if f"{search_dir}/index.html" in self.memory_files:
+                    # Already rendered, so that file doesn't exist
+                    return None
+                print("Rendering search page...")
+                docs._load_pages(docs.site.pages)
+                docs._render_search_page()
+                return self.memory_files.get(relpath)
+
+            for page in docs.site.pages:
+                if f"{page.url.strip('/')}/index.html".lstrip("/") == relpath:
+                    print(f"Rendering {page.url}...")
+                    docs._load_pages([page])
+                    docs._render_page(page)
+                    docs._validate_links([page])
+                    return self.memory_files.get(relpath)
+        return None
 
     def translate(self, key: str, **kwargs) -> str:
         """
@@ -263,19 +735,302 @@ class Docs:
 
     # Private
 
-    def _render_page(self, page: PageData) -> None:
+    def _build_pages(
+        self,
+        *,
+        llm: bool = False,
+        jobs: int = 1,
+        messages: Sequence[str] = (),
+    ) -> None:
+        """Build the pages of this documentation, without the variants, and
+        the files that depend on them."""
+        print("Processing pages...")
+        with profiling.stage("process pages", docs=self.prefix):
+            nav, pages = self.pages_processor.run(self.pages, jobs=jobs, lazy=self.lazy)
+        if messages:
+            print(f"{messages[0]}...")
+
+        self.site.nav = nav
+        self.site.pages = pages
+        self._unloaded = set(self.pages_processor.unloaded)
+
+        if self.prefix and not self.site.base_url.endswith(f"/{self.prefix}"):
+            self.site.base_url = f"{self.site.base_url}/{self.prefix}"
+
+        if self.lazy:
+            # The pages and the search page are rendered when requested
+            self._render_redirect_pages()
+            return
+
+        print("Rendering pages...")
+        with profiling.stage("render pages", docs=self.prefix):
+            self._render_pages(pages, jobs=jobs)
+        if messages[1:]:
+            print(f"{messages[1]}...")
+
+        if llm:
+            print("Building llms.txt...")
+            with profiling.stage("llms.txt", docs=self.prefix):
+                self._render_llm_file()
+
+        with profiling.stage("search page", docs=self.prefix):
+            self._render_search_page()
+        with profiling.stage("redirect pages", docs=self.prefix):
+            self._render_redirect_pages()
+        with profiling.stage("validate links", docs=self.prefix):
+            self._validate_links()
+
+    def _get_build_state(self) -> dict[str, t.Any]:
+        """Return what the main process needs to know of a build
+        done in a worker process."""
+        return {
+            "nav": self.site.nav,
+            "pages": self.site.pages,
+            "base_url": self.site.base_url,
+            "outputs": self.outputs,
+            "memory_files": self.memory_files,
+            "unloaded": self._unloaded,
+            "profile": profiling.flush(),
+        }
+
+    def _set_build_state(self, state: dict[str, t.Any]) -> None:
+        self.site.nav = state["nav"]
+        self.site.pages = state["pages"]
+        self.site.base_url = state["base_url"]
+        self._unloaded = state["unloaded"]
+        if self.outputs is not None and state["outputs"] is not self.outputs:
+            self.outputs.update(state["outputs"])
+        if self.memory_files is not None and state["memory_files"] is not self.memory_files:
+            self.memory_files.update(state["memory_files"])
+        profiling.merge(state["profile"])
+
+    def _rebuild(
+        self,
+        paths: set[Path],
+        *,
+        included: bool = False,
+        cancel: threading.Event | None = None,
+        priority: Sequence[str] = (),
+        notify: t.Callable[[list[str]], None] | None = None,
+    ) -> None:
+        views = {
+            path.relative_to(self.views_dir).as_posix()
+            for path in paths
+            if path.suffix == ".jx" and path.is_relative_to(self.views_dir)
+        }
+        if views:
+            # Register any new view
+            self.catalog.add_folder(self.views_dir)
+        views = self._get_dependant_views(views)
+
+        reload = {page.filepath for page in self.site.pages if page.filepath in paths}
+        for page in self.site.pages:
+            if not page.filepath or page.filepath in reload:
+                continue
+            imports = page.meta.get("imports")
+            if isinstance(imports, dict) and views.intersection(imports.values()):
+                reload.add(page.filepath)
+            elif included and RX_INCLUDE_DIRECTIVE.search(page.source):
+                reload.add(page.filepath)
+            elif "autodoc.md.jx" in views and RX_AUTODOC.search(
+                page.filepath.read_text(encoding="utf-8")
+            ):
+                reload.add(page.filepath)
+
+        if not reload and not views and not self._pending_pages and not self._pending_files:
+            return
+
+        old_nav = [item.dict() for item in self.site.nav]
+        old_search_data = [page.search_data for page in self.site.pages]
+        if reload:
+            print("Processing pages...")
+            reuse = {
+                page.filepath.relative_to(self.content_dir).as_posix(): (
+                    page.source,
+                    page.meta,
+                    page.content,
+                    {
+                        "toc_items": page.toc,
+                        "search_fragments": page.search_fragments,
+                        "links": page.links,
+                        "ids": page.ids,
+                    },
+                )
+                for page in self.site.pages
+                if page.filepath
+                and page.filepath not in reload
+                and page.url not in self._unloaded
+            }
+            nav, pages = self.pages_processor.run(self.pages, reuse=reuse, lazy=self.lazy)
+            self.site.nav = nav
+            self.site.pages = pages
+            if self.lazy:
+                self._unloaded = set(self.pages_processor.unloaded)
+
+        nav_changed = [item.dict() for item in self.site.nav] != old_nav
+        search_changed = [page.search_data for page in self.site.pages] != old_search_data
+        extra_views = {f"{file}.jx" for file in EXTRA_FILES}
+
+        # Remember what must be rendered, in case this rebuild is cancelled
+        pages = [
+            page for page in self.site.pages
+            # The navigation is in every page
+            if nav_changed
+            or page.filepath in reload
+            or page.view in views
+            or page.url in self._pending_pages
+        ]
+        if self.lazy:
+            self._rebuild_lazy(
+                pages,
+                search=bool(reload) or "search.jx" in views,
+                redirects=nav_changed,
+                extra=self.is_main and (nav_changed or bool(views & extra_views)),
+            )
+            return
+
+        self._pending_pages.update(page.url for page in pages)
+        if search_changed or "search.jx" in views:
+            self._pending_files.add("search")
+        if nav_changed:
+            self._pending_files.add("redirects")
+        if self.is_main and (nav_changed or views & extra_views):
+            self._pending_files.add("extra")
+
+        if pages:
+            print(f"Rendering {len(pages)} page{'s' if len(pages) > 1 else ''}...")
+            self._render_pages(pages, cancel=cancel, priority=priority, notify=notify)
+
+        if "search" in self._pending_files:
+            self._render_search_page()
+        if "redirects" in self._pending_files:
+            self._render_redirect_pages()
+        self._validate_links([page for page in self.site.pages if page.filepath in reload])
+        if "extra" in self._pending_files:
+            self._render_extra()
+        self._pending_files.clear()
+
+    def _rebuild_lazy(
+        self,
+        pages: list[PageData],
+        *,
+        search: bool,
+        redirects: bool,
+        extra: bool,
+    ) -> None:
+        """Remove the files of the pages, and of the search page, that
+        changed, so they are rendered again the next time they are requested.
+        The files of the open pages are reported as written, so they reload.
+        """
+        for page in pages:
+            self._remove_file(self.build_dir / str(page.url).strip("/") / "index.html")
+        if search:
+            for path in self._list_output_folder(self.build_dir / self.prefix / "search"):
+                self._remove_file(path)
+        if redirects:
+            self._render_redirect_pages()
+        if extra:
+            self._render_extra()
+
+    def _load_pages(self, pages: list[PageData]) -> None:
+        """Load the content, and the search data, of the pages of a lazy
+        build that are not loaded yet."""
+        for page in pages:
+            if page.url in self._unloaded:
+                self.pages_processor.load_content(page)
+                self._unloaded.discard(page.url)
+            if page.search_data is None:
+                page.search_data = self.pages_processor.get_search_data(page)
+
+    def _get_docs_of(self, url: str) -> "Docs":
+        """Return this documentation, or the variant, that the URL is part of."""
+        for docs in sorted(self.variants.values(), key=lambda docs: -len(docs.prefix)):
+            if url.startswith(f"/{docs.prefix}/"):
+                return docs
+        return self
+
+    def _pop_written_urls(self) -> list[str]:
+        """Return the URLs of the files written since the last call."""
+        urls = sorted(f"/{path.removesuffix('index.html')}" for path in self.written or ())
+        if self.written:
+            self.written.clear()
+        return urls
+
+    def _get_dependant_views(self, views: set[str]) -> set[str]:
+        """Return the given views and all the views that import them,
+        directly or indirectly."""
+        importers: dict[str, set[str]] = {}
+        for path in self.views_dir.rglob("*.jx"):
+            relpath = path.relative_to(self.views_dir).as_posix()
+            for imported in RX_VIEW_IMPORT.findall(path.read_text(encoding="utf-8")):
+                if imported.startswith("."):
+                    imported = posixpath.normpath(
+                        posixpath.join(posixpath.dirname(relpath), imported)
+                    )
+                importers.setdefault(imported.strip("/"), set()).add(relpath)
+
+        dependants = set()
+        pending = list(views)
+        while pending:
+            view = pending.pop()
+            if view not in dependants:
+                dependants.add(view)
+                pending.extend(importers.get(view, ()))
+        return dependants
+
+    def _render_pages(
+        self,
+        pages: list[PageData],
+        *,
+        jobs: int = 1,
+        cancel: threading.Event | None = None,
+        priority: Sequence[str] = (),
+        notify: t.Callable[[list[str]], None] | None = None,
+    ) -> None:
+        """Render the pages, in a pool of `jobs` processes if greater than 1.
+        The files are always written by this process, in order.
+
+        The pages with an URL in `priority` are rendered first, in that
+        order, and then `notify` is called with the URLs written so far.
+        """
+        if priority:
+            order = {url: index for index, url in enumerate(priority)}
+            pages = sorted(pages, key=lambda page: order.get(page.url, len(order)))
+            first = sum(1 for page in pages if page.url in order)
+        else:
+            first = 0
+
+        results = utils.parallel_map(
+            _render_page_html, range(len(pages)), shared=(self, pages), jobs=jobs
+        )
+        for index, (page, (html, profile)) in enumerate(zip(pages, results, strict=True)):
+            profiling.merge(profile)
+            if cancel is not None and cancel.is_set():
+                raise BuildCancelled()
+            self._render_page(page, html=html)
+            self._pending_pages.discard(page.url)
+            if notify and index + 1 == first < len(pages):
+                # Reload the priority pages before rendering the rest
+                notify((self.parent or self)._pop_written_urls())
+
+    def _render_page(self, page: PageData, *, html: str | None = None) -> None:
         outpath = self.build_dir / str(page.url).strip("/") / "index.html"
-        outpath.parent.mkdir(parents=True, exist_ok=True)
+        if html is None:
+            html = self._render_page_html(page)
+        with profiling.step("write", page=page.url):
+            self._write_file(outpath, html)
 
+    def _render_page_html(self, page: PageData) -> str:
         try:
-            html = self.catalog.render(
-                page.view,
-                globals={"page": page}
-            )
+            with profiling.step("render", page=page.url):
+                html = self.catalog.render(
+                    page.view,
+                    globals={"page": page}
+                )
         except Exception as err:
             raise RuntimeError(f"Error rendering {page.filepath}") from err
-        outpath.write_text(html, encoding="utf-8")
-        self.log(outpath)
+        with profiling.step("filters", page=page.url):
+            return self._process_html(html)
 
     def _render_search_page(self) -> None:
         if not (self.views_dir / "search.jx").exists():
@@ -283,7 +1038,6 @@ class Docs:
             return None
 
         outpath = self.build_dir / self.prefix / "search" / "index.html"
-        outpath.parent.mkdir(parents=True, exist_ok=True)
         url = f"/{self.prefix}/search/" if self.prefix else "/search/"
 
         page = PageData(
@@ -298,16 +1052,58 @@ class Docs:
         for p in self.site.pages:
             search_data.update(p.search_data or {})
 
+        urls = self._write_search_files(outpath.parent, url, search_data)
+
         try:
             html = self.catalog.render(
                 page.view,
-                search_data=search_data,
+                **urls,
                 globals={"page": page}
             )
         except jx.JxException as err:
             raise RuntimeError("Error rendering search page") from err
-        outpath.write_text(html, encoding="utf-8")
-        self.log(outpath)
+        self._write_file(outpath, self._process_html(html))
+
+    def _write_search_files(
+        self,
+        folder: Path,
+        url: str,
+        search_data: TSearchData,
+    ) -> dict[str, str]:
+        """Write the search data and index files used by the search page,
+        and return their URLs.
+        """
+        files: dict[str, t.Any] = {}
+        if self.search_shard_size > 0:
+            manifest, shards = search.build_search_shards(
+                search_data, self.search_shard_size
+            )
+            files.update(shards)
+            files["manifest.json"] = manifest
+            urls = {"manifest_url": f"{url}manifest.json"}
+        else:
+            # The search data and the prebuilt index are saved as separated
+            # files, loaded asynchronously by the search page.
+            files["store.json"] = search_data
+            urls = {"store_url": f"{url}store.json"}
+            index = search.build_search_index(search_data)
+            if index:
+                files["index.json"] = index
+                urls["index_url"] = f"{url}index.json"
+
+        for name, data in files.items():
+            self._write_file(folder / name, json.dumps(data, separators=(",", ":")))
+
+        # Remove the files of the other modes and the shards of previous builds
+        for path in self._list_output_folder(folder):
+            if path.name not in files and (
+                path.name in ("manifest.json", "store.json", "index.json")
+                or fnmatch(path.name, "terms-*.json")
+                or fnmatch(path.name, "docs-*.json")
+            ):
+                self._remove_file(path)
+
+        return urls
 
     def _render_redirect_pages(self) -> None:
         if len(self.site.pages) < 2:
@@ -316,29 +1112,18 @@ class Docs:
 
         # Use the first page as the redirect target
         url = self.site.pages[1].url
-        html = (
+        html = self._process_html(
             '<!DOCTYPE html><html><head><meta charset="utf-8">'
             f'<meta http-equiv="refresh" content="0; url={url}">'
             "<title></title></head><body></body></html>"
         )
 
-        outpath = self.build_dir / self.prefix / "docs" / "index.html"
-        outpath.parent.mkdir(parents=True, exist_ok=True)
-        outpath.write_text(html, encoding="utf-8")
-        self.log(outpath)
-
+        self._write_file(self.build_dir / self.prefix / "docs" / "index.html", html)
         if self.skip_home:
-            outpath = self.build_dir / self.prefix / "index.html"
-            outpath.write_text(html, encoding="utf-8")
-            self.log(outpath)
+            self._write_file(self.build_dir / self.prefix / "index.html", html)
 
     def _render_extra(self) -> None:
-        for file in (
-            "not_found.html",
-            "sitemap.xml",
-            "robots.txt",
-            "humans.txt"
-        ):
+        for file in EXTRA_FILES:
             url = f"/{self.prefix}/{file}" if self.prefix else f"/{file}"
             page = PageData(
                 url=url,
@@ -348,7 +1133,6 @@ class Docs:
                 },
             )
             outpath = self.build_dir / self.prefix / file
-            outpath.parent.mkdir(parents=True, exist_ok=True)
             try:
                 body = self.catalog.render(
                     f"{file}.jx",
@@ -357,50 +1141,44 @@ class Docs:
             except jx.ComponentNotFoundError:
                 logger.info("No view found for %s, skipping...", file)
                 continue
-            outpath.write_text(body, encoding="utf-8")
-            self.log(outpath)
+            if file.endswith(".html"):
+                body = self._process_html(body)
+            self._write_file(outpath, body)
 
     def _render_llm_file(self) -> None:
         outpath = self.build_dir / self.prefix / "llms.txt"
-        outpath.parent.mkdir(parents=True, exist_ok=True)
         try:
             body = self.catalog.render("llm.jx")
         except jx.JxException as err:
             raise RuntimeError("Error rendering llms.txt") from err
-        outpath.write_text(body, encoding="utf-8")
-        self.log(outpath)
+        self._write_file(outpath, body)
 
-    def _add_prefix_to_urls(self) -> None:
-        """Update URLs in the site data for archived documentation."""
-        if not self.prefix:
-            return
-
-        folders = "docs|assets|search" if self.is_main else "docs|search"
-        rx_urls = re.compile(fr"""(href|src|action|poster|data|srcset|data-src)=("|')/({folders})/""")
-
-        build_dir = self.build_dir / self.prefix
-        for html_file in build_dir.rglob("*.html"):
-            content = html_file.read_text()
+    def _validate_links(self, pages: list[PageData] | None = None) -> None:
+        """Print a warning for each broken link in the source of the pages.
 
-            def replace_url(match: re.Match) -> str:
-                attr = match.group(1)
-                quote = match.group(2)
-                url = match.group(3)
-                return f"{attr}={quote}/{self.prefix}/{url}/"
+        The links, and the IDs of the elements of each page, are collected
+        while rendering the Markdown, and checked against indexes of the
+        pages, the assets, and the output files built once per call.
 
-            new_content = rx_urls.sub(replace_url, content)
-            html_file.write_text(new_content)
+        Arguments:
+            pages: The pages to check. By default, all the pages of the site.
 
-    def _validate_links(self) -> None:
-        rx_link = re.compile(r"\[([^\]]*)\]\(([^)\s]+)(?:\s[^)]*)?\)")
-        rx_id = re.compile(r'\bid=["\']([^"\']+)["\']')
+        """
         page_urls = {page.url for page in self.site.pages}
+        page_ids = {page.url: self._get_page_ids(page) for page in self.site.pages}
         has_warnings = False
 
         prefixed_folders: tuple[str, ...] = ()
         if self.prefix:
             prefixed_folders = ("docs", "assets", "search") if self.is_main else ("docs", "search")
 
+        asset_files: set[str] | None = None
+        output_files: set[str] | None = None
+
+        @cache
+        def exists_in_root(relpath: str) -> bool:
+            return (self.root_dir / relpath).exists()
+
         def warn(filename: str, lineno: int, msg: str) -> None:
             nonlocal has_warnings
             if not has_warnings:
@@ -408,82 +1186,181 @@ class Docs:
                 has_warnings = True
             print(f"  {filename}:{lineno} - {msg}")
 
-        for page in self.site.pages:
+        for page in self.site.pages if pages is None else pages:
             if not page.source or not page.filepath:
                 continue
 
             filename = str(page.filepath.relative_to(self.root_dir / "content"))
-            page_ids = set(rx_id.findall(page.content)) if page.content else set()
-
-            for lineno, line in enumerate(page.source.splitlines(), start=1):
-                for match in rx_link.finditer(line):
-                    raw_url = match.group(2)
-
-                    # Split URL and anchor fragment
-                    if "#" in raw_url:
-                        url, anchor = raw_url.split("#", 1)
-                    else:
-                        url, anchor = raw_url, ""
-
-                    # Anchor-only link: validate against page IDs
-                    if not url:
-                        if anchor and page_ids and anchor not in page_ids:
-                            warn(filename, lineno, f"broken anchor: #{anchor}")
-                        continue
-
-                    # Skip external links and mailto/tel
-                    if re.match(r"^(https?://|mailto:|tel:)", url):
-                        continue
-
-                    # Skip llms.txt references
-                    if url.startswith("/llms.txt"):
-                        continue
-
-                    # Resolve relative URLs against the page's own URL
-                    if not url.startswith("/"):
-                        base = page.url.rstrip("/")
-                        url = f"{base}/{url}"
-                    elif prefixed_folders and not url.startswith(f"/{self.prefix}/"):
-                        # Markdown sources reference unprefixed paths; mirror _add_prefix_to_urls
-                        for folder in prefixed_folders:
-                            if url == f"/{folder}" or url.startswith(f"/{folder}/"):
-                                url = f"/{self.prefix}{url}"
-                                break
-
-                    # Normalize: ensure trailing slash for page-like URLs (no extension)
-                    if "." not in url.split("/")[-1] and not url.endswith("/"):
-                        url = f"{url}/"
-
-                    # Check page URLs
-                    if url in page_urls:
-                        continue
-
-                    # Check asset links against the assets source folder
-                    asset_url = url
-                    if self.prefix and asset_url.startswith(f"/{self.prefix}/assets/"):
-                        asset_url = asset_url[len(f"/{self.prefix}"):]
-                    if asset_url.startswith("/assets/"):
-                        asset_rel = asset_url[len("/assets/"):]
-                        if (self.assets_dir / asset_rel).exists():
-                            continue
+            ids = page_ids[page.url] if page.url in page_ids else self._get_page_ids(page)
+
+            for raw_url, lineno in self._get_page_links(page):
+                # Split URL and anchor fragment
+                url, _, anchor = unquote(raw_url).partition("#")
+
+                # Anchor-only link: validate against page IDs
+                if not url:
+                    if anchor and ids and anchor not in ids:
+                        warn(filename, lineno, f"broken anchor: #{anchor}")
+                    continue
+
+                # Skip external links and mailto/tel
+                if RX_EXTERNAL_URL.match(url):
+                    continue
+
+                # Skip llms.txt references
+                if url.startswith("/llms.txt"):
+                    continue
+
+                # Resolve relative URLs against the page's own URL
+                if not url.startswith("/"):
+                    base = page.url.rstrip("/")
+                    url = posixpath.normpath(f"{base}/{url}")
+                elif prefixed_folders and not url.startswith(f"/{self.prefix}/"):
+                    # Markdown sources reference unprefixed paths; mirror _prefix_urls
+                    for folder in prefixed_folders:
+                        if url == f"/{folder}" or url.startswith(f"/{folder}/"):
+                            url = f"/{self.prefix}{url}"
+                            break
+
+                # Normalize: ensure trailing slash for page-like URLs (no extension)
+                if "." not in url.split("/")[-1] and not url.endswith("/"):
+                    url = f"{url}/"
+
+                # Check page URLs, and the anchor in the other page
+                if url in page_urls:
+                    target_ids = page_ids[url]
+                    if anchor and target_ids and anchor not in target_ids:
+                        warn(filename, lineno, f"broken anchor: {raw_url}")
+                    continue
+
+                # Check asset links against the assets source folder
+                asset_url = url
+                if self.prefix and asset_url.startswith(f"/{self.prefix}/assets/"):
+                    asset_url = asset_url[len(f"/{self.prefix}"):]
+                if asset_url.startswith("/assets/"):
+                    if asset_files is None:
+                        asset_files = self._get_asset_files()
+                    if asset_url[len("/assets/"):] not in asset_files:
                         warn(filename, lineno, f"broken link: {raw_url}")
-                        continue
+                    continue
 
-                    # Check files in build dir
-                    file_path = self.build_dir / url.strip("/")
-                    if file_path.exists():
-                        continue
+                # Check files in build dir
+                if output_files is None:
+                    output_files = self._get_output_files()
+                if url.strip("/") in output_files:
+                    continue
 
-                    # Check files in root dir (for source-relative paths)
-                    root_path = self.root_dir / url.strip("/")
-                    if root_path.exists():
-                        continue
+                # Check files in root dir (for source-relative paths)
+                if exists_in_root(url.strip("/")):
+                    continue
 
-                    warn(filename, lineno, f"broken link: {raw_url}")
+                warn(filename, lineno, f"broken link: {raw_url}")
 
         if has_warnings:
             print()
 
+    def _check_external_links(self) -> None:
+        """Print a warning for each external link, of this documentation
+        or of its variants, that is not reachable.
+
+        Each unique URL is checked only once, and the results are cached
+        in the cache folder (unless the cache is disabled).
+        """
+        sources: dict[str, list[tuple[str, int]]] = {}
+        for docs in (self, *self.variants.values()):
+            content_dir = docs.root_dir / "content"
+            for page in docs.site.pages:
+                if not page.source or not page.filepath:
+                    continue
+                filename = str(page.filepath.relative_to(content_dir))
+                for url, lineno in docs._get_page_links(page):
+                    if RX_HTTP_URL.match(url):
+                        url = url.partition("#")[0]
+                        sources.setdefault(url, []).append((filename, lineno))
+
+        if not sources:
+            return
+
+        # Imported here, so `asyncio` and `ssl` are only loaded when needed
+        from .linkcheck import LinkChecker, describe, is_ok, is_rate_limited
+
+        print(f"Checking {len(sources)} external links...")
+        cache_path = self.cache_dir / "links.json" if self.cache and self.cache_dir else None
+        results = LinkChecker(cache_path).check(sources)
+        limited = [url for url, result in results.items() if is_rate_limited(result)]
+        if limited:
+            print(f"{len(limited)} external links could not be checked (rate limited)")
+        broken = [
+            url for url, result in results.items()
+            if not is_ok(result) and url not in limited
+        ]
+        if not broken:
+            return
+
+        print("\n⚡ WARNING:")
+        for url in broken:
+            for filename, lineno in sources[url]:
+                reason = describe(results[url])
+                print(f"  {filename}:{lineno} - broken external link: {url} ({reason})")
+        print()
+
+    def _get_page_links(self, page: PageData) -> list[tuple[str, int]]:
+        """Return the `(url, lineno)` of the links in the source of the page."""
+        if page.links is not None:
+            return page.links
+        # The page wasn't rendered from Markdown by the pages processor
+        return [
+            (match.group(2), lineno)
+            for lineno, line in enumerate(page.source.splitlines(), start=1)
+            for match in RX_MD_LINK.finditer(line)
+        ]
+
+    def _get_page_ids(self, page: PageData) -> set[str]:
+        """Return the IDs of the elements of the page content."""
+        if page.ids is not None:
+            return set(page.ids)
+        return set(RX_HTML_ID.findall(page.content)) if page.content else set()
+
+    def _get_asset_files(self) -> set[str]:
+        """Return the paths of the asset files, relative to the assets folder."""
+        if not self.assets_dir.exists():
+            return set()
+        return {
+            path.relative_to(self.assets_dir).as_posix()
+            for path in self.assets_dir.rglob("*")
+        }
+
+    def _get_output_files(self) -> set[str]:
+        """Return the paths of the files and folders written to the build
+        folder, relative to it."""
+        # The variants are built inside the folder of the main documentation
+        prefix = self.parent.prefix if self.parent else self.prefix
+        if self.memory_files is not None:
+            paths = set()
+            for relpath in self.memory_files:
+                if prefix and not relpath.startswith(f"{prefix}/"):
+                    continue
+                # The file and its folders
+                while relpath and relpath not in paths:
+                    paths.add(relpath)
+                    relpath = posixpath.dirname(relpath)
+            if self.lazy:
+                # The search pages are rendered only when requested
+                root = self.parent or self
+                for docs in (root, *root.variants.values()):
+                    search_dir = posixpath.join(docs.prefix, "search")
+                    paths.update((search_dir, f"{search_dir}/index.html"))
+            return paths
+
+        output_dir = self.build_dir / prefix
+        paths = set()
+        for dirpath, dirnames, filenames in os.walk(output_dir):
+            reldir = Path(dirpath).relative_to(self.build_dir).as_posix()
+            reldir = "" if reldir == "." else f"{reldir}/"
+            paths.update(f"{reldir}{name}" for name in dirnames)
+            paths.update(f"{reldir}{name}" for name in filenames)
+        return paths
+
     def _symlink_assets(self) -> None:
         if not self.assets_dir.exists():
             return
@@ -496,39 +1373,306 @@ class Docs:
         target_path.symlink_to(self.assets_dir)
 
     def _copy_assets(self) -> None:
+        """Copy the assets to the build folder, skipping the files that are
+        already there from a previous build and removing the stale ones."""
         if not self.assets_dir.exists():
             return
         target_path = self.build_dir / self.prefix / "assets"
-        shutil.copytree(
+        copied, removed = utils.sync_folder(
             self.assets_dir,
             target_path,
-            dirs_exist_ok=True,
+            mode=self.assets_mode,
+            # Updated, or removed, by `_precompress()`
+            keep=compress.is_compressed if self.precompress else None,
         )
+        for relpath in copied:
+            self.log(target_path / relpath)
+        for relpath in removed:
+            self.log(f"Removed {target_path / relpath}")
+
+    def _get_views_key(self) -> str:
+        """Return a hash of the content of all the views of the catalog."""
+        hasher = hashlib.sha256()
+        try:
+            hasher.update(f"views;jx={metadata.version('jx')};".encode())
+        except metadata.PackageNotFoundError:
+            hasher.update(b"views;")
+        for relpath, cdata in sorted(self.catalog.components.items()):
+            hasher.update(f"{relpath};".encode())
+            hasher.update(cdata.path.read_bytes())
+        return hasher.hexdigest()
+
+    def _get_asset_fingerprints(self) -> dict[str, str]:
+        """Return a hash of the content of each asset file, by its path
+        relative to the assets folder.
+
+        Unlike the modification times, the hashes don't change with every
+        checkout of the repository, so the browsers and CDNs can keep the
+        files cached between deploys.
+        """
+        if not self.assets_dir.exists():
+            return {}
+
+        paths = [path for path in self.assets_dir.rglob("*") if path.is_file()]
+        from concurrent.futures import ThreadPoolExecutor
+
+        # Reading and hashing the files releases the GIL, so threads are enough
+        with ThreadPoolExecutor() as executor:
+            hashes = executor.map(_hash_file, paths)
+            return {
+                path.relative_to(self.assets_dir).as_posix(): hash
+                for path, hash in zip(paths, hashes, strict=True)
+            }
+
+    def _write_assets_manifest(self) -> None:
+        """Write the fingerprinted URL of each asset, relative to the assets
+        folder, so other tools can find them."""
+        if not self.asset_fingerprints:
+            return
+        manifest = {
+            name: f"{name}?v={fingerprint}"
+            for name, fingerprint in sorted(self.asset_fingerprints.items())
+        }
+        outpath = self.build_dir / self.prefix / ASSETS_MANIFEST
+        self._write_file(outpath, json.dumps(manifest, indent=2))
+
+    def _write_file(self, outpath: Path, content: str) -> None:
+        """Write a file of the build, unless it already has that exact content.
+
+        Not touching the unchanged files keeps their modification times, so
+        the tools used to deploy the build can skip them.
+        """
+        data = content.encode("utf-8")
+        relpath = outpath.relative_to(self.build_dir).as_posix()
+        if self.outputs is not None:
+            self.outputs[relpath] = _hash_bytes(data)
+
+        if self.memory_files is not None:
+            if self.memory_files.get(relpath) == data:
+                return
+            self.memory_files[relpath] = data
+        else:
+            try:
+                if outpath.stat().st_size == len(data) and outpath.read_bytes() == data:
+                    return
+            except OSError:
+                outpath.parent.mkdir(parents=True, exist_ok=True)
+            outpath.write_bytes(data)
+        if self.written is not None:
+            self.written.add(relpath)
+        self.log(outpath)
 
-    def _fingerprint_assets(self) -> None:
-        """Add fingerprinting to asset files for cache busting."""
-        assets_path = self.build_dir / self.prefix / "assets"
-        if not assets_path.exists():
+    def _remove_file(self, outpath: Path) -> None:
+        """Remove a file of the build, if it exists."""
+        relpath = outpath.relative_to(self.build_dir).as_posix()
+        if self.memory_files is not None:
+            removed = self.memory_files.pop(relpath, None) is not None
+        else:
+            removed = outpath.exists()
+            outpath.unlink(missing_ok=True)
+        if removed and self.written is not None:
+            self.written.add(relpath)
+
+    def _list_output_folder(self, folder: Path) -> list[Path]:
+        """Return the files of the build directly inside this folder."""
+        if self.memory_files is None:
+            return [path for path in folder.glob("*") if path.is_file()]
+        reldir = folder.relative_to(self.build_dir).as_posix()
+        reldir = "" if reldir == "." else reldir
+        return [
+            self.build_dir / relpath
+            for relpath in self.memory_files
+            if posixpath.dirname(relpath) == reldir
+        ]
+
+    def _precompress(self) -> None:
+        """Write a compressed copy of each file of the build worth compressing,
+        next to it, and add it to the outputs.
+
+        The copies of the files that didn't change since the previous build
+        are not compressed again. The ones of the files that are no longer
+        built are removed with them.
+        """
+        if self.outputs is None:
             return
+        previous = self._read_outputs_manifest()
+        encodings = compress.get_encodings()
+        pending: list[tuple[str, str]] = []
+        for relpath, hash in self._get_all_outputs().items():
+            try:
+                size = (self.build_dir / relpath).stat().st_size
+            except OSError:
+                continue
+            if not compress.is_compressible(relpath, size):
+                continue
+            for encoding in encodings:
+                compressed = f"{relpath}{compress.ENCODINGS[encoding]}"
+                if (
+                    previous.get(relpath) == hash
+                    and compressed in previous
+                    and (self.build_dir / compressed).exists()
+                ):
+                    self.outputs[compressed] = previous[compressed]
+                else:
+                    pending.append((relpath, encoding))
+
+        from concurrent.futures import ThreadPoolExecutor
+
+        # The compression releases the GIL, so threads are enough
+        with ThreadPoolExecutor() as executor:
+            results = executor.map(
+                lambda item: compress.compress_file(self.build_dir / item[0], item[1]),
+                pending,
+            )
+            for (relpath, encoding), data in zip(pending, results, strict=True):
+                compressed = f"{relpath}{compress.ENCODINGS[encoding]}"
+                self.outputs[compressed] = _hash_bytes(data)
+                self.log(self.build_dir / compressed)
+
+    def _get_all_outputs(self) -> dict[str, str]:
+        """Return the hashes of the files of this build, including
+        the assets, by path relative to the build folder."""
+        outputs = dict(self.outputs or {})
+        assets_prefix = f"{self.prefix}/assets/" if self.prefix else "assets/"
+        for name, fingerprint in self.asset_fingerprints.items():
+            outputs[f"{assets_prefix}{name}"] = fingerprint
+        return outputs
+
+    def _get_outputs_manifest_path(self) -> Path | None:
+        if self.cache_dir is None:
+            return None
+        # Each archived version is built to its own prefix inside the same folder
+        key = hashlib.sha256(str(self.build_dir / self.prefix).encode()).hexdigest()
+        return self.cache_dir / OUTPUTS_FOLDER / f"{key[:16]}.json"
+
+    def _read_outputs_manifest(self) -> dict[str, str]:
+        """Return the hashes of the files of the previous build to the same
+        folder, by path relative to it, or an empty dict without a cache folder."""
+        manifest_path = self._get_outputs_manifest_path()
+        if manifest_path is None:
+            return {}
+        try:
+            return json.loads(manifest_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return {}
 
-        fingerprints = {}
-
-        for asset_file in assets_path.rglob("*.*"):
-            if asset_file.is_file():
-                mtime = int(asset_file.stat().st_mtime)
-                fingerprint = f"{mtime:x}"
-                old_name = asset_file.relative_to(assets_path)
-                new_name = f"{old_name}?v={fingerprint}"
-                fingerprints[old_name] = new_name
-                print(f"Fingerprinting {old_name} -> {new_name}")
-
-        # Update references in HTML files
-        for html_file in (self.build_dir / self.prefix).rglob("*.html"):
-            html_content = html_file.read_text()
-            for old_name, new_name in fingerprints.items():
-                html_content = (
-                    html_content
-                    .replace(f'href="/assets/{old_name}"', f'href="/assets/{new_name}"')
-                    .replace(f'src="/assets/{old_name}"', f'src="/assets/{new_name}"')
-                )
-            html_file.write_text(html_content)
+    def _update_outputs_manifest(self) -> dict[str, list[str]]:
+        """Compare the files of this build with the ones of the previous build
+        to the same folder, remove the files that were not written this time,
+        and save the new list for the next build. Without a cache folder,
+        every file is reported as added and none is removed.
+
+        Returns:
+            The paths, relative to the build folder, of the files added,
+            changed, and removed since the previous build.
+
+        """
+        outputs = self._get_all_outputs()
+        manifest_path = self._get_outputs_manifest_path()
+        previous = self._read_outputs_manifest()
+
+        changes: dict[str, list[str]] = {"added": [], "changed": [], "removed": []}
+        for relpath, hash in sorted(outputs.items()):
+            if relpath not in previous:
+                changes["added"].append(relpath)
+            elif previous[relpath] != hash:
+                changes["changed"].append(relpath)
+
+        for relpath in sorted(previous):
+            if relpath in outputs:
+                continue
+            changes["removed"].append(relpath)
+            # The stale assets were already removed when copying them
+            path = self.build_dir / relpath
+            path.unlink(missing_ok=True)
+            self.log(f"Removed {path}")
+            for folder in path.parents:
+                if folder == self.build_dir or not folder.is_dir() or any(folder.iterdir()):
+                    break
+                folder.rmdir()
+
+        if manifest_path is None:
+            return changes
+        manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        manifest_path.write_text(json.dumps(outputs, indent=0, sort_keys=True), encoding="utf-8")
+        return changes
+
+    def _process_html(self, html: str) -> str:
+        """Apply the output filters to the rendered HTML of a page, in memory,
+        before writing it. Every HTML file of the build goes through here, so
+        nothing has to be read back from the disk to be rewritten.
+        """
+        for output_filter in self._get_output_filters():
+            html = output_filter(html)
+        return html
+
+    def _get_output_filters(self) -> list[t.Callable[[str], str]]:
+        filters = []
+        if self.asset_fingerprints:
+            filters.append(self._fingerprint_urls)
+        if self.prefix:
+            # The fingerprinting expects the unprefixed URLs, so this goes after
+            filters.append(self._prefix_urls)
+        if self.minify:
+            filters.append(minify_html)
+        if self.livereload:
+            from .server import insert_livereload_script
+
+            filters.append(insert_livereload_script)
+        return filters
+
+    def _prefix_urls(self, html: str) -> str:
+        """Add the prefix to the root-relative URLs of the pages, the search
+        page, and the assets, for prefixed and archived documentation."""
+        # The variants use the assets of the main documentation
+        assets_prefix = self.parent.prefix if self.parent else self.prefix
+
+        def replace_url(match: re.Match) -> str:
+            attr, quote, folder = match.groups()
+            prefix = assets_prefix if folder == "assets" else self.prefix
+            if not prefix:
+                return match.group(0)
+            return f"{attr}={quote}/{prefix}/{folder}/"
+
+        return RX_PREFIXED_URL.sub(replace_url, html)
+
+    def _fingerprint_urls(self, html: str) -> str:
+        """Add the fingerprint of the assets to their URLs in the HTML, for cache busting."""
+        fingerprints = self.asset_fingerprints
+
+        def replace_url(match: re.Match) -> str:
+            fingerprint = fingerprints.get(match.group(3))
+            if not fingerprint:
+                return match.group(0)
+            attr, quote, name = match.groups()
+            return f"{attr}={quote}/assets/{name}?v={fingerprint}{quote}"
+
+        return RX_ASSET_URL.sub(replace_url, html)
+
+
+def _hash_file(path: Path) -> str:
+    with path.open("rb") as f:
+        return hashlib.file_digest(f, "sha256").hexdigest()[:12]
+
+
+def _hash_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+# Functions run in the worker processes
+
+def _build_docs(
+    shared: tuple[list[Docs], dict[str, t.Any], list[str]], index: int
+) -> dict[str, t.Any]:
+    all_docs, options, messages = shared
+    docs = all_docs[index]
+    # Only the main documentation prints the random messages
+    docs._build_pages(**options, messages=messages if docs.is_main else ())
+    return docs._get_build_state()
+
+
+def _render_page_html(
+    shared: tuple[Docs, list[PageData]], index: int
+) -> tuple[str, dict[str, t.Any] | None]:
+    docs, pages = shared
+    return docs._render_page_html(pages[index]), profiling.flush()
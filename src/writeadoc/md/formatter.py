@@ -0,0 +1,48 @@
+import re
+
+from pygments.formatters.html import HtmlFormatter
+
+
+class CustomHtmlFormatter(HtmlFormatter):
+    """Adds ability to output line numbers in a new way."""
+
+    # Capture `<span class="lineno">   1 </span>`
+    RE_SPAN_NUMS = re.compile(
+        r'(<span[^>]*?)(class="[^"]*\blinenos?\b[^"]*)"([^>]*)>([^<]+)(</span>)'
+    )
+    # Capture `<pre>` that is not followed by `<span></span>`
+    RE_TABLE_NUMS = re.compile(r"(<pre[^>]*>)(?!<span></span>)")
+
+    def __init__(self, **options):
+        HtmlFormatter.__init__(self, **options)
+
+    def _format_custom_line(self, m):
+        """Format the custom line number."""
+        return (
+            m.group(1)
+            + 'data-linenos="'
+            + m.group(4)
+            + '">'
+            + m.group(5)
+        )
+
+    def _wrap_customlinenums(self, inner):
+        """
+        Wrapper to handle block inline line numbers.
+
+        Don't display line numbers via `<span>  1</span>`,
+        but include as `<span data-linenos="  1"></span>` and use CSS to display them:
+        `[data-linenos]:before {content: attr(data-linenos);}`.
+        This allows us to use inline and copy and paste without issue.
+        """
+
+        for tk, line in inner:
+            if tk:
+                line = self.RE_SPAN_NUMS.sub(self._format_custom_line, line)
+            yield tk, line
+
+    def wrap(self, source):
+        """Wrap the source code."""
+        if self.linenos == 2:  # "inline"
+            source = self._wrap_customlinenums(source)
+        return HtmlFormatter.wrap(self, source)
@@ -0,0 +1,136 @@
+import re
+import typing as t
+from html import unescape
+
+from mistune.util import striptags
+
+
+if t.TYPE_CHECKING:
+    from mistune.core import BlockState
+    from mistune.markdown import Markdown
+
+    from ..types import TSearchFragment
+
+
+RX_MULTIPLE_SPACES = re.compile(r"\s+")
+
+# Tokens that start a new search fragment
+FRAGMENT_SEP = ("admonition_title", "block_quote", "heading", "paragraph", "table")
+# Block tokens with inline children
+TEXT_BLOCKS = ("admonition_title", "block_text", "def_list_head", "paragraph", "table_cell")
+# Tokens without searchable text
+SKIP_TOKENS = ("blank_line", "block_error", "image", "inline_html", "thematic_break")
+
+
+def add_search_hook(md: "Markdown") -> None:
+    """Add a hook to save the search fragments of the page into `state.env`,
+    when rendering with `search=True`.
+
+    The fragments are extracted from the tokens already parsed to render
+    the page, so the HTML doesn't have to be parsed again to build the
+    search data.
+    """
+
+    def search_hook(
+        md: "Markdown", result: str | list[dict[str, t.Any]], state: "BlockState"
+    ) -> str | list[dict[str, t.Any]]:
+        # Only when rendering to HTML, not to a list of tokens
+        if isinstance(result, str) and state.env.get("search"):
+            state.env["search_fragments"] = extract_fragments(state.tokens)
+        return result
+
+    md.after_render_hooks.append(search_hook)
+
+
+def extract_fragments(tokens: list[dict[str, t.Any]]) -> "list[TSearchFragment]":
+    """Extract the search fragments of a page from its rendered tokens.
+
+    Each heading, paragraph, code block, block quote, and table starts
+    a new fragment, like in `search.TextExtractor`.
+    """
+    collector = FragmentCollector()
+    collector.walk(tokens)
+    collector.save()
+    return collector.fragments
+
+
+class FragmentCollector:
+    fragments: "list[TSearchFragment]"
+
+    _hash: str
+    _title: str
+    _content: list[str]
+
+    def __init__(self):
+        self.fragments = []
+        self._hash = ""
+        self._title = ""
+        self._content = []
+
+    def walk(self, tokens: list[dict[str, t.Any]]) -> None:
+        for tok in tokens:
+            type_ = tok["type"]
+            if type_ in SKIP_TOKENS:
+                continue
+
+            if type_ in FRAGMENT_SEP:
+                self.save()
+
+            if type_ == "heading":
+                self._title = escape(collapse(get_text(tok.get("children", []))))
+                if "id" in tok.get("attrs", {}):
+                    self._hash = tok["attrs"]["id"]
+            elif type_ == "block_code":
+                self.save()
+                code = tok.get("raw", "")
+                if code.strip():
+                    self.fragments.append(
+                        (self._hash, self._title, f"<pre>{escape(code)}</pre>")
+                    )
+            elif type_ == "block_html":
+                self._content.append(unescape(striptags(tok.get("raw", ""))))
+            elif type_ in TEXT_BLOCKS:
+                self._content.append(get_text(tok.get("children", [])))
+            elif type_ == "tabbed_set":
+                # The tabs are pre-rendered, so their tokens are stored apart
+                for tab in tok.get("tab_tokens", []):
+                    self._content.append(get_text(tab["label"]))
+                for tab in tok.get("tab_tokens", []):
+                    self.walk(tab["children"])
+            elif "children" in tok:
+                self.walk(tok["children"])
+                caption = tok.get("attrs", {}).get("caption")
+                if caption:
+                    self._content.append(caption)
+
+    def save(self) -> None:
+        content = collapse(" ".join(self._content))
+        self._content = []
+        if content:
+            self.fragments.append((self._hash, self._title, escape(content)))
+
+
+def get_text(tokens: list[dict[str, t.Any]]) -> str:
+    """Return the plain text of the inline tokens."""
+    text = []
+    for tok in tokens:
+        type_ = tok["type"]
+        if type_ in SKIP_TOKENS:
+            continue
+        if type_ == "text":
+            text.append(unescape(tok["raw"]))
+        elif type_ in ("softbreak", "linebreak"):
+            text.append(" ")
+        elif "children" in tok:
+            text.append(get_text(tok["children"]))
+        elif "raw" in tok:
+            text.append(tok["raw"])
+    return "".join(text)
+
+
+def collapse(text: str) -> str:
+    return RX_MULTIPLE_SPACES.sub(" ", text).strip()
+
+
+def escape(text: str) -> str:
+    return text.replace("&", "&amp;").replace(">", "&gt;").replace("<", "&lt;")
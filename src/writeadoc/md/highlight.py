@@ -1,56 +1,17 @@
 import re
 import typing as t
 from collections.abc import Callable
+from functools import lru_cache
 
 import mistune
-from pygments import highlight
-from pygments.formatters.html import HtmlFormatter
-from pygments.lexers import get_lexer_by_name
 
+from .. import profiling
 
-class CustomHtmlFormatter(HtmlFormatter):
-    """Adds ability to output line numbers in a new way."""
 
-    # Capture `<span class="lineno">   1 </span>`
-    RE_SPAN_NUMS = re.compile(
-        r'(<span[^>]*?)(class="[^"]*\blinenos?\b[^"]*)"([^>]*)>([^<]+)(</span>)'
-    )
-    # Capture `<pre>` that is not followed by `<span></span>`
-    RE_TABLE_NUMS = re.compile(r"(<pre[^>]*>)(?!<span></span>)")
-
-    def __init__(self, **options):
-        HtmlFormatter.__init__(self, **options)
-
-    def _format_custom_line(self, m):
-        """Format the custom line number."""
-        return (
-            m.group(1)
-            + 'data-linenos="'
-            + m.group(4)
-            + '">'
-            + m.group(5)
-        )
-
-    def _wrap_customlinenums(self, inner):
-        """
-        Wrapper to handle block inline line numbers.
-
-        Don't display line numbers via `<span>  1</span>`,
-        but include as `<span data-linenos="  1"></span>` and use CSS to display them:
-        `[data-linenos]:before {content: attr(data-linenos);}`.
-        This allows us to use inline and copy and paste without issue.
-        """
-
-        for tk, line in inner:
-            if tk:
-                line = self.RE_SPAN_NUMS.sub(self._format_custom_line, line)
-            yield tk, line
-
-    def wrap(self, source):
-        """Wrap the source code."""
-        if self.linenos == 2:  # "inline"
-            source = self._wrap_customlinenums(source)
-        return HtmlFormatter.wrap(self, source)
+if t.TYPE_CHECKING:
+    from pygments.lexer import Lexer
+
+    from .formatter import CustomHtmlFormatter
 
 
 def block_code(
@@ -62,14 +23,27 @@ def block_code(
     if not info:
         return f"<pre><code>{escape(code)}</code></pre>\n"
 
+    with profiling.step("highlight"):
+        return highlight_block(code, info, escape)
+
+
+# Snippets like install commands or imports are often repeated across
+# pages, so the highlighted output is cached. The cache is cleared at
+# the start of every build by `clear_cache()`.
+@lru_cache(maxsize=2048)
+def highlight_block(code: str, info: str, escape: Callable[[str], str]) -> str:
     lang, *attrs = info.split(maxsplit=1)
     options = parse_attrs(attrs[0].strip() if attrs else "")
     options["cssclass"] = f"highlight lang-{lang}"
     options["wrapcode"] = True
 
+    # Imported here, so Pygments is only loaded by the first code block
+    # to highlight, instead of by every build
+    from pygments import highlight
+
     try:
-        lexer = get_lexer_by_name(lang, stripall=True)
-        formatter = CustomHtmlFormatter(**options)
+        lexer = get_lexer(lang)
+        formatter = get_formatter(**options)
         result = highlight(code, lexer, formatter)
         return result.replace("<pre><span></span><code>", "<pre><code>")
 
@@ -77,6 +51,36 @@ def block_code(
         return f'<div class="lang-{lang}"><pre><code>{escape(code)}</code></pre></div>\n'
 
 
+@lru_cache(maxsize=None)
+def get_lexer(lang: str) -> "Lexer":
+    """Return the lexer for the language, reusing it for all code blocks."""
+    from pygments.lexers import get_lexer_by_name
+
+    return get_lexer_by_name(lang, stripall=True)
+
+
+def get_formatter(**options: t.Any) -> "CustomHtmlFormatter":
+    """Return a formatter for the options, reusing it for all code blocks
+    with the same options."""
+    key = tuple(
+        (name, tuple(value) if isinstance(value, list) else value)
+        for name, value in sorted(options.items())
+    )
+    return _get_formatter(key)
+
+
+@lru_cache(maxsize=256)
+def _get_formatter(key: tuple[tuple[str, t.Any], ...]) -> "CustomHtmlFormatter":
+    from .formatter import CustomHtmlFormatter
+
+    return CustomHtmlFormatter(**dict(key))
+
+
+def clear_cache() -> None:
+    """Clear the cache of highlighted code blocks."""
+    highlight_block.cache_clear()
+
+
 def parse_attrs(attrs_str: str) -> dict[str, t.Any]:
     attrs = {
         "linenos": False,
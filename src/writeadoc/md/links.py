@@ -0,0 +1,85 @@
+import re
+import typing as t
+from urllib.parse import unquote
+
+
+if t.TYPE_CHECKING:
+    from mistune.core import BlockState
+    from mistune.markdown import Markdown
+
+
+RX_HTML_ID = re.compile(r"""\bid=["']([^"']+)["']""")
+
+
+def add_links_hook(md: "Markdown") -> None:
+    """Add a hook to save the links of the page, and the IDs of its elements,
+    into `state.env`, so they can be validated without parsing the page again.
+
+    `state.env["links"]` is a list of `(url, lineno)` tuples, with the URL
+    as written in the source. Links not found in the source, for example,
+    from included files, are not collected.
+    """
+
+    def links_hook(
+        md: "Markdown", result: str | list[dict[str, t.Any]], state: "BlockState"
+    ) -> str | list[dict[str, t.Any]]:
+        collector = LinkCollector(state.src)
+        collector.walk(state.tokens)
+        state.env["links"] = collector.links
+        state.env["ids"] = sorted(collector.ids)
+        return result
+
+    md.after_render_hooks.append(links_hook)
+
+
+class LinkCollector:
+    links: list[tuple[str, int]]
+    ids: set[str]
+
+    _source: str
+    _pos: int
+    _lineno: int
+
+    def __init__(self, source: str):
+        self.links = []
+        self.ids = set()
+        self._source = source
+        self._pos = 0
+        self._lineno = 1
+
+    def walk(self, tokens: list[dict[str, t.Any]]) -> None:
+        for tok in tokens:
+            attrs = tok.get("attrs") or {}
+            if "id" in attrs:
+                self.ids.add(str(attrs["id"]))
+            if tok["type"] in ("link", "image"):
+                self.add_link(attrs.get("url", ""))
+            elif tok["type"] in ("block_html", "inline_html"):
+                self.ids.update(RX_HTML_ID.findall(tok.get("raw", "")))
+
+            if "children" in tok:
+                self.walk(tok["children"])
+            # Pre-rendered tabs
+            for tab in tok.get("tab_tokens", ()):
+                self.walk(tab["label"])
+                self.walk(tab["children"])
+
+    def add_link(self, url: str) -> None:
+        """Find the line of the link, searching the source from the
+        previous link, since the tokens are in the same order."""
+        if not url:
+            return
+        for literal in dict.fromkeys((url, unquote(url))):
+            pos = self._source.find(literal, self._pos)
+            if pos == -1:
+                # For example, a link to a reference defined before
+                pos = self._source.find(literal)
+                if pos == -1:
+                    continue
+                lineno = self._source.count("\n", 0, pos) + 1
+            else:
+                lineno = self._lineno + self._source.count("\n", self._pos, pos)
+                self._pos = pos
+                self._lineno = lineno
+            self.links.append((literal, lineno))
+            return
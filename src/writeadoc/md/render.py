@@ -14,7 +14,9 @@ from .block_directive import BlockDirective
 from .div import Container
 from .figure import Figure
 from .formatting import insert, mark, strikethrough, subscript, superscript
+from .fragments import add_search_hook
 from .html_renderer import HTMLRenderer
+from .links import add_links_hook
 from .mdjx import mdjx
 from .tab import Tab
 from .table import table
@@ -53,6 +55,8 @@ md = mistune.Markdown(
 )
 
 add_toc_hook(md)
+add_search_hook(md)
+add_links_hook(md)
 
 
 def render_markdown(source: str, **kwargs: t.Any) -> tuple[str, MutableMapping]:
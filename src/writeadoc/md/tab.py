@@ -153,6 +153,7 @@ def _create_tabbed_set(tabs: list[dict], state: "BlockState", md: "Markdown") ->
     state.env["_tab_set_counter"] = counter
 
     rendered_tabs = []
+    tab_tokens = []
     for tab in tabs:
         # Render label as inline markdown
         if tab["label"]:
@@ -161,6 +162,7 @@ def _create_tabbed_set(tabs: list[dict], state: "BlockState", md: "Markdown") ->
             label_tokens = md.inline.parse(inline_state)
             label_html = md.renderer.render_tokens(label_tokens, state)
         else:
+            label_tokens = []
             label_html = ""
 
         # Process children with _iter_render to convert 'text' to 'children'
@@ -177,10 +179,13 @@ def _create_tabbed_set(tabs: list[dict], state: "BlockState", md: "Markdown") ->
                 "select": tab["attrs"].get("select"),
             }
         )
+        tab_tokens.append({"label": label_tokens, "children": processed_children})
 
     return {
         "type": "tabbed_set",
         "children": [],  # Empty - Mistune won't auto-render
+        # The rendered tokens, for the hooks that run after rendering
+        "tab_tokens": tab_tokens,
         "attrs": {
             "set_id": counter,
             "tabs": rendered_tabs,
@@ -0,0 +1,133 @@
+"""
+Minification of the HTML of the pages, in a single pass over the text,
+without parsing it into a tree.
+
+The content of the `<pre>`, `<textarea>`, `<script>`, and `<style>`
+elements (including the highlighted code, always inside a `<pre>`) is
+kept exactly as it is.
+"""
+import re
+
+
+# The elements whose content is kept as it is
+RAW_TAGS = ("pre", "textarea", "script", "style")
+
+# The elements that are never rendered inline, so the whitespace next to
+# their tags is not rendered either. Includes the SVG shapes.
+# Not the list items or the table cells, that are often styled as inline.
+BLOCK_TAGS = frozenset((
+    "address", "article", "aside", "base", "blockquote", "body", "caption",
+    "col", "colgroup", "dd", "details", "dialog", "div", "dl", "dt",
+    "fieldset", "figcaption", "figure", "footer", "form", "h1", "h2", "h3",
+    "h4", "h5", "h6", "head", "header", "hgroup", "hr", "html", "link",
+    "main", "menu", "meta", "nav", "noscript", "ol", "optgroup", "p", "pre",
+    "section", "summary", "table", "tbody", "template", "tfoot", "thead",
+    "title", "tr", "ul",
+    "circle", "clippath", "defs", "ellipse", "g", "line", "lineargradient",
+    "mask", "path", "polygon", "polyline", "radialgradient", "rect", "stop",
+    "symbol", "use",
+))
+
+BOOLEAN_ATTRS = (
+    "allowfullscreen", "async", "autofocus", "autoplay", "checked", "controls",
+    "default", "defer", "disabled", "formnovalidate", "hidden", "inert",
+    "ismap", "itemscope", "loop", "multiple", "muted", "nomodule",
+    "novalidate", "open", "playsinline", "readonly", "required", "reversed",
+    "selected",
+)
+
+RX_TOKEN = re.compile(
+    # An element whose content is kept as it is
+    rf"(?P<raw><(?P<rawtag>{'|'.join(RAW_TAGS)})(?=[\s/>])[^>]*>.*?</(?P=rawtag)\s*>)"
+    # A comment
+    r"|(?P<comment><!--.*?-->)"
+    # A tag, with the attribute values that could include a ">"
+    r"""|(?P<tag></?[a-zA-Z!?](?:[^>"']|"[^"]*"|'[^']*')*>)""",
+    re.IGNORECASE | re.DOTALL,
+)
+RX_TAG_NAME = re.compile(r"</?([a-zA-Z][^\s/>]*)")
+RX_SPACES = re.compile(r"\s+")
+# The whitespace inside a tag, outside the attribute values
+RX_TAG_SPACES = re.compile(r"""("[^"]*"|'[^']*')|\s+""")
+RX_BOOLEAN_HINT = re.compile(
+    rf"""=(?:""|''|(["'])(?:{'|'.join(BOOLEAN_ATTRS)})\1)""",
+    re.IGNORECASE,
+)
+# A boolean attribute with a value, outside the attribute values
+RX_BOOLEAN_ATTR = re.compile(
+    r"""(?P<value>"[^"]*"|'[^']*')"""
+    rf"|(?P<attr>\s(?P<name>{'|'.join(BOOLEAN_ATTRS)}))"
+    r"""=(?P<quote>["']?)(?:(?P=name))?(?P=quote)(?=[\s/>])""",
+    re.IGNORECASE,
+)
+
+
+def minify_html(html: str) -> str:
+    """Return the HTML without comments, with the whitespace collapsed, and
+    the boolean attributes shortened (`disabled=""` to `disabled`).
+
+    A run of whitespace between tags, or in the text, is collapsed to a
+    single space, or removed if it's next to the tag of an element that
+    is never rendered inline, like a `<div>`. The conditional comments
+    (`<!--[if ...]>`) are kept.
+    """
+    out: list[str] = []
+    # The text since the last tag (the comments removed are skipped)
+    text = ""
+    prev_block = True
+    pos = 0
+
+    for match in RX_TOKEN.finditer(html):
+        text += html[pos:match.start()]
+        pos = match.end()
+        token = match.group(0)
+        if match.group("comment") and not token.startswith("<!--["):
+            continue
+
+        next_block = _is_block(match)
+        if text:
+            out.append(_collapse(text, prev_block, next_block))
+            text = ""
+        out.append(_minify_tag(token) if match.group("tag") else token)
+        prev_block = next_block
+
+    text += html[pos:]
+    if text:
+        out.append(_collapse(text, prev_block, True))
+    return "".join(out)
+
+
+def _is_block(match: re.Match) -> bool:
+    if match.group("raw"):
+        return match.group("rawtag").lower() == "pre"
+    if match.group("tag"):
+        name = RX_TAG_NAME.match(match.group(0))
+        # The doctype and the declarations go at the start of a line
+        return not name or name.group(1).lower() in BLOCK_TAGS
+    return False
+
+
+def _collapse(text: str, prev_block: bool, next_block: bool) -> str:
+    text = RX_SPACES.sub(" ", text)
+    if prev_block:
+        text = text.lstrip(" ")
+    if next_block:
+        text = text.rstrip(" ")
+    return text
+
+
+def _minify_tag(tag: str) -> str:
+    if tag.startswith("<!"):
+        return tag
+    # Most tags have nothing to minify, and some, like the ones of the
+    # SVG paths, are long, so the slower substitutions are only done if
+    # a quick check finds something to replace
+    if "  " in tag or "\n" in tag or "\t" in tag or "\r" in tag:
+        tag = RX_TAG_SPACES.sub(lambda match: match.group(1) or " ", tag)
+    if tag.endswith(" >"):
+        tag = f"{tag[:-2]}>"
+    elif tag.endswith(" />"):
+        tag = f"{tag[:-3]}/>"
+    if RX_BOOLEAN_HINT.search(tag):
+        tag = RX_BOOLEAN_ATTR.sub(lambda match: match.group("value") or match.group("attr"), tag)
+    return tag
@@ -1,11 +1,12 @@
+import re
 import typing as t
-from collections.abc import MutableMapping, Sequence
+from collections.abc import Iterator, MutableMapping, Sequence
 from pathlib import Path
-from uuid import uuid4
+from uuid import NAMESPACE_OID, uuid5
 
 from markupsafe import Markup
 
-from . import search, utils
+from . import profiling, search, utils
 from .autodoc import render_autodoc
 from .md import render_markdown
 from .types import (
@@ -13,6 +14,7 @@ from .types import (
     PageData,
     PageRef,
     TMetadata,
+    TSearchData,
 )
 from .utils import logger
 
@@ -21,17 +23,35 @@ if t.TYPE_CHECKING:
     from .main import Docs
 
 
+RX_INCLUDE_DIRECTIVE = re.compile(r"^\s*:{3,}\s*include\b", re.MULTILINE)
+
+
 class PagesProcessor:
     docs: "Docs"
     nav_items: list[NavItem]
     pages: list[PageData]
+    # Pages already loaded by worker processes, by filename
+    loaded: "dict[str, TLoadedPage]"
+    # Only read the metadata of the pages, not their content
+    lazy: bool = False
+    # The URLs of the pages whose content was not loaded by the last run
+    unloaded: set[str]
 
     def __init__(self, docs: "Docs"):
         """Pages processor"""
         self.docs = docs
         self.pages = []
+        self.loaded = {}
+        self.unloaded = set()
 
-    def run(self, user_pages: Sequence[str | dict[str, t.Any]]) -> tuple[list[NavItem], list[PageData]]:
+    def run(
+        self,
+        user_pages: Sequence[str | dict[str, t.Any]],
+        *,
+        jobs: int = 1,
+        reuse: "dict[str, TLoadedPage] | None" = None,
+        lazy: bool = False,
+    ) -> tuple[list[NavItem], list[PageData]]:
         """Recursively process the given pages list and returns navigation and flat page list.
 
         Input:
@@ -128,18 +148,51 @@ class PagesProcessor:
         ]
         ```
 
+        If `jobs` is greater than 1, the Markdown of the pages is rendered
+        in that many worker processes. The navigation is still assembled here,
+        in order, so the result is the same as when processed serially.
+
+        Pages already loaded (for example, by a previous run) can be passed
+        in `reuse`, by filename, to skip reading and rendering them again.
+
+        If `lazy` is true, only the metadata of the pages not in `reuse`
+        is read, enough to build the navigation. Their URLs are saved in
+        `unloaded`, and their content must be loaded later, with
+        `load_content()`, before rendering them. The search data
+        is not set.
+
         """
         self.pages = []
+        self.loaded = dict(reuse or {})
+        self.lazy = lazy
+        self.unloaded = set()
+        if jobs > 1 and not lazy:
+            self.preload_pages(user_pages, jobs=jobs)
 
         index_page = self.process_index_page()
         if index_page:
             self.pages.append(index_page)
 
         nav = self.process_items(user_pages)
+        self.loaded = {}
         self.set_prev_next()
-        self.set_search_data()
+        if not lazy:
+            self.set_search_data(jobs=jobs)
         return nav, self.pages
 
+    def preload_pages(self, user_pages: Sequence[str | dict[str, t.Any]], *, jobs: int) -> None:
+        """Read and render the Markdown of all the pages not already loaded,
+        in a pool of processes."""
+        filenames = [
+            filename
+            for filename in dict.fromkeys(iter_filenames(user_pages))
+            if filename not in self.loaded
+        ]
+        results = utils.parallel_map(_load_page, filenames, shared=self, jobs=jobs)
+        for filename, (loaded, profile) in zip(filenames, results, strict=True):
+            profiling.merge(profile)
+            self.loaded[filename] = loaded
+
     def process_index_page(self) -> PageData | None:
         if self.docs.skip_home:
             return None
@@ -148,14 +201,18 @@ class PagesProcessor:
             logger.warning("No index.jx view found.")
             return None
 
-        outpath = self.docs.build_dir / self.docs.prefix / "index.html"
-        outpath.parent.mkdir(parents=True, exist_ok=True)
-        url = f"/{self.docs.prefix}/" if self.docs.prefix else "/"
+        url = self.get_index_url()
 
         md_index = self.docs.content_dir / "index.md"
         if md_index.exists():
-            source, meta = self.read_file(md_index)
-            html, state = self.render_markdown(source, meta, filepath=md_index)
+            with profiling.step("read", page=url):
+                source, meta = self.read_file(md_index)
+            if self.lazy:
+                html, state = "", {}
+                self.unloaded.add(url)
+            else:
+                with profiling.step("markdown", page=url):
+                    html, state = self.render_markdown(source, meta, filepath=md_index)
             meta.setdefault("id", "index")
             meta.setdefault("title", self.docs.site.name)
             meta.setdefault("view", "index.jx")
@@ -231,7 +288,9 @@ class PagesProcessor:
         closed = bool(user_page.get("closed", False))
         url = ""
 
-        id = user_page.get("id") or f"s-{uuid4().hex}"
+        # The generated ID must be the same on every run, so the
+        # navigation of unchanged pages can be compared between builds
+        id = user_page.get("id") or f"s-{uuid5(NAMESPACE_OID, repr((parents, user_page))).hex}"
         parents = parents + (id,)
 
         sec_path = user_page.get("path")
@@ -264,21 +323,16 @@ class PagesProcessor:
         section_url: str = "",
         parents: tuple[str, ...] = (),
     ) -> NavItem:
-        url = f"/docs/{Path(filename).with_suffix('').as_posix().strip('/')}/"
-        if self.docs.prefix:
-            url = f"/{self.docs.prefix}{url}"
-
+        url = self.get_url(filename)
         filepath = self.docs.content_dir / filename
-        source, meta = self.read_file(filepath)
-
-        def _render(**globals: t.Any) -> str:
-            return self.docs.catalog.render("autodoc.md.jx", **globals)
-
-        source = render_autodoc(source.strip(), render=_render)
-        try:
-            html, state = self.render_markdown(source, meta, filepath=filepath)
-        except Exception as err:
-            raise RuntimeError(f"Error processing {filepath}") from err
+        loaded = self.loaded.get(filename)
+        if not loaded:
+            if self.lazy:
+                loaded = self.read_page(filename)
+                self.unloaded.add(url)
+            else:
+                loaded = self.load_page(filename)
+        source, meta, html, data = loaded
 
         page = PageData(
             url=url,
@@ -288,9 +342,12 @@ class PagesProcessor:
             source=source,
             content=Markup(html),
             filepath=filepath,
-            toc=state.get("toc_items", []),
+            toc=data["toc_items"],
             parents=parents,
         )
+        page.search_fragments = data.get("search_fragments")
+        page.links = data.get("links")
+        page.ids = data.get("ids")
         self.pages.append(page)
 
         return NavItem(
@@ -300,6 +357,83 @@ class PagesProcessor:
             icon=page.icon,
         )
 
+    def get_index_url(self) -> str:
+        """Return the URL of the index page."""
+        return f"/{self.docs.prefix}/" if self.docs.prefix else "/"
+
+    def get_url(self, filename: str) -> str:
+        """Return the URL of the page with this filename."""
+        url = f"/docs/{Path(filename).with_suffix('').as_posix().strip('/')}/"
+        if self.docs.prefix:
+            url = f"/{self.docs.prefix}{url}"
+        return url
+
+    def load_page(self, filename: str) -> "TLoadedPage":
+        """Read the page file and render its Markdown.
+
+        Returns:
+            A `(source, meta, html, data)` tuple, where `data` is a dict
+            with the `RENDER_DATA` collected while rendering the Markdown.
+
+        """
+        filepath = self.docs.content_dir / filename
+        url = self.get_url(filename)
+        with profiling.step("read", page=url):
+            source, meta = self.read_file(filepath)
+
+        def _render(**globals: t.Any) -> str:
+            return self.docs.catalog.render("autodoc.md.jx", **globals)
+
+        with profiling.step("autodoc", page=url):
+            source = render_autodoc(source.strip(), render=_render)
+        try:
+            with profiling.step("markdown", page=url):
+                html, state = self.render_markdown(source, meta, filepath=filepath)
+        except Exception as err:
+            raise RuntimeError(f"Error processing {filepath}") from err
+
+        data = {key: state.get(key) for key in RENDER_DATA}
+        data["toc_items"] = data["toc_items"] or []
+        return source, meta, str(html), data
+
+    def read_page(self, filename: str) -> "TLoadedPage":
+        """Read only the source and the metadata of the page file.
+
+        Returns:
+            A `(source, meta, html, data)` tuple, like `load_page()`,
+            but with an empty `html` and no `data`.
+
+        """
+        filepath = self.docs.content_dir / filename
+        with profiling.step("read", page=self.get_url(filename)):
+            source, meta = self.read_file(filepath)
+        return source, meta, "", {"toc_items": []}
+
+    def load_content(self, page: PageData) -> None:
+        """Render the Markdown of a page processed with `lazy=True`, and set
+        its content, and the data collected while rendering it.
+        This modifies the page in place.
+        """
+        if not page.filepath:
+            return
+        if page.url == self.get_index_url():
+            # The index page has no autodoc, see `process_index_page()`
+            with profiling.step("markdown", page=page.url):
+                html, state = self.render_markdown(page.source, page.meta, filepath=page.filepath)
+            source = page.source
+            data = {key: state.get(key) for key in RENDER_DATA}
+        else:
+            filename = page.filepath.relative_to(self.docs.content_dir).as_posix()
+            source, _meta, html, data = self.load_page(filename)
+
+        page.source = source
+        page.content = Markup(html)
+        page.toc = data.get("toc_items") or []
+        page.search_fragments = data.get("search_fragments")
+        page.links = data.get("links")
+        page.ids = data.get("ids")
+        page.search_data = None
+
     def read_file(self, filepath: Path) -> tuple[str, TMetadata]:
         if not filepath.exists():
             raise FileNotFoundError(f"File {filepath} does not exist.")
@@ -311,13 +445,50 @@ class PagesProcessor:
 
     def render_markdown(self, source: str, meta: TMetadata, filepath: Path) -> tuple[str, MutableMapping]:
         source = source.strip()
-        html, state = render_markdown(source, meta=meta, __file__=str(filepath))
+        html, state = self.render_cached_markdown(source, meta, filepath=filepath)
 
         if imports := meta.get("imports"):
             if not isinstance(imports, dict):
                 raise ValueError("Invalid 'imports' in metadata, must be a dict")
             html = self.render_mdjx(html, imports)
+            # The components can add content not found in the Markdown,
+            # so the search data and the IDs must be extracted from the final HTML
+            state.pop("search_fragments", None)
+            state.pop("ids", None)
+
+        return html, state
 
+    def render_cached_markdown(
+        self, source: str, meta: TMetadata, filepath: Path
+    ) -> tuple[str, MutableMapping]:
+        """Render the Markdown source to HTML, unless the same source, with
+        the same metadata, was already rendered and saved in the cache.
+        """
+        cache = self.docs.cache
+        search = self.docs.search_from_ast
+        # The output of pages that include other files can't be cached
+        # because it doesn't depend only on the source.
+        if not cache or RX_INCLUDE_DIRECTIVE.search(source):
+            return render_markdown(source, meta=meta, search=search, __file__=str(filepath))
+
+        key = cache.key("markdown", source, meta, search)
+        cached = cache.get(key)
+        if cached:
+            state: MutableMapping = {}
+            for name in RENDER_DATA:
+                value = cached.get(name)
+                if isinstance(value, list) and name != "ids":
+                    # JSON has no tuples
+                    value = [tuple(item) for item in value]
+                if value is not None:
+                    state[name] = value
+            return cached["html"], state
+
+        html, state = render_markdown(source, meta=meta, search=search, __file__=str(filepath))
+        cache.set(key, {
+            "html": html,
+            **{name: state.get(name) for name in RENDER_DATA},
+        })
         return html, state
 
     def render_mdjx(self, source: str, imports: dict[str, str]) -> str:
@@ -360,7 +531,65 @@ class PagesProcessor:
             else:
                 page.next = None
 
-    def set_search_data(self) -> None:
+    def get_search_data(self, page: PageData) -> TSearchData:
+        """Extract the search data of the page, or get it from the cache."""
+        if page.search_fragments is not None:
+            return search.build_search_data(page, page.search_fragments)
+
+        cache = self.docs.cache
+        if not cache:
+            return search.extract_search_data(page)
+
+        key = cache.key("search", page.url, page.section_title, page.title, page.content)
+        search_data = cache.get(key)
+        if search_data is None:
+            search_data = search.extract_search_data(page)
+            cache.set(key, search_data)
+        return search_data
+
+    def set_search_data(self, *, jobs: int = 1) -> None:
         """Set the search data for each page."""
-        for page in self.pages:
-            page.search_data = search.extract_search_data(page)
+        results = utils.parallel_map(
+            _extract_search_data, range(len(self.pages)), shared=self, jobs=jobs
+        )
+        for page, (search_data, profile) in zip(self.pages, results, strict=True):
+            profiling.merge(profile)
+            page.search_data = search_data
+
+
+# The data collected while rendering the Markdown of a page,
+# kept with the page and in the render cache.
+RENDER_DATA = ("toc_items", "search_fragments", "links", "ids")
+
+TLoadedPage = tuple[str, TMetadata, str, dict[str, t.Any]]
+
+
+def iter_filenames(user_pages: Sequence[str | dict[str, t.Any]]) -> Iterator[str]:
+    """Yield the filenames of all the pages in the user-defined pages structure."""
+    for user_page in user_pages:
+        if isinstance(user_page, str):
+            yield user_page
+        elif isinstance(user_page, dict):
+            if user_page.get("path"):
+                yield user_page["path"]
+            if isinstance(user_page.get("pages"), list):
+                yield from iter_filenames(user_page["pages"])
+
+
+# Functions run in the worker processes
+
+# Each one also returns the profiling data recorded in the worker, if any.
+
+def _load_page(
+    processor: PagesProcessor, filename: str
+) -> tuple[TLoadedPage, dict[str, t.Any] | None]:
+    return processor.load_page(filename), profiling.flush()
+
+
+def _extract_search_data(
+    processor: PagesProcessor, index: int
+) -> tuple[TSearchData, dict[str, t.Any] | None]:
+    page = processor.pages[index]
+    with profiling.step("search", page=page.url):
+        search_data = processor.get_search_data(page)
+    return search_data, profiling.flush()
@@ -0,0 +1,246 @@
+"""
+Timing of the stages of a build, and of the steps of each page.
+
+The helpers of this module do nothing unless a `Profiler` is enabled with
+`enabled()`, so they can be left in the code paths of every build.
+"""
+import json
+import os
+import time
+import typing as t
+from collections.abc import Generator
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+
+# The profiler of the current build, if any. The worker processes are
+# forked, so they inherit it.
+_active: "Profiler | None" = None
+
+
+class Profiler:
+    """Records the wall and CPU time of the stages of a build, and of the
+    steps (reading, rendering the Markdown, highlighting, etc.) of each page.
+
+    The time of a step doesn't include the time of the steps nested in it
+    (for example, "highlight" inside "markdown"), so the times of the steps
+    of a page add up to its total.
+
+    The stages and steps done in a worker process are sent back to the main
+    process with the results of the work (see `flush()` and `merge()`).
+    """
+
+    pid: int
+    started: int
+    stages: list[dict[str, t.Any]]
+    pages: dict[str, dict[str, list[float]]]
+    events: list[dict[str, t.Any]]
+    page: str
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.started = time.perf_counter_ns()
+        self.stages = []
+        # {page: {step: [wall, cpu]}}
+        self.pages = {}
+        # The steps, as Chrome trace events
+        self.events = []
+        # The page being processed by the current step
+        self.page = ""
+        # The time of the steps nested in each of the current ones
+        self._nested: list[list[int]] = []
+        # The process that recorded the steps
+        self._recording_pid = self.pid
+
+    @contextmanager
+    def stage(self, name: str, *, docs: str = "") -> Generator[None, None, None]:
+        """Time a stage of the build of the documentation with this `docs` prefix."""
+        self._check_process()
+        start, cpu_start = time.perf_counter_ns(), time.process_time_ns()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter_ns() - start, time.process_time_ns() - cpu_start
+            self.stages.append({
+                "docs": docs,
+                "name": name,
+                "start": (start - self.started) / 1e9,
+                "wall": wall / 1e9,
+                "cpu": cpu / 1e9,
+                "pid": os.getpid(),
+            })
+
+    @contextmanager
+    def step(self, name: str, *, page: str = "") -> Generator[None, None, None]:
+        """Time a step of the processing of a page. If `page` is not given,
+        the page of the enclosing step is used."""
+        page = page or self.page
+        if not page:
+            yield
+            return
+
+        self._check_process()
+        outer_page, self.page = self.page, page
+        self._nested.append([0, 0])
+        start, cpu_start = time.perf_counter_ns(), time.process_time_ns()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter_ns() - start, time.process_time_ns() - cpu_start
+            self.page = outer_page
+            nested_wall, nested_cpu = self._nested.pop()
+            if self._nested:
+                self._nested[-1][0] += wall
+                self._nested[-1][1] += cpu
+            times = self.pages.setdefault(page, {}).setdefault(name, [0.0, 0.0])
+            times[0] += (wall - nested_wall) / 1e9
+            times[1] += (cpu - nested_cpu) / 1e9
+            self.events.append({
+                "name": name,
+                "cat": "page",
+                "ph": "X",
+                "ts": (start - self.started) / 1000,
+                "dur": wall / 1000,
+                "pid": os.getpid(),
+                "tid": 0,
+                "args": {"page": page},
+            })
+
+    def flush(self) -> dict[str, t.Any] | None:
+        """In a worker process, return and forget the stages and steps
+        recorded so far."""
+        if os.getpid() == self.pid:
+            return None
+        self._check_process()
+        data = {"stages": self.stages, "pages": self.pages, "events": self.events}
+        self.stages = []
+        self.pages = {}
+        self.events = []
+        return data
+
+    def merge(self, data: dict[str, t.Any] | None) -> None:
+        """Add the stages and steps recorded by a worker process."""
+        if not data:
+            return
+        self.stages.extend(data["stages"])
+        for page, steps in data["pages"].items():
+            for name, (wall, cpu) in steps.items():
+                times = self.pages.setdefault(page, {}).setdefault(name, [0.0, 0.0])
+                times[0] += wall
+                times[1] += cpu
+        self.events.extend(data["events"])
+
+    def report(self) -> dict[str, t.Any]:
+        """Return the recorded times, with the pages sorted from the slowest."""
+        pages: list[dict[str, t.Any]] = [
+            {
+                "page": page,
+                "wall": sum(wall for wall, _ in steps.values()),
+                "cpu": sum(cpu for _, cpu in steps.values()),
+                "steps": {
+                    name: {"wall": wall, "cpu": cpu}
+                    for name, (wall, cpu) in steps.items()
+                },
+            }
+            for page, steps in self.pages.items()
+        ]
+        pages.sort(key=lambda page: float(page["wall"]), reverse=True)
+        return {
+            "version": 1,
+            "stages": [
+                {key: value for key, value in stage.items() if key not in ("start", "pid")}
+                for stage in sorted(self.stages, key=lambda stage: stage["start"])
+            ],
+            "pages": pages,
+        }
+
+    def summary(self, top: int = 10) -> str:
+        """Return a human-readable summary of the stages and of the
+        `top` slowest pages."""
+        report = self.report()
+        lines = ["Stages:"]
+        for stage in report["stages"]:
+            name = f"{stage['docs']}: {stage['name']}" if stage["docs"] else stage["name"]
+            lines.append(f"  {stage['wall']:8.3f}s  {stage['cpu']:8.3f}s CPU  {name}")
+
+        pages = report["pages"][:top]
+        if pages:
+            lines.append(f"Slowest {len(pages)} pages:")
+        for page in pages:
+            steps = sorted(page["steps"].items(), key=lambda item: -item[1]["wall"])
+            detail = ", ".join(f"{name} {times['wall']:.3f}s" for name, times in steps)
+            lines.append(f"  {page['wall']:8.3f}s  {page['page']} ({detail})")
+        return "\n".join(lines)
+
+    def save(self, path: str | Path) -> None:
+        """Write the report as a JSON file."""
+        Path(path).write_text(json.dumps(self.report(), indent=2), encoding="utf-8")
+
+    def save_trace(self, path: str | Path) -> None:
+        """Write the stages and the steps as a Chrome trace file, that can be
+        opened in `chrome://tracing` or https://ui.perfetto.dev"""
+        events = [
+            {
+                "name": stage["name"],
+                "cat": "stage",
+                "ph": "X",
+                "ts": stage["start"] * 1e6,
+                "dur": stage["wall"] * 1e6,
+                "pid": stage["pid"],
+                "tid": 1,
+                "args": {"docs": stage["docs"], "cpu": stage["cpu"]},
+            }
+            for stage in self.stages
+        ]
+        events.extend(self.events)
+        Path(path).write_text(json.dumps({"traceEvents": events}), encoding="utf-8")
+
+    # Private
+
+    def _check_process(self) -> None:
+        """Forget the stages and steps inherited from the main process by
+        a forked worker, so they are not sent back."""
+        pid = os.getpid()
+        if pid != self._recording_pid:
+            self._recording_pid = pid
+            self.stages = []
+            self.pages = {}
+            self.events = []
+            self._nested = []
+
+
+@contextmanager
+def enabled(profiler: Profiler | None) -> Generator[Profiler | None, None, None]:
+    """Use the profiler, if any, for everything done inside this block."""
+    global _active
+
+    outer, _active = _active, profiler
+    try:
+        yield profiler
+    finally:
+        _active = outer
+
+
+def stage(name: str, *, docs: str = "") -> t.ContextManager[None]:
+    """Time a stage of the build, if profiling."""
+    if _active is None:
+        return nullcontext()
+    return _active.stage(name, docs=docs)
+
+
+def step(name: str, *, page: str = "") -> t.ContextManager[None]:
+    """Time a step of the processing of a page, if profiling."""
+    if _active is None:
+        return nullcontext()
+    return _active.step(name, page=page)
+
+
+def flush() -> dict[str, t.Any] | None:
+    """In a worker process, return the steps to send to the main process."""
+    return _active.flush() if _active else None
+
+
+def merge(data: dict[str, t.Any] | None) -> None:
+    """In the main process, add the steps received from a worker."""
+    if _active:
+        _active.merge(data)
@@ -1,7 +1,11 @@
+import json
+import math
 import re
-from html.parser import HTMLParser
+import typing as t
+from collections import Counter
+from html import unescape as html_unescape
 
-from .types import PageData, TSearchData
+from .types import PageData, TSearchData, TSearchFragment, TSearchPageData
 
 
 def extract_search_data(page: PageData) -> TSearchData:
@@ -14,15 +18,184 @@ def extract_search_data(page: PageData) -> TSearchData:
     Returns:
         SearchData object containing the search data.
     """
-    parser = TextExtractor(page)
-    html = prepare_html(page.content)
-    if not html:
+    if not page.content:
         return {}
-    parser.feed(html)
+    parser = TextExtractor(page)
+    parser.feed(page.content)
     parser.close()
     return parser.docs
 
 
+def build_search_data(page: PageData, fragments: list[TSearchFragment]) -> TSearchData:
+    """
+    Build the search data of a page from the search fragments extracted
+    while rendering its Markdown.
+
+    Arguments:
+        page: The page the fragments are from.
+        fragments: A list of `(heading_id, title, content)` tuples.
+
+    Returns:
+        The search data of the page, in the same format as `extract_search_data()`.
+    """
+    docs: TSearchData = {}
+    for hash, title, content in fragments:
+        if content == page.title:
+            continue
+        url = f"{page.url}#{hash}" if hash else page.url
+        docs[f"{url}{len(docs) + 1}"] = {
+            "title": title or page.title,
+            "content": content,
+            "section": page.section_title,
+            "url": url,
+        }
+    return docs
+
+
+def build_search_index(search_data: TSearchData) -> dict[str, t.Any] | None:
+    """
+    Build a Lunr index of the search data, serialized so it can be loaded
+    by `lunr.Index.load()` in the browser.
+
+    Requires the optional `lunr` package. If it isn't installed, the index
+    is not built here and the browser will build it from the search data.
+
+    Arguments:
+        search_data: The merged search data of all the pages.
+
+    Returns:
+        The serialized index, or `None` if the `lunr` package isn't installed.
+    """
+    try:
+        from lunr import lunr
+    except ImportError:
+        return None
+
+    documents = [
+        {
+            "id": key,
+            "title": doc["title"],
+            "section": doc["section"],
+            "content": doc["content"],
+        }
+        for key, doc in search_data.items()
+    ]
+    # Same fields as the index built by `search.js`
+    index = lunr(
+        ref="id",
+        fields=("id", {"field_name": "title", "boost": 10}, "section", "content"),
+        documents=documents,
+    )
+    return index.serialize()
+
+
+RX_TOKEN = re.compile(r"\w+")
+RX_MARKUP = re.compile(r"<[^>]*>|&[#\w]+;")
+
+
+def tokenize(text: str) -> list[str]:
+    """Split the text in lowercase words, ignoring HTML tags and entities.
+    Must match the `tokenize()` function of `search.js`."""
+    return RX_TOKEN.findall(RX_MARKUP.sub(" ", text).lower())
+
+
+def build_search_shards(
+    search_data: TSearchData,
+    shard_size: int,
+) -> tuple[dict[str, t.Any], dict[str, t.Any]]:
+    """
+    Build an inverted index of the search data, split into shards of about
+    `shard_size` bytes, so the browser only has to fetch the shards needed
+    for a query.
+
+    The terms are partitioned by prefix: a prefix whose terms don't fit in
+    a shard is split by the next character. The documents are split, in
+    order, into their own shards.
+
+    Arguments:
+        search_data: The merged search data of all the pages.
+        shard_size: The maximum size of each shard, in bytes. A shard with
+            a single term, or a single document, can be larger.
+
+    Returns:
+        A `(manifest, shards)` tuple. The manifest maps each term prefix to
+        the name of its shard, and lists the first document ID of each
+        documents shard. `shards` maps the shard names to their data.
+    """
+    docs = list(search_data.values())
+    postings: dict[str, list[list[t.Any]]] = {}
+    frequency: Counter[str] = Counter()
+
+    for doc_id, doc in enumerate(docs):
+        weights: Counter[str] = Counter()
+        for field, boost in (("title", 10), ("section", 1), ("content", 1)):
+            for term in tokenize(doc[field]):
+                weights[term] += boost
+        for term, weight in weights.items():
+            postings.setdefault(term, []).append([doc_id, weight])
+            frequency[term] += 1
+
+    for term, term_postings in postings.items():
+        idf = math.log(1 + len(docs) / frequency[term])
+        for posting in term_postings:
+            posting[1] = round(posting[1] * idf, 2)
+
+    manifest: dict[str, t.Any] = {"version": 1, "terms": {}, "docs": []}
+    shards: dict[str, t.Any] = {}
+
+    for prefix, terms in _partition_terms(postings, "", shard_size):
+        name = f"terms-{len(manifest['terms'])}.json"
+        manifest["terms"][prefix] = name
+        shards[name] = terms
+
+    first_id = 0
+    shard: list[TSearchPageData] = []
+    size = 0
+    for doc_id, doc in enumerate(docs):
+        doc_size = len(json.dumps(doc, separators=(",", ":")))
+        if shard and size + doc_size > shard_size:
+            name = f"docs-{len(manifest['docs'])}.json"
+            manifest["docs"].append([first_id, name])
+            shards[name] = shard
+            first_id, shard, size = doc_id, [], 0
+        shard.append(doc)
+        size += doc_size
+    if shard:
+        name = f"docs-{len(manifest['docs'])}.json"
+        manifest["docs"].append([first_id, name])
+        shards[name] = shard
+
+    return manifest, shards
+
+
+def _partition_terms(
+    postings: dict[str, list[list[t.Any]]],
+    prefix: str,
+    shard_size: int,
+) -> t.Iterator[tuple[str, dict[str, list[list[t.Any]]]]]:
+    size = sum(
+        len(term) + len(json.dumps(term_postings, separators=(",", ":")))
+        for term, term_postings in postings.items()
+    )
+    if size <= shard_size or len(postings) == 1:
+        yield prefix, dict(sorted(postings.items()))
+        return
+
+    # Terms equal to the prefix can't be split any further
+    groups: dict[str, dict[str, list[list[t.Any]]]] = {}
+    exact: dict[str, list[list[t.Any]]] = {}
+    for term, term_postings in postings.items():
+        if len(term) == len(prefix):
+            exact[term] = term_postings
+        else:
+            groups.setdefault(term[: len(prefix) + 1], {})[term] = term_postings
+
+    if exact:
+        yield prefix, exact
+    for group_prefix in sorted(groups):
+        yield from _partition_terms(groups[group_prefix], group_prefix, shard_size)
+
+
 REMOVE_SELF_CLOSING_TAGS = (
     "hr",
     "input",
@@ -107,44 +280,42 @@ HTML_FRAGMENT_SEP = (
 
 RX_MULTIPLE_SPACES = re.compile(r"\s+")
 
-# Compiled once. `[^>]*` (not `.*?`) matches attributes without backtracking,
-# and `\b` keeps short tag names from matching longer ones (e.g. `a` vs `article`).
-RX_REMOVE_SELF_CLOSING = re.compile(
-    rf"<(?:{'|'.join(REMOVE_SELF_CLOSING_TAGS)})\b[^>]*/?>",
+# Tags whose markers are just removed, leaving their contents (if any) in place.
+RX_UNWRAP = re.compile(
+    rf"""</?(?:{'|'.join(REMOVE_TAGS_KEEP_CONTENT + REMOVE_SELF_CLOSING_TAGS)})"""
+    r"""(?=[\s/>])(?:[^>"']|"[^"]*"|'[^']*')*>""",
     flags=re.IGNORECASE,
 )
-RX_REMOVE_TAGS_AND_CONTENTS = re.compile(
-    rf"<({'|'.join(REMOVE_TAGS_AND_CONTENTS)})\b[^>]*>.*?</\1\s*>",
-    flags=re.DOTALL | re.IGNORECASE,
+# Any other tag, comment, or declaration. The unwrapped tags are not matched here,
+# so the loop over the document only stops at the tags that matter.
+RX_TAG = re.compile(
+    rf"""<(?:(/?)(?!(?i:{'|'.join(REMOVE_TAGS_KEEP_CONTENT + REMOVE_SELF_CLOSING_TAGS)})(?=[\s/>]))"""
+    r"""([a-zA-Z][^\s/>]*)((?:[^>"']|"[^"]*"|'[^']*')*)>|!--.*?-->|[!?][^>]*>)""",
+    flags=re.DOTALL,
 )
-# Unwrap tags by deleting the open/close markers separately. Pairing them with
-# `<tag>(.*?)</tag>` backtracks catastrophically on deeply nested tags.
-RX_REMOVE_TAGS_KEEP_CONTENT = re.compile(
-    rf"</?(?:{'|'.join(REMOVE_TAGS_KEEP_CONTENT)})\b[^>]*>",
-    flags=re.IGNORECASE,
-)
-
-
-def prepare_html(html: str) -> str:
+RX_ID_ATTR = re.compile(r"""(?:^|\s)id\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""")
+# The contents of these tags are raw text, so only its end tag matters.
+RAW_TEXT_TAGS = ("script", "style")
+RX_SKIP = {
+    tag: re.compile(
+        rf"</{tag}(?=[\s/>])[^>]*>" if tag in RAW_TEXT_TAGS
+        else rf"<(/?){tag}(?=[\s/>])[^>]*>",
+        flags=re.IGNORECASE,
+    )
+    for tag in REMOVE_TAGS_AND_CONTENTS
+}
+
+
+class TextExtractor:
     """
-    Prepare HTML content by removing unwanted tags and contents.
+    Extract the search fragments of a page in a single pass over its HTML.
+    The data fed is buffered, and parsed when closing the extractor.
 
-    Arguments:
-        html: The HTML content to prepare.
-
-    Returns:
-        Cleaned HTML content.
+    The tags in `REMOVE_SELF_CLOSING_TAGS` are ignored, the ones in
+    `REMOVE_TAGS_AND_CONTENTS` are skipped with everything inside them,
+    and the ones in `REMOVE_TAGS_KEEP_CONTENT` are unwrapped: their text is
+    joined with the text around them, as if the tags weren't there.
     """
-    if not html:
-        return ""
-
-    html = RX_REMOVE_SELF_CLOSING.sub("", html)
-    html = RX_REMOVE_TAGS_AND_CONTENTS.sub("", html)
-    html = RX_REMOVE_TAGS_KEEP_CONTENT.sub("", html)
-    return html.strip()
-
-
-class TextExtractor(HTMLParser):
     docs: TSearchData
     _tag: str = "p"
     _in_header: bool = False
@@ -156,17 +327,90 @@ class TextExtractor(HTMLParser):
     _title: list[str]
     _content: list[str]
     _id: int
+    _rawdata: list[str]
+    _text: list[str]
+    _started: bool
 
     def __init__(self, page: PageData):
-        super().__init__()
         self.docs = {}
         self._page = page
         self._hash = ""
         self._title = []
         self._content = []
         self._id = 1
+        self._rawdata = []
+        self._text = []
+        self._started = False
+
+    def feed(self, data: str):
+        self._rawdata.append(data)
+
+    def close(self):
+        html = "".join(self._rawdata)
+        self._rawdata = []
+        self.parse(html)
+        self.flush_text(end=True)
+        if self._content:
+            self.save_fragment()
 
-    def handle_starttag(self, tag: str, attrs: list):
+    def parse(self, html: str):
+        text = self._text
+        pos = 0
+        while True:
+            # Searched again from the end of the last tag, and not with
+            # `finditer()`, so the content of the skipped tags, like a quote
+            # in a script, can't hide the tags after them
+            match = RX_TAG.search(html, pos)
+            if not match:
+                break
+            start = match.start()
+            if start > pos:
+                text.append(html[pos:start])
+            pos = match.end()
+
+            closing, tag, attrs = match.groups()
+            if tag is None:
+                # Comments and declarations
+                self.flush_text()
+                self._started = True
+                continue
+
+            tag = tag.lower()
+            if tag in REMOVE_TAGS_AND_CONTENTS:
+                if not closing and not attrs.endswith("/"):
+                    pos = self.skip_contents(html, pos, tag)
+                continue
+
+            if text:
+                self.flush_text()
+            self._started = True
+            if closing:
+                self.handle_endtag(tag)
+            else:
+                self.handle_starttag(tag, attrs)
+                if attrs.endswith("/"):
+                    self.handle_endtag(tag)
+
+        if pos < len(html):
+            text.append(html[pos:])
+
+    def skip_contents(self, html: str, pos: int, tag: str) -> int:
+        """Return the position after the end tag of the `tag` that starts at `pos`,
+        including any nested tags with the same name."""
+        rx = RX_SKIP[tag]
+        depth = 1
+        while depth:
+            match = rx.search(html, pos)
+            if not match:
+                return len(html)
+            pos = match.end()
+            if tag in RAW_TEXT_TAGS or match.group(1):
+                depth -= 1
+            elif not match.group(0).endswith("/>"):
+                depth += 1
+        return pos
+
+    def handle_starttag(self, tag: str, attrs: str):
         self._tag = tag
 
         if tag in HTML_FRAGMENT_SEP:
@@ -176,8 +420,9 @@ class TextExtractor(HTMLParser):
         if tag in HTML_HEADER:
             self._title = []
             self._in_header = True
-            if "id" in dict(attrs):
-                self._hash = dict(attrs)["id"]
+            match = RX_ID_ATTR.search(attrs)
+            if match:
+                self._hash = html_unescape(next(g for g in match.groups() if g is not None))
             return
 
     def handle_endtag(self, tag: str):
@@ -185,7 +430,25 @@ class TextExtractor(HTMLParser):
             self._in_header = False
             return
 
-    def handle_data(self, data: str):
+    def flush_text(self, *, end: bool = False):
+        """Process the text found since the last tag that wasn't unwrapped."""
+        if not self._text:
+            return
+        data = "".join(self._text)
+        self._text.clear()
+        if "<" in data:
+            data = RX_UNWRAP.sub("", data)
+        # Ignore the whitespace at the start and end of the document
+        if not self._started:
+            data = data.lstrip()
+        if end:
+            data = data.rstrip()
+        if "&" in data:
+            data = html_unescape(data)
+        if data:
+            self.process_text(data)
+
+    def process_text(self, data: str):
         if self._tag == HTML_PRE:
             data = (
                 data
@@ -246,7 +509,4 @@ class TextExtractor(HTMLParser):
         self._content = []
         self._id += 1
 
-    def close(self):
-        if self._content:
-            self.save_fragment()
-        super().close()
+
@@ -0,0 +1,337 @@
+"""
+The development server, that serves the builds kept in memory, and
+reloads the open pages after each rebuild.
+
+This module is only imported by `Docs.cli_run()`, so builds don't pay
+for importing `http.server`.
+"""
+import io
+import json
+import os
+import queue
+import threading
+import typing as t
+from collections.abc import Callable, Iterable, Mapping
+from functools import partial
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import unquote, urlsplit
+
+from .compress import ENCODINGS
+
+
+LIVERELOAD_URL = "/_writeadoc/livereload"
+# Seconds between the comments sent to keep the connections open
+KEEPALIVE = 15
+
+# Reloads the page if it changed, or if any script, image, etc. that it uses
+# changed, and swaps the changed stylesheets without reloading.
+# A "*" means that everything changed.
+LIVERELOAD_SCRIPT = """<script>
+(() => {
+  const source = new EventSource("%s");
+  const pathOf = (url) => new URL(url, location.href).pathname.replace(/index\\.html$/, "");
+  let lost = false;
+  source.addEventListener("error", () => { lost = true; });
+  source.addEventListener("open", () => {
+    // The server was restarted
+    if (lost) location.reload();
+  });
+  source.addEventListener("reload", (event) => {
+    const urls = new Set(JSON.parse(event.data));
+    if (urls.has("*") || urls.has(pathOf(location.href))) {
+      location.reload();
+      return;
+    }
+    for (const el of document.querySelectorAll("[src], link[href]")) {
+      const url = el.src || el.href;
+      if (!urls.has(pathOf(url))) continue;
+      if (el.matches('link[rel="stylesheet"]')) {
+        const href = new URL(url);
+        href.searchParams.set("livereload", Date.now());
+        el.href = href.href;
+      } else {
+        location.reload();
+        return;
+      }
+    }
+  });
+})();
+</script>
+""" % LIVERELOAD_URL
+
+
+class LiveReload:
+    """Sends the URLs changed by each rebuild to the open pages, as
+    server-sent events."""
+
+    def __init__(self):
+        self.closed = False
+        self._clients: set[queue.SimpleQueue] = set()
+        self._lock = threading.Lock()
+
+    def notify(self, urls: Iterable[str]) -> None:
+        """Send the changed URLs to every open page."""
+        urls = sorted(urls)
+        if not urls:
+            return
+        with self._lock:
+            for client in self._clients:
+                client.put(urls)
+
+    def subscribe(self) -> queue.SimpleQueue:
+        client = queue.SimpleQueue()
+        with self._lock:
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client: queue.SimpleQueue) -> None:
+        with self._lock:
+            self._clients.discard(client)
+
+    def close(self) -> None:
+        """Close the open connections."""
+        self.closed = True
+        with self._lock:
+            for client in self._clients:
+                client.put(None)
+
+
+class RecentPages:
+    """The URLs of the last pages requested from the server, so the
+    rebuilds can render them first."""
+
+    def __init__(self, size: int = 20):
+        self.size = size
+        self._urls: dict[str, None] = {}
+        self._lock = threading.Lock()
+
+    def add(self, url: str) -> None:
+        with self._lock:
+            # Moved to the end if already there
+            self._urls.pop(url, None)
+            self._urls[url] = None
+            if len(self._urls) > self.size:
+                del self._urls[next(iter(self._urls))]
+
+    def get(self) -> list[str]:
+        """Return the URLs, the most recently requested first."""
+        with self._lock:
+            return list(reversed(self._urls))
+
+
+class DevRequestHandler(SimpleHTTPRequestHandler):
+    """Serves the files of a development build, kept in memory, and the
+    files of some folders, mounted at an URL.
+
+    If `livereload` is set, it also serves the stream of changed URLs.
+    If `recent` is set, the URLs of the pages served are added to it.
+
+    If a file of a mounted folder has a compressed copy (see `compress.py`)
+    for an encoding accepted by the browser, that copy is served instead.
+    """
+
+    files: Mapping[str, bytes] | Callable[[], Mapping[str, bytes]]
+    folders: dict[str, str]
+    livereload: LiveReload | None
+    render: Callable[[str], bytes | None] | None
+    recent: RecentPages | None
+
+    def __init__(
+        self,
+        *args: t.Any,
+        files: Mapping[str, bytes] | Callable[[], Mapping[str, bytes]] | None = None,
+        folders: dict[str, str] | None = None,
+        livereload: LiveReload | None = None,
+        render: Callable[[str], bytes | None] | None = None,
+        recent: RecentPages | None = None,
+        **kwargs: t.Any,
+    ):
+        # Set before calling the parent, because that handles the request
+        self.files = files if files is not None else {}
+        # The longest URLs first
+        self.folders = dict(sorted((folders or {}).items(), key=lambda item: -len(item[0])))
+        self.livereload = livereload
+        self.render = render
+        self.recent = recent
+        super().__init__(*args, **kwargs)
+
+    def do_GET(self):
+        if self.livereload and self.path == LIVERELOAD_URL:
+            self.send_events(self.livereload)
+            return
+        super().do_GET()
+
+    def send_head(self):
+        path = unquote(urlsplit(self.path).path)
+        relpath = path.lstrip("/")
+        if not relpath or relpath.endswith("/"):
+            relpath = f"{relpath}index.html"
+
+        data = self.get_file(relpath)
+        if data is not None:
+            self.send_response(200)
+            self.send_header("Content-Type", self.guess_type(relpath))
+            self.send_header("Content-Length", str(len(data)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            if self.recent and relpath.endswith(".html"):
+                self.recent.add(f"/{relpath.removesuffix('index.html')}")
+            return io.BytesIO(data)
+
+        if self.get_file(f"{relpath}/index.html") is not None:
+            self.send_response(301)
+            self.send_header("Location", f"{path}/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return None
+
+        for url, folder in self.folders.items():
+            if path.startswith(url):
+                # Serve the rest of the path from the folder
+                self.path = f"/{self.path[len(url):]}"
+                self.directory = folder
+                data = self.send_compressed(self.translate_path(self.path))
+                if data is not None:
+                    return data
+                return super().send_head()
+
+        self.send_error(404, "File not found")
+        return None
+
+    def send_compressed(self, fspath: str) -> io.BytesIO | None:
+        """If there is a compressed copy of the file of a mounted folder,
+        for an encoding accepted by the browser, send its headers and
+        return it.
+
+        The files kept in memory are never compressed, so they don't
+        have compressed copies.
+        """
+        if os.path.isdir(fspath) and fspath.endswith("/"):
+            fspath = os.path.join(fspath, "index.html")
+        if not os.path.isfile(fspath):
+            return None
+
+        accepted = get_accepted_encodings(self.headers.get("Accept-Encoding", ""))
+        for encoding, ext in ENCODINGS.items():
+            if encoding in accepted and os.path.isfile(f"{fspath}{ext}"):
+                data = Path(f"{fspath}{ext}").read_bytes()
+                self.send_response(200)
+                self.send_header("Content-Type", self.guess_type(fspath))
+                self.send_header("Content-Encoding", encoding)
+                self.send_header("Vary", "Accept-Encoding")
+                self.send_header("Content-Length", str(len(data)))
+                self.send_header("Cache-Control", "no-cache")
+                self.end_headers()
+                return io.BytesIO(data)
+        return None
+
+    def get_file(self, relpath: str) -> bytes | None:
+        """Return the content of a file kept in memory, rendering
+        it first if needed."""
+        files = self.files if isinstance(self.files, Mapping) else self.files()
+        data = files.get(relpath)
+        if data is None and self.render:
+            data = self.render(relpath)
+        return data
+
+    def send_events(self, livereload: LiveReload) -> None:
+        self.close_connection = True
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        client = livereload.subscribe()
+        try:
+            while not livereload.closed:
+                try:
+                    urls = client.get(timeout=KEEPALIVE)
+                except queue.Empty:
+                    data = ": keepalive\n\n"
+                else:
+                    if urls is None:
+                        break
+                    data = f"event: reload\ndata: {json.dumps(urls)}\n\n"
+                self.wfile.write(data.encode("utf-8"))
+                self.wfile.flush()
+        except OSError:
+            # The page was closed
+            pass
+        finally:
+            livereload.unsubscribe(client)
+
+
+def start_server(
+    *,
+    files: Mapping[str, bytes] | Callable[[], Mapping[str, bytes]] | None = None,
+    folders: dict[str, str | Path] | None = None,
+    port: int = 8000,
+    livereload: LiveReload | None = None,
+    render: Callable[[str], bytes | None] | None = None,
+    recent: RecentPages | None = None,
+) -> ThreadingHTTPServer:
+    """Serve the files of a development build from a background thread.
+
+    Arguments:
+        files:
+            The content of the files kept in memory, by their path, or a
+            function returning it for each request, if it can be replaced
+            while serving. An URL ending with "/" is served from its
+            `index.html` file.
+        folders:
+            The folders to serve the other files from, by the URL where
+            they are mounted (ending with "/"). For example,
+            `{"/assets/": "/path/to/assets"}` or `{"/": "/path/to/build"}`.
+        port:
+            The port to listen to, or 0 to use any free one.
+        livereload:
+            If set, the open pages listen to it for changes.
+        render:
+            If set, called with the path of a file not found in `files`,
+            to render it on demand. Returns its content, or `None` if there
+            is no such file.
+        recent:
+            If set, the URLs of the pages served are added to it.
+
+    Returns:
+        The running server. Call its `shutdown()` method to stop it.
+
+    """
+    handler = partial(
+        DevRequestHandler,
+        files=files,
+        folders={url: str(folder) for url, folder in (folders or {}).items()},
+        livereload=livereload,
+        render=render,
+        recent=recent,
+    )
+    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    print(f"Serving docs on http://localhost:{server.server_address[1]}/\n")
+    return server
+
+
+def get_accepted_encodings(header: str) -> set[str]:
+    """Return the encodings accepted in an `Accept-Encoding` header,
+    ignoring the ones with a quality value of zero."""
+    accepted = set()
+    for item in header.lower().split(","):
+        name, _, params = item.partition(";")
+        quality = params.strip().removeprefix("q=")
+        try:
+            if params and float(quality) == 0:
+                continue
+        except ValueError:
+            pass
+        if name.strip():
+            accepted.add(name.strip())
+    return accepted
+
+
+def insert_livereload_script(html: str) -> str:
+    """Insert the script that listens for changes at the end of the page."""
+    index = html.rfind("</body>")
+    if index == -1:
+        return html + LIVERELOAD_SCRIPT
+    return html[:index] + LIVERELOAD_SCRIPT + html[index:]
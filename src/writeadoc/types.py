@@ -31,6 +31,10 @@ class TSearchPageData(t.TypedDict):
 
 TSearchData = dict[str, TSearchPageData]
 
+# A `(heading_id, title, content)` search fragment of a page, before
+# the page URL is known.
+TSearchFragment = tuple[str, str, str]
+
 
 class NavItem:
     id: str
@@ -97,6 +101,11 @@ class PageData:
     prev: PageRef | None = None
     next: PageRef | None = None
     search_data: TSearchData | None = None
+    search_fragments: list[TSearchFragment] | None = None
+    # The `(url, lineno)` of the links in the source, and the IDs of the
+    # elements of the page, if collected while rendering it.
+    links: list[tuple[str, int]] | None = None
+    ids: list[str] | None = None
     toc: list[dict[str, t.Any]]
     parents: tuple[str, ...]  # IDs of parent items
 
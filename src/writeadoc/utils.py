@@ -1,20 +1,15 @@
+import filecmp
 import logging
 import os
 import random
-import time
-from collections.abc import Callable
+import shutil
+import threading
+import typing as t
+from collections.abc import Callable, Iterable, Iterator
 from functools import partial
-from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
 
 import strictyaml
-from watchdog.events import (
-    FileCreatedEvent,
-    FileDeletedEvent,
-    FileModifiedEvent,
-    FileMovedEvent,
-    FileSystemEventHandler,
-)
-from watchdog.observers import Observer
 
 from .exceptions import InvalidFrontMatter
 from .types import TMetadata
@@ -52,70 +47,62 @@ def truncate(source: str, limit: int = 400) -> str:
     return source
 
 
-def start_server(build_folder: str) -> None:
-    """Run a simple HTTP server to serve files from the specified directory."""
-    # Create a handler that serves files from build_folder
-    port = 8000
-    handler = partial(SimpleHTTPRequestHandler, directory=build_folder)
-    server = ThreadingHTTPServer(("0.0.0.0", port), handler)
-    print(f"Serving docs on http://localhost:{port}/\n")
-    try:
-        server.serve_forever()
-    except KeyboardInterrupt:
-        pass
-
-
-def start_observer(
-    path, run_callback: Callable, *, path_filter: tuple[str, ...] = ("content", "views")
-) -> None:
-    """Start a file system observer to watch for changes."""
-    event_handler = ChangeHandler(run_callback, path_filter)
-    observer = Observer()
-    # Watch directory and all subfolders
-    observer.schedule(
-        event_handler,
-        path,
-        recursive=True,
-        event_filter=[
-            FileDeletedEvent,
-            FileModifiedEvent,
-            FileCreatedEvent,
-            FileMovedEvent,
-        ],
-    )
-    observer.start()
-    print("Watching for changes. Press Ctrl+C to exit.")
+# The object shared with the worker processes of `parallel_map`.
+# Workers are forked, so they inherit it instead of receiving a pickled copy.
+_shared: t.Any = None
+
+
+def parallel_map(
+    func: Callable[[t.Any, t.Any], t.Any],
+    items: Iterable[t.Any],
+    *,
+    shared: t.Any = None,
+    jobs: int = 1,
+) -> Iterator[t.Any]:
+    """Call `func(shared, item)` for each item, in a pool of `jobs` processes.
+
+    The results are yielded in the same order as the items.
+    The `func` must be a module-level function, because it is sent to the
+    workers by reference. The `shared` object, however, is inherited by the
+    forked workers, so it can be anything (like a `Docs` instance with its
+    Jinja environment).
+
+    If `jobs` is 1 or less, the platform cannot fork, or other threads are
+    running (forking them could deadlock the workers), the items are
+    processed serially in the current process.
+    """
+    global _shared
+    # Imported here, so they are only loaded by the builds that use them
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    items = list(items)
+    if (
+        jobs <= 1
+        or len(items) < 2
+        or "fork" not in multiprocessing.get_all_start_methods()
+        or threading.active_count() > 1
+    ):
+        for item in items:
+            yield func(shared, item)
+        return
+
+    jobs = min(jobs, len(items))
+    chunksize = max(1, len(items) // (jobs * 4))
+    # Restored at the end, in case this is a worker calling `parallel_map` again
+    outer_shared, _shared = _shared, shared
     try:
-        while True:
-            time.sleep(1)
-    except KeyboardInterrupt:
-        observer.stop()
-    observer.join()
-
-
-class ChangeHandler(FileSystemEventHandler):
-    def __init__(self, run_callback: Callable, path_filter: tuple[str, ...] = ()):
-        super().__init__()
-        self.run_callback = run_callback
-        self.path_filter = path_filter
-
-    def on_any_event(self, event):
-        if isinstance(event.src_path, bytes):
-            src_path = event.src_path.decode()
-        else:
-            src_path = str(event.src_path)
-        rel_path = os.path.relpath(src_path, os.getcwd())
+        with ProcessPoolExecutor(
+            max_workers=jobs,
+            mp_context=multiprocessing.get_context("fork"),
+        ) as pool:
+            yield from pool.map(partial(_call_shared, func), items, chunksize=chunksize)
+    finally:
+        _shared = outer_shared
 
-        if not rel_path.startswith(self.path_filter):
-            return
 
-        # Check for file changes in current dir or non-hidden subfolders
-        if rel_path.endswith((".py", ".jx", ".md")) and not any(
-            part.startswith(".") for part in rel_path.split(os.sep)
-        ):
-            print(f"File changed ({event.event_type}):", rel_path)
-            self.run_callback()
-            print("Watching for changes. Press Ctrl+C to exit.")
+def _call_shared(func: Callable[[t.Any, t.Any], t.Any], item: t.Any) -> t.Any:
+    return func(_shared, item)
 
 
 RANDOM_MESSAGES = [
@@ -179,6 +166,134 @@ RANDOM_MESSAGES = [
 ]
 
 
+SYNC_MODES = ("copy", "hardlink", "reflink")
+# The `ioctl` request to clone a file in Linux (Btrfs, XFS, etc.)
+FICLONE = 0x40049409
+
+
+def sync_folder(
+    src: Path,
+    dest: Path,
+    *,
+    mode: str = "copy",
+    keep: Callable[[str], bool] | None = None,
+) -> tuple[list[str], list[str]]:
+    """Make the `dest` folder an exact copy of the `src` folder, touching
+    only the files that changed since the last sync.
+
+    A file is considered unchanged if it has the same size and modification
+    time as before, or, if only the time is different, the same content.
+    Files and folders in `dest` that are no longer in `src` are removed.
+
+    Arguments:
+        src:
+            The source folder.
+        dest:
+            The destination folder. Created if it doesn't exist.
+        mode:
+            How to copy the files: "copy", "hardlink" (no extra disk space
+            used, but editing a file in `dest` also changes the original),
+            or "reflink" (a copy-on-write clone, on the filesystems that
+            support it). If linking a file fails, for example, because
+            `src` and `dest` are on different devices, it is copied instead.
+        keep:
+            If set, called with the path, relative to `dest`, of each file
+            that is not in `src`. The file is not removed if it returns true.
+
+    Returns:
+        The paths, relative to `dest`, of the copied and of the removed files.
+
+    """
+    if mode not in SYNC_MODES:
+        raise ValueError(f"Invalid sync mode: {mode!r}")
+    if dest.is_symlink():
+        # Left by a development build
+        dest.unlink()
+
+    src_files: dict[str, Path] = {}
+    src_dirs: set[str] = set()
+    for dirpath, dirnames, filenames in os.walk(src, followlinks=True):
+        reldir = Path(dirpath).relative_to(src)
+        src_dirs.update((reldir / name).as_posix() for name in dirnames)
+        for name in filenames:
+            src_files[(reldir / name).as_posix()] = Path(dirpath) / name
+
+    copied = []
+    for relpath, src_path in src_files.items():
+        dest_path = dest / relpath
+        if _is_synced(src_path, dest_path, mode):
+            continue
+        if dest_path.is_dir() and not dest_path.is_symlink():
+            shutil.rmtree(dest_path)
+        else:
+            # Never write through a hard link made by a previous sync
+            dest_path.unlink(missing_ok=True)
+        dest_path.parent.mkdir(parents=True, exist_ok=True)
+        _sync_file(src_path, dest_path, mode)
+        copied.append(relpath)
+
+    removed = []
+    for dirpath, dirnames, filenames in os.walk(dest, topdown=False):
+        reldir = Path(dirpath).relative_to(dest)
+        for name in filenames:
+            relpath = (reldir / name).as_posix()
+            if relpath not in src_files and not (keep and keep(relpath)):
+                (dest / relpath).unlink()
+                removed.append(relpath)
+        for name in dirnames:
+            relpath = (reldir / name).as_posix()
+            path = dest / relpath
+            if path.is_symlink():
+                path.unlink()
+                removed.append(relpath)
+            elif relpath not in src_dirs and not any(path.iterdir()):
+                path.rmdir()
+
+    return copied, removed
+
+
+def _is_synced(src_path: Path, dest_path: Path, mode: str) -> bool:
+    try:
+        src_stat = src_path.stat()
+        dest_stat = dest_path.lstat()
+    except OSError:
+        return False
+    if os.path.samestat(src_stat, dest_stat):
+        # A hard link is only fine if it was asked for
+        return mode == "hardlink"
+    if mode == "hardlink" or not dest_path.is_file() or dest_path.is_symlink():
+        return False
+    if src_stat.st_size != dest_stat.st_size:
+        return False
+    if src_stat.st_mtime_ns == dest_stat.st_mtime_ns:
+        return True
+    # For example, after a fresh checkout of the repository
+    if filecmp.cmp(src_path, dest_path, shallow=False):
+        shutil.copystat(src_path, dest_path)
+        return True
+    return False
+
+
+def _sync_file(src_path: Path, dest_path: Path, mode: str) -> None:
+    if mode == "hardlink":
+        try:
+            os.link(src_path, dest_path)
+            return
+        except OSError:
+            pass
+    elif mode == "reflink":
+        try:
+            import fcntl
+
+            with open(src_path, "rb") as fsrc, open(dest_path, "wb") as fdest:
+                fcntl.ioctl(fdest.fileno(), FICLONE, fsrc.fileno())
+            shutil.copystat(src_path, dest_path)
+            return
+        except (ImportError, OSError):
+            dest_path.unlink(missing_ok=True)
+    shutil.copy2(src_path, dest_path)
+
+
 def get_random_messages(num: int = 3) -> list[str]:
     return random.sample(RANDOM_MESSAGES, min(num, len(RANDOM_MESSAGES)))
 
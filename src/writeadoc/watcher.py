@@ -0,0 +1,178 @@
+"""
+Watching of the source files for changes, for the development server.
+
+This module is only imported by `Docs.cli_run()`, so builds don't pay
+for importing `watchdog`.
+"""
+import os
+import threading
+import time
+from collections.abc import Callable, Iterable
+
+from watchdog.events import (
+    FileCreatedEvent,
+    FileDeletedEvent,
+    FileModifiedEvent,
+    FileMovedEvent,
+    FileSystemEventHandler,
+)
+from watchdog.observers import Observer
+
+from .exceptions import BuildCancelled
+from .utils import logger
+
+
+def start_observer(
+    path,
+    run_callback: Callable,
+    *,
+    path_filter: tuple[str, ...] = ("content", "views", "assets"),
+    delay: float = 0.3,
+) -> None:
+    """Start a file system observer to watch for changes.
+
+    Bursts of changes are collapsed into a single call to `run_callback`,
+    made once no new changes arrived for `delay` seconds.
+    """
+    scheduler = ChangeScheduler(run_callback, delay=delay)
+    event_handler = ChangeHandler(scheduler.add, path_filter, root=path)
+    observer = Observer()
+    # Watch directory and all subfolders
+    observer.schedule(
+        event_handler,
+        path,
+        recursive=True,
+        event_filter=[
+            FileDeletedEvent,
+            FileModifiedEvent,
+            FileCreatedEvent,
+            FileMovedEvent,
+        ],
+    )
+    observer.start()
+    print("Watching for changes. Press Ctrl+C to exit.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        observer.stop()
+    observer.join()
+    scheduler.stop()
+
+
+class ChangeScheduler:
+    """Collect the changed paths and call `run_callback(paths, cancel=event)`,
+    from a background thread, after `delay` seconds without new changes.
+
+    If new changes arrive while the callback is running, the `cancel` event
+    is set. If the callback stops by raising `BuildCancelled`, its paths are
+    merged with the new ones for the next call.
+
+    Call `stop()` to cancel the running callback, if any, and end the
+    background thread.
+    """
+
+    def __init__(self, run_callback: Callable, *, delay: float = 0.3):
+        self.run_callback = run_callback
+        self.delay = delay
+        self.cancel = threading.Event()
+        self._stopped = threading.Event()
+        self._changed: set[str] = set()
+        self._last_change = 0.0
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def add(self, paths: Iterable[str]) -> None:
+        with self._condition:
+            self._changed.update(paths)
+            self._last_change = time.monotonic()
+            # Supersede the running build, if any
+            self.cancel.set()
+            self._condition.notify()
+
+    def stop(self, timeout: float | None = None) -> None:
+        """Stop waiting for changes, cancel the running callback, and wait
+        for the background thread to end."""
+        with self._condition:
+            self._stopped.set()
+            self.cancel.set()
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _wait(self) -> set[str] | None:
+        """Return the changed paths once no new changes arrived for `delay`
+        seconds, or `None` if stopped."""
+        with self._condition:
+            while not self._changed and not self._stopped.is_set():
+                self._condition.wait()
+            while (
+                not self._stopped.is_set()
+                and (remaining := self._last_change + self.delay - time.monotonic()) > 0
+            ):
+                self._condition.wait(remaining)
+            if self._stopped.is_set():
+                return None
+            changed, self._changed = self._changed, set()
+            self.cancel.clear()
+            return changed
+
+    def _run(self) -> None:
+        while (changed := self._wait()) is not None:
+            try:
+                self.run_callback(sorted(changed), cancel=self.cancel)
+            except BuildCancelled:
+                with self._condition:
+                    self._changed.update(changed)
+                continue
+            except Exception as err:
+                logger.exception(err)
+            if not self._changed and not self._stopped.is_set():
+                print("Watching for changes. Press Ctrl+C to exit.")
+
+
+class ChangeHandler(FileSystemEventHandler):
+    """Call `run_callback` with the source files, of the folders in
+    `path_filter`, that changed. Any file of the assets folder is a
+    source file."""
+
+    def __init__(
+        self,
+        run_callback: Callable,
+        path_filter: tuple[str, ...] = (),
+        *,
+        root: str | os.PathLike | None = None,
+    ):
+        super().__init__()
+        self.run_callback = run_callback
+        self.path_filter = path_filter
+        self.root = os.fspath(root) if root is not None else os.getcwd()
+
+    def on_any_event(self, event):
+        src_paths = [event.src_path]
+        if getattr(event, "dest_path", None):
+            src_paths.append(event.dest_path)
+
+        changed = []
+        for src_path in src_paths:
+            if isinstance(src_path, bytes):
+                src_path = src_path.decode()
+            else:
+                src_path = str(src_path)
+            rel_path = os.path.relpath(src_path, self.root)
+
+            if not rel_path.startswith(self.path_filter):
+                continue
+
+            # Check for file changes in current dir or non-hidden subfolders
+            is_source = rel_path.endswith((".py", ".jx", ".md")) or rel_path.startswith(
+                f"assets{os.sep}"
+            )
+            if is_source and not any(
+                part.startswith(".") for part in rel_path.split(os.sep)
+            ):
+                print(f"File changed ({event.event_type}):", rel_path)
+                changed.append(src_path)
+
+        if changed:
+            self.run_callback(changed)
@@ -1,5 +1,7 @@
 import pytest
 
+from writeadoc.main import Docs
+
 
 @pytest.fixture
 def tmp_root(tmp_path):
@@ -11,3 +13,29 @@ def tmp_root(tmp_path):
 {{ page.content or content }}
 """)
     return tmp_path
+
+
+@pytest.fixture
+def cache_dir(tmp_path_factory):
+    """A cache folder outside of the `tmp_root` project, so the builds
+    don't write into it."""
+    return tmp_path_factory.mktemp("cache") / ".writeadoc-cache"
+
+
+@pytest.fixture
+def make_docs(tmp_root, cache_dir):
+    """Return a function that makes a `Docs` of the `tmp_root` project,
+    without a home page, and with its cache in `cache_dir`.
+
+    A test module can override this fixture to write its files first, and
+    to set its default pages with `functools.partial`.
+    """
+
+    def make_docs(pages, build_dir="", **kwargs):
+        kwargs.setdefault("cache_dir", cache_dir)
+        docs = Docs(str(tmp_root), pages=list(pages), skip_home=True, **kwargs)
+        if build_dir:
+            docs.build_dir = tmp_root / build_dir
+        return docs
+
+    return make_docs
@@ -0,0 +1,72 @@
+from writeadoc import PageData
+from writeadoc.md import render_markdown
+from writeadoc.search import build_search_data
+
+
+SOURCE = """
+Intro with a `code & span`
+and a soft break.
+
+## Install { #install }
+
+::: tab | Using **uv**
+```bash
+uv add writeadoc
+```
+:::
+
+::: note | Heads up
+Some <b>bold</b> text.
+:::
+
+- one
+- two
+
+| Name | Value |
+| ---- | ----- |
+| a    | 1     |
+"""
+
+
+def test_search_fragments():
+    _, state = render_markdown(SOURCE, search=True)
+    assert state["search_fragments"] == [
+        ("", "", "Intro with a code &amp; span and a soft break."),
+        ("install", "Install", "Using uv"),
+        ("install", "Install", "<pre>uv add writeadoc\n</pre>"),
+        ("install", "Install", "Heads up"),
+        ("install", "Install", "Some bold text. one two"),
+        ("install", "Install", "Name Value a 1"),
+    ]
+
+
+def test_search_fragments_are_optional():
+    _, state = render_markdown(SOURCE)
+    assert "search_fragments" not in state
+
+
+def test_build_search_data():
+    page = PageData(
+        url="/docs/page/",
+        section_title="Section",
+        meta={"id": "page", "title": "Page"},
+    )
+    fragments = [
+        ("", "", "Page"),
+        ("", "", "Intro"),
+        ("install", "Install", "Text"),
+    ]
+    assert build_search_data(page, fragments) == {
+        "/docs/page/1": {
+            "title": "Page",
+            "content": "Intro",
+            "section": "Section",
+            "url": "/docs/page/",
+        },
+        "/docs/page/#install2": {
+            "title": "Install",
+            "content": "Text",
+            "section": "Section",
+            "url": "/docs/page/#install",
+        },
+    }
@@ -1,6 +1,6 @@
 import pytest
 
-from writeadoc.md import render_markdown
+from writeadoc.md import highlight, render_markdown
 
 
 TEST_CASES = [
@@ -164,3 +164,23 @@ def test_render_highlight(source, expected):
     result = render_markdown(source)[0]
     print(result)
     assert result == expected
+
+
+def test_repeated_code_blocks_are_highlighted_once():
+    highlight.clear_cache()
+    source = '```python {linenums="1"}\nimport foo\n```'
+
+    first = render_markdown(source)[0]
+    second = render_markdown(f"Other page\n\n{source}")[0]
+
+    assert second.endswith(first)
+    info = highlight.highlight_block.cache_info()
+    assert (info.hits, info.misses) == (1, 1)
+
+
+def test_lexers_and_formatters_are_reused():
+    assert highlight.get_lexer("python") is highlight.get_lexer("python")
+    assert highlight.get_formatter(linenos="inline", hl_lines=[1, 2]) is (
+        highlight.get_formatter(hl_lines=[1, 2], linenos="inline")
+    )
+    assert highlight.get_formatter(hl_lines=[1]) is not highlight.get_formatter(hl_lines=[2])
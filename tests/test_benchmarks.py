@@ -0,0 +1,41 @@
+import json
+
+import bench_build
+import sitegen
+
+
+def test_generate_site(tmp_path):
+    spec = sitegen.SiteSpec(pages=4, pages_per_folder=3, autodoc=1, variants=1)
+    sitegen.generate(tmp_path / "project", spec)
+
+    content = tmp_path / "project" / "content"
+    assert len(list(content.glob("folder-*/*.md"))) == 4
+    assert len(list(content.glob("v1/folder-*/*.md"))) == 4
+    page = (content / "folder-0" / "page-0.md").read_text()
+    assert "::: api " in page
+    assert "::: tab | python" in page
+    assert "|---|---|---|" in page
+
+    docs = sitegen.make_docs(tmp_path / "project", spec)
+    assert list(docs.variants) == ["v1"]
+
+
+def test_run_and_compare(tmp_path, capsys):
+    output = tmp_path / "results.json"
+    code = bench_build.main([
+        "--pages", "3", "--sections", "2", "--repeat", "1", "--output", str(output),
+    ])
+    assert code == 0
+
+    results = json.loads(output.read_text())
+    assert results["spec"]["pages"] == 3
+    assert set(results["results"]) == set(
+        bench_build.Benchmarks(tmp_path, sitegen.SiteSpec()).get_benchmarks()
+    )
+
+    slower = json.loads(output.read_text())
+    for result in slower["results"].values():
+        result["median"] *= 2
+    capsys.readouterr()
+    assert not bench_build.compare(results, slower)
+    assert "SLOWER" in capsys.readouterr().out
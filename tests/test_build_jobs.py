@@ -0,0 +1,124 @@
+import functools
+import importlib.util
+import os
+import threading
+
+import pytest
+
+from writeadoc import utils
+
+
+PAGES = [
+    "intro.md",
+    {
+        "title": "Guide",
+        "path": "guide/index.md",
+        "pages": [
+            "guide/one.md",
+            "guide/two.md",
+            "guide/three.md",
+        ],
+    },
+    "api.md",
+]
+
+
+@pytest.fixture
+def make_docs(make_docs, tmp_root):
+    (tmp_root / "views" / "page.jx").write_text("""
+<h1>{{ page.title }}</h1>
+<nav>{% for p in site.pages %}<a href="{{ p.url }}">{{ p.title }}</a>{% endfor %}</nav>
+{% if page.prev %}<a rel="prev" href="{{ page.prev.url }}">{{ page.prev.title }}</a>{% endif %}
+{% if page.next %}<a rel="next" href="{{ page.next.url }}">{{ page.next.title }}</a>{% endif %}
+{{ page.content }}
+""")
+    (tmp_root / "views" / "search.jx").write_text(
+        "{# def store_url='', index_url='' #}{{ store_url }}"
+    )
+    (tmp_root / "content" / "guide").mkdir()
+    for name in ("intro", "guide/index", "guide/one", "guide/two", "guide/three", "api"):
+        (tmp_root / "content" / f"{name}.md").write_text(f"""
+---
+title: Page {name}
+---
+## Hello {name}
+
+Some *text* in {name}.
+
+```python
+print("{name}")
+```
+""".strip())
+
+    return functools.partial(make_docs, pages=PAGES)
+
+
+def read_build(build_dir):
+    return {
+        str(path.relative_to(build_dir)): path.read_text()
+        for path in sorted(build_dir.rglob("*"))
+        if path.is_file()
+    }
+
+
+def test_parallel_build_is_identical(make_docs):
+    serial = make_docs(build_dir="build-serial")
+    serial.build(boring=True, jobs=1)
+
+    parallel = make_docs(build_dir="build-parallel")
+    parallel.build(boring=True, jobs=3)
+
+    expected = read_build(serial.build_dir)
+    # The prebuilt search index is only written if `lunr` is installed
+    assert len(expected) == (11 if importlib.util.find_spec("lunr") else 10)
+    assert read_build(parallel.build_dir) == expected
+    assert [p.url for p in parallel.site.pages] == [p.url for p in serial.site.pages]
+    assert [p.search_data for p in parallel.site.pages] == [
+        p.search_data for p in serial.site.pages
+    ]
+
+
+@pytest.mark.parametrize("cpus", [1, 4])
+def test_variants_build(make_docs, tmp_root, monkeypatch, cpus):
+    # With more than one CPU, each variant is built in its own process
+    monkeypatch.setattr("writeadoc.main.os.cpu_count", lambda: cpus)
+    (tmp_root / "content" / "es" / "guide").mkdir(parents=True)
+    for path in (tmp_root / "content").glob("**/*.md"):
+        if not path.is_relative_to(tmp_root / "content" / "es"):
+            dest = tmp_root / "content" / "es" / path.relative_to(tmp_root / "content")
+            dest.write_text(path.read_text().replace("Hello", "Hola"))
+
+    docs = make_docs(variants={"es": make_docs()})
+    docs.build(devmode=False, boring=True, jobs=4)
+
+    # The state of the variant is sent back to the main process
+    variant = docs.variants["es"]
+    assert [p.url for p in variant.site.pages] == [
+        f"/es{p.url}" for p in docs.site.pages
+    ]
+    assert "Hola" in variant.site.pages[0].content
+
+    built = read_build(docs.build_dir)
+    assert "Hola intro" in built["es/docs/intro/index.html"]
+    assert "Hello intro" in built["docs/intro/index.html"]
+    assert docs.outputs is not None
+    assert "es/docs/intro/index.html" in docs.outputs
+    assert "docs/intro/index.html" in docs.outputs
+
+
+def get_pid(shared, item):
+    return os.getpid()
+
+
+def test_no_workers_if_other_threads_are_running():
+    # Forking a process with other threads running could deadlock it
+    stop = threading.Event()
+    thread = threading.Thread(target=stop.wait)
+    thread.start()
+    try:
+        pids = list(utils.parallel_map(get_pid, range(4), jobs=4))
+    finally:
+        stop.set()
+        thread.join()
+
+    assert set(pids) == {os.getpid()}
@@ -0,0 +1,86 @@
+import functools
+import json
+
+import pytest
+
+
+@pytest.fixture
+def make_docs(make_docs, tmp_root):
+    (tmp_root / "views" / "search.jx").write_text(
+        "{# def store_url='', index_url='' #}{{ store_url }}"
+    )
+    (tmp_root / "assets" / "main.css").write_text("body {}")
+    for name in ("one", "two", "three"):
+        (tmp_root / "content" / f"{name}.md").write_text(
+            f"---\ntitle: Page {name}\n---\nHello {name}"
+        )
+
+    return functools.partial(make_docs, pages=("one.md", "two.md", "three.md"))
+
+
+def get_mtimes(build_dir):
+    return {
+        path.relative_to(build_dir).as_posix(): path.stat().st_mtime_ns
+        for path in build_dir.rglob("*")
+        if path.is_file()
+    }
+
+
+def test_first_build_adds_everything(make_docs, tmp_root):
+    changes_path = tmp_root / "changes.json"
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True, changes=changes_path)
+
+    changes = json.loads(changes_path.read_text())
+    assert changes["changed"] == []
+    assert changes["removed"] == []
+    assert "docs/two/index.html" in changes["added"]
+    assert "search/store.json" in changes["added"]
+    assert "assets/main.css" in changes["added"]
+
+
+def test_unchanged_files_are_not_written(make_docs, tmp_root):
+    make_docs().cli_build(archive=False, boring=True)
+    build_dir = tmp_root / "build"
+    mtimes = get_mtimes(build_dir)
+
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True)
+
+    assert docs.changes == {"added": [], "changed": [], "removed": []}
+    assert get_mtimes(build_dir) == mtimes
+
+
+def test_only_the_delta_is_reported(make_docs, tmp_root):
+    make_docs().cli_build(archive=False, boring=True)
+    build_dir = tmp_root / "build"
+    mtimes = get_mtimes(build_dir)
+
+    (tmp_root / "content" / "two.md").write_text("---\ntitle: Page two\n---\nUpdated")
+    (tmp_root / "assets" / "extra.js").write_text("//")
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True)
+
+    assert docs.changes["added"] == ["assets/extra.js"]
+    assert docs.changes["removed"] == []
+    # The prebuilt search index also changes, if lunr is installed
+    changed = set(docs.changes["changed"]) - {"search/index.json"}
+    assert changed == {"assets-manifest.json", "docs/two/index.html", "search/store.json"}
+    new_mtimes = get_mtimes(build_dir)
+    assert new_mtimes["docs/one/index.html"] == mtimes["docs/one/index.html"]
+    assert new_mtimes["docs/two/index.html"] != mtimes["docs/two/index.html"]
+
+
+def test_stale_files_are_removed(make_docs, tmp_root):
+    make_docs().cli_build(archive=False, boring=True)
+    build_dir = tmp_root / "build"
+    (build_dir / "robots.txt").write_text("Not written by the build")
+
+    docs = make_docs(pages=("one.md", "two.md"))
+    docs.cli_build(archive=False, boring=True)
+
+    assert docs.changes["removed"] == ["docs/three/index.html"]
+    assert not (build_dir / "docs" / "three").exists()
+    assert (build_dir / "docs" / "two" / "index.html").exists()
+    # Unknown files are left alone
+    assert (build_dir / "robots.txt").exists()
@@ -0,0 +1,92 @@
+import os
+
+from writeadoc.cache import RenderCache
+from writeadoc.main import Docs
+
+
+def test_get_and_set(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    key = cache.key("markdown", "Hello *world*", {"title": "Hello"})
+
+    assert cache.get(key) is None
+    cache.set(key, {"html": "<p>Hello <em>world</em></p>", "toc_items": []})
+    assert cache.get(key) == {"html": "<p>Hello <em>world</em></p>", "toc_items": []}
+
+
+def test_key_depends_on_all_parts(tmp_path):
+    cache = RenderCache(tmp_path / "cache")
+    key = cache.key("markdown", "Hello", {"title": "Hello"})
+
+    assert key == cache.key("markdown", "Hello", {"title": "Hello"})
+    assert key != cache.key("markdown", "Hello!", {"title": "Hello"})
+    assert key != cache.key("markdown", "Hello", {"title": "Hi"})
+
+
+def test_prune_removes_least_recently_used(tmp_path):
+    cache = RenderCache(tmp_path / "cache", max_size=250)
+    keys = [cache.key(i) for i in range(3)]
+    for i, key in enumerate(keys):
+        cache.set(key, "x" * 100)
+        path = cache._path(key)
+        os.utime(path, (1000 + i, 1000 + i))
+
+    cache.get(keys[0])  # Now the most recently used
+    cache.prune()
+
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[2]) is not None
+
+
+def test_build_uses_the_cache(tmp_root, mocker, cache_dir):
+    (tmp_root / "content" / "test.md").write_text("""
+---
+title: Test Page
+---
+## Hello
+
+```python
+print("hello")
+```
+""".strip())
+
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
+    docs.build(boring=True)
+    outpath = tmp_root / "build" / "docs" / "test" / "index.html"
+    expected = outpath.read_text()
+    outpath.unlink()
+
+    spy = mocker.patch("writeadoc.pages.render_markdown")
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
+    docs.build(boring=True)
+
+    spy.assert_not_called()
+    assert outpath.read_text() == expected
+    assert docs.site.pages[0].toc == [(2, "hello", "Hello")]
+
+
+def test_build_without_cache(tmp_root, cache_dir):
+    (tmp_root / "content" / "test.md").write_text("Hello")
+
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
+    docs.cache = None
+    docs.build(boring=True)
+
+    assert not cache_dir.exists()
+
+
+def test_cache_dir(tmp_root):
+    (tmp_root / "content" / "test.md").write_text("Hello")
+
+    docs = Docs(tmp_root, pages=["test.md"])
+    assert docs.cache_dir == tmp_root / ".writeadoc-cache"
+
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir="cache")
+    docs.build(boring=True)
+    assert (tmp_root / "cache" / "render").exists()
+
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=None)
+    assert docs.cache is None
+    docs.cli_build(archive=False, boring=True)
+    assert not (tmp_root / ".writeadoc-cache").exists()
+    assert (tmp_root / "build" / "docs" / "test" / "index.html").exists()
@@ -6,7 +6,7 @@ from writeadoc.main import Docs
 
 
 @pytest.fixture
-def docs(tmp_root):
+def docs(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<h2>{{ content }}</h2>")
 
@@ -26,8 +26,10 @@ imports:
 """.strip()
     )
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
+    # Validated before the build, so its messages are not counted
+    docs.check_catalog()
     return docs
 
 
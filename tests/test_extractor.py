@@ -103,3 +103,45 @@ def test_extractor_nested_tags():
     assert "drop me" not in joined
     assert "viewBox" not in joined
     assert "Trailing text kept." in joined
+
+
+def test_extractor_skips_nested_removed_tags():
+    html = """
+<h2 id='nested'>Nested <img src="x.png" alt="a > b"/></h2>
+<!-- <p>commented out</p> -->
+<div><nav><nav>Inner</nav>Outer</nav></div>
+<p>Before<br/>after &amp; <span title="1 > 0">done</span>.</p>
+"""
+    page = PageData(
+        content=html,
+        url="/docs/nested/",
+        section_title="Nested",
+        meta={"id": "nested", "title": "Nested"},
+    )
+    result = extract_search_data(page)
+
+    assert result == {
+        "/docs/nested/#nested1": {
+            "title": "Nested",
+            "content": "Beforeafter &amp; done.",
+            "section": "Nested",
+            "url": "/docs/nested/#nested",
+        },
+    }
+
+
+def test_extractor_quotes_in_skipped_tags():
+    html = """
+<h2 id="quotes">Quotes</h2>
+<script>var s = '<p title="';</script><p>Text "</p>
+<style>a::after { content: '<p class="'; }</style><p>More "</p>
+"""
+    page = PageData(
+        content=html,
+        url="/docs/quotes/",
+        section_title="Quotes",
+        meta={"id": "quotes", "title": "Quotes"},
+    )
+    result = extract_search_data(page)
+
+    assert [frag["content"] for frag in result.values()] == ['Text "', 'More "']
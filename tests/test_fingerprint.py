@@ -0,0 +1,50 @@
+import functools
+import hashlib
+import json
+import os
+
+import pytest
+
+
+@pytest.fixture
+def make_docs(make_docs, tmp_root):
+    (tmp_root / "assets" / "css").mkdir(exist_ok=True)
+    (tmp_root / "assets" / "css" / "style.css").write_text("body { color: red; }")
+    (tmp_root / "views" / "page.jx").write_text("""
+<link rel="stylesheet" href="/assets/css/style.css">
+<img src='/assets/missing.png'>
+<h1>{{ page.title }}</h1>
+""")
+    (tmp_root / "content" / "test.md").write_text("---\ntitle: Test\n---\nHello")
+    return functools.partial(make_docs, pages=["test.md"])
+
+
+def test_fingerprint_is_the_content_hash(make_docs):
+    docs = make_docs()
+    docs.build(devmode=False, boring=True)
+
+    fingerprint = hashlib.sha256(b"body { color: red; }").hexdigest()[:12]
+    html = (docs.build_dir / "docs" / "test" / "index.html").read_text()
+    assert f'href="/assets/css/style.css?v={fingerprint}"' in html
+    assert "src='/assets/missing.png'" in html
+
+    manifest = json.loads((docs.build_dir / "assets-manifest.json").read_text())
+    assert manifest == {"css/style.css": f"css/style.css?v={fingerprint}"}
+
+
+def test_fingerprint_ignores_the_modification_time(make_docs, tmp_root):
+    docs = make_docs()
+    docs.build(devmode=False, boring=True)
+    before = (docs.build_dir / "docs" / "test" / "index.html").read_text()
+
+    os.utime(tmp_root / "assets" / "css" / "style.css", (0, 0))
+    docs.build(devmode=False, boring=True)
+    assert (docs.build_dir / "docs" / "test" / "index.html").read_text() == before
+
+
+def test_fingerprint_prefixed_build(make_docs):
+    docs = make_docs(prefix="v1")
+    docs.build(devmode=False, boring=True)
+
+    html = (docs.build_dir / "v1" / "docs" / "test" / "index.html").read_text()
+    assert 'href="/v1/assets/css/style.css?v=' in html
@@ -0,0 +1,93 @@
+import pytest
+
+from writeadoc.main import Docs
+
+
+@pytest.fixture
+def docs(tmp_root, cache_dir):
+    (tmp_root / "views" / "page.jx").write_text("""
+<nav>{% for p in site.pages %}{{ p.title }};{% endfor %}</nav>
+<h1>{{ page.title }}</h1>
+{{ page.content }}
+""")
+    (tmp_root / "views" / "search.jx").write_text(
+        "{# def store_url, index_url='' #}<search>{{ store_url }}</search>"
+    )
+    for name in ("one", "two", "three"):
+        (tmp_root / "content" / f"{name}.md").write_text(
+            f"---\ntitle: Page {name}\n---\n## Hello {name}\n\nSome text"
+        )
+    docs = Docs(
+        tmp_root,
+        pages=["one.md", "two.md", "three.md"],
+        skip_home=True,
+        cache_dir=cache_dir,
+    )
+    docs.memory_files = {}
+    docs.lazy = True
+    docs.build(boring=True)
+    return docs
+
+
+def test_lazy_build_only_reads_the_metadata(docs):
+    assert [page.title for page in docs.site.pages] == ["Page one", "Page two", "Page three"]
+    assert all(not page.content for page in docs.site.pages)
+    assert "docs/one/index.html" not in docs.memory_files
+    assert "search/index.html" not in docs.memory_files
+    # The redirect page only needs the URLs
+    assert "docs/index.html" in docs.memory_files
+
+
+def test_render_on_demand(docs, mocker):
+    spy = mocker.spy(docs, "_render_page_html")
+
+    html = docs.render_on_demand("docs/two/index.html")
+    assert html is not None
+    assert "Page one;Page two;Page three;" in html.decode()
+    assert '<h2 id="hello-two">Hello two</h2>' in html.decode()
+    assert docs.memory_files["docs/two/index.html"] == html
+
+    # Rendered only once
+    assert docs.render_on_demand("docs/two/index.html") == html
+    assert spy.call_count == 1
+    assert docs.render_on_demand("docs/four/index.html") is None
+
+
+def test_render_search_on_demand(docs):
+    assert docs.render_on_demand("search/store.json") is not None
+    assert "Hello three" in docs.memory_files["search/store.json"].decode()
+    assert "search/index.html" in docs.memory_files
+    # All the pages were loaded, but not rendered
+    assert all(page.content for page in docs.site.pages)
+    assert "docs/one/index.html" not in docs.memory_files
+    assert docs.render_on_demand("search/missing.json") is None
+
+
+def test_lazy_rebuild_removes_the_changed_pages(docs, mocker):
+    docs.render_on_demand("docs/one/index.html")
+    docs.render_on_demand("docs/two/index.html")
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: Page two\n---\nUpdated")
+
+    # Only the page that was rendered before is reloaded
+    assert docs.rebuild([path]) == ["/docs/two/"]
+    spy.assert_not_called()
+    assert "docs/two/index.html" not in docs.memory_files
+    assert "docs/one/index.html" in docs.memory_files
+
+    html = docs.render_on_demand("docs/two/index.html")
+    assert html is not None
+    assert "<p>Updated</p>" in html.decode()
+
+
+def test_lazy_rebuild_if_the_navigation_changed(docs):
+    docs.render_on_demand("docs/one/index.html")
+    docs.render_on_demand("search/index.html")
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: New title\n---\nHello two")
+
+    assert docs.rebuild([path]) == ["/docs/one/", "/search/", "/search/store.json"]
+    html = docs.render_on_demand("docs/one/index.html")
+    assert html is not None
+    assert "Page one;New title;Page three;" in html.decode()
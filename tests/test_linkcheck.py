@@ -0,0 +1,158 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from writeadoc.linkcheck import LinkChecker
+from writeadoc.main import Docs
+
+
+class Handler(BaseHTTPRequestHandler):
+    requests: list[tuple[str, str]] = []
+    active = 0
+    max_active = 0
+    lock = threading.Lock()
+
+    def do_HEAD(self):
+        self.respond("HEAD")
+
+    def do_GET(self):
+        self.respond("GET")
+
+    def respond(self, method):
+        cls = type(self)
+        with cls.lock:
+            cls.requests.append((method, self.path))
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        if self.path.startswith("/slow/"):
+            time.sleep(0.05)
+        with cls.lock:
+            cls.active -= 1
+
+        if self.path == "/missing":
+            self.send_response(404)
+        elif self.path == "/busy":
+            self.send_response(429)
+        elif self.path == "/no-head" and method == "HEAD":
+            self.send_response(405)
+        elif self.path == "/old":
+            self.send_response(301)
+            self.send_header("Location", "/ok")
+        elif self.path == "/loop":
+            self.send_response(302)
+            self.send_header("Location", "/loop")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    Handler.requests = []
+    Handler.active = Handler.max_active = 0
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, args=(0.05,), daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_check_urls(server):
+    checker = LinkChecker(timeout=5)
+    results = checker.check([
+        f"{server}/ok",
+        f"{server}/ok#anchor",
+        f"{server}/missing",
+        f"{server}/no-head",
+        f"{server}/old",
+        f"{server}/loop",
+        "http://127.0.0.1:1/closed",
+    ])
+
+    assert {url: result["status"] for url, result in results.items()} == {
+        f"{server}/ok": 200,
+        f"{server}/missing": 404,
+        f"{server}/no-head": 200,
+        f"{server}/old": 200,
+        f"{server}/loop": 0,
+        "http://127.0.0.1:1/closed": 0,
+    }
+    assert results[f"{server}/loop"]["error"] == "too many redirects"
+    assert results["http://127.0.0.1:1/closed"]["error"]
+    # HEAD first, then GET only if it failed
+    assert [r for r in Handler.requests if r[1] == "/no-head"] == [
+        ("HEAD", "/no-head"),
+        ("GET", "/no-head"),
+    ]
+    assert Handler.requests.count(("GET", "/ok")) == 0
+
+
+def test_per_host_limit(server):
+    checker = LinkChecker(per_host=2, timeout=5)
+    results = checker.check(f"{server}/slow/{i}" for i in range(8))
+
+    assert all(result["status"] == 200 for result in results.values())
+    assert Handler.max_active <= 2
+
+
+def test_hosts_do_not_wait_for_each_other(server):
+    # The same server, but a different host for the checker
+    other = server.replace("127.0.0.1", "localhost")
+    checker = LinkChecker(per_host=1, max_connections=2, timeout=5)
+    urls = [f"{server}/slow/{i}" for i in range(6)] + [f"{other}/slow/x"]
+    results = checker.check(urls)
+
+    assert all(result["status"] == 200 for result in results.values())
+    # Checked along with the first URL of the other host, not after all of them
+    assert ("HEAD", "/slow/x") in Handler.requests[:2]
+
+
+def test_cached_results(server, tmp_path):
+    cache_path = tmp_path / "links.json"
+    urls = [f"{server}/ok", f"{server}/missing"]
+    LinkChecker(cache_path).check(urls)
+    Handler.requests.clear()
+
+    results = LinkChecker(cache_path).check(urls)
+
+    # Only the failed URL is checked again
+    assert Handler.requests == [("HEAD", "/missing"), ("GET", "/missing")]
+    assert results[f"{server}/ok"]["status"] == 200
+
+    Handler.requests.clear()
+    LinkChecker(cache_path, ttl=0).check(urls)
+    assert ("HEAD", "/ok") in Handler.requests
+
+
+def test_build_check_external(server, tmp_root, capsys, cache_dir):
+    (tmp_root / "content" / "page.md").write_text(
+        f"---\ntitle: Page\n---\n[Good]({server}/ok)\n\n[Bad]({server}/missing)\n\n"
+        f"[Busy]({server}/busy)\n"
+    )
+    docs = Docs(tmp_root, pages=["page.md"], skip_home=True, cache_dir=cache_dir)
+    docs.cli_build(archive=False, boring=True, check_external=True)
+
+    out = capsys.readouterr().out
+    assert "Checking 3 external links..." in out
+    assert "1 external links could not be checked (rate limited)" in out
+    assert f"page.md:3 - broken external link: {server}/missing (404)" in out
+    assert "/ok" not in out
+    assert "/busy" not in out
+    assert (cache_dir / "links.json").exists()
+
+
+def test_proxy_from_the_environment(server, monkeypatch):
+    monkeypatch.setenv("http_proxy", server)
+    monkeypatch.delenv("no_proxy", raising=False)
+    monkeypatch.delenv("NO_PROXY", raising=False)
+    results = LinkChecker(timeout=5).check(["http://example.invalid/page"])
+
+    assert results["http://example.invalid/page"]["status"] == 200
+    assert Handler.requests == [("HEAD", "http://example.invalid/page")]
@@ -1,7 +1,7 @@
 from writeadoc import Docs
 
 
-def test_render_components(tmp_root):
+def test_render_components(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("""
 <h2 {{ attrs.render() }}>{{ content }}</h2>
@@ -18,7 +18,7 @@ imports:
 <Test class="hi">Hello world</Test>
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
@@ -32,7 +32,7 @@ imports:
     assert result == expected
 
 
-def test_render_markdown_inline(tmp_root):
+def test_render_markdown_inline(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<span {{ attrs.render() }}>{{ content }}</span>")
 
@@ -45,7 +45,7 @@ imports:
 Lorem <Test class="hi">This **is** a test</Test> Ipsum
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
@@ -58,7 +58,7 @@ Lorem <Test class="hi">This **is** a test</Test> Ipsum
     assert result == expected
 
 
-def test_self_closing_components(tmp_root):
+def test_self_closing_components(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<h2 {{ attrs.render() }}>Hello</h2>")
 
@@ -72,7 +72,7 @@ imports:
 <Test class="hi" />
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
@@ -85,7 +85,7 @@ imports:
     assert result == expected
 
 
-def test_tags_inside_code(tmp_root):
+def test_tags_inside_code(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<h2>{{ content }}</h2>")
 
@@ -103,7 +103,7 @@ imports:
 ```
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
@@ -118,7 +118,7 @@ imports:
     assert result == expected
 
 
-def test_gt_in_attribute_value(tmp_root):
+def test_gt_in_attribute_value(tmp_root, cache_dir):
     """Test that > characters inside quoted attribute values are handled correctly."""
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<div {{ attrs.render() }}>{{ content }}</div>")
@@ -134,7 +134,7 @@ imports:
 <Test data-expr='x > y' />
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
@@ -148,7 +148,7 @@ imports:
     assert result == expected
 
 
-def test_ignore_jinja_expr(tmp_root):
+def test_ignore_jinja_expr(tmp_root, cache_dir):
     (tmp_root / "comp").mkdir()
     (tmp_root / "comp" / "test.jx").write_text("<h2>{{ content }}</h2>")
 
@@ -167,7 +167,7 @@ imports:
 \{# or this #}
 """.strip())
 
-    docs = Docs(tmp_root, pages=["test.md"])
+    docs = Docs(tmp_root, pages=["test.md"], cache_dir=cache_dir)
     docs.catalog.add_folder(tmp_root / "comp")
     docs.build()
 
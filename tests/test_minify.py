@@ -0,0 +1,92 @@
+import pytest
+
+from writeadoc.main import Docs
+from writeadoc.minify import minify_html
+
+
+TEST_DATA = [
+    (
+        "<div>\n  <p>Hello</p>\n  <p>World</p>\n</div>\n",
+        "<div><p>Hello</p><p>World</p></div>",
+    ),
+    (
+        "<p>Some   <strong>bold</strong>\n  <em>text</em>\n  and more.</p>",
+        "<p>Some <strong>bold</strong> <em>text</em> and more.</p>",
+    ),
+    (
+        "<p>One</p>\n<!-- A comment -->\n<p>Two <!-- other --> three</p>",
+        "<p>One</p><p>Two three</p>",
+    ),
+    (
+        "<!--[if IE]><p>IE</p><![endif]-->",
+        "<!--[if IE]><p>IE</p><![endif]-->",
+    ),
+    (
+        '<input  type="checkbox"\n  checked="" disabled="disabled" value="a  b" >',
+        '<input type="checkbox" checked disabled value="a  b">',
+    ),
+    (
+        '<details open=""><summary>Hi</summary></details>',
+        "<details open><summary>Hi</summary></details>",
+    ),
+    (
+        '<a title="a > b"  href="#">x</a> <a href="#">y</a>',
+        '<a title="a > b" href="#">x</a> <a href="#">y</a>',
+    ),
+    (
+        '<p>An icon <svg viewBox="0 0 1 1">\n  <path d="M0 0"/>\n</svg> here</p>',
+        '<p>An icon <svg viewBox="0 0 1 1"><path d="M0 0"/></svg> here</p>',
+    ),
+    (
+        "<!DOCTYPE html>\n<html>\n  <head>\n    <title>Hi</title>\n  </head>\n</html>\n",
+        "<!DOCTYPE html><html><head><title>Hi</title></head></html>",
+    ),
+    (
+        """<div title="a open='' b"  hidden="">x</div>""",
+        """<div title="a open='' b" hidden>x</div>""",
+    ),
+    (
+        '<ul class="inline">\n  <li>One</li>\n  <li>Two</li>\n</ul>',
+        '<ul class="inline"><li>One</li> <li>Two</li></ul>',
+    ),
+    ("<p>One<br>\n  two</p>", "<p>One<br> two</p>"),
+    ("<p>1 < 2</p>", "<p>1 < 2</p>"),
+]
+
+RAW_DATA = [
+    '<div class="highlight"><pre><code><span class="k">def</span>   f():\n'
+    "    <!-- not a comment -->\n    pass\n</code></pre></div>",
+    "<textarea>  keep\n  this </textarea>",
+    '<script defer="defer">\n  if (a < b) { x = "  y  " }\n</script>',
+    "<style>\n  p  >  a { color: red }\n</style>",
+]
+
+
+@pytest.mark.parametrize("html, expected", TEST_DATA)
+def test_minify_html(html, expected):
+    assert minify_html(html) == expected
+
+
+@pytest.mark.parametrize("raw", RAW_DATA)
+def test_keep_raw_elements(raw):
+    assert minify_html(f"<div>\n  {raw}\n</div>") == f"<div>{raw}</div>"
+
+
+def test_build_minified(tmp_root, cache_dir):
+    (tmp_root / "views" / "page.jx").write_text("""
+<main>
+  <!-- The content -->
+  <h1>{{ page.title }}</h1>
+  {{ page.content }}
+</main>
+""")
+    (tmp_root / "content" / "one.md").write_text(
+        "---\ntitle: One\n---\nHello\n\n```python\ndef f():\n    pass\n```"
+    )
+    docs = Docs(tmp_root, pages=["one.md"], skip_home=True, cache_dir=cache_dir)
+    docs.cli_build(archive=False, boring=True, minify=True)
+
+    html = (docs.build_dir / "docs" / "one" / "index.html").read_text()
+    assert html.startswith("<main><h1>One</h1><p>Hello</p><div")
+    assert "def</span><span" in html
+    assert "\n    <span" in html
@@ -0,0 +1,82 @@
+import functools
+import gzip
+
+import pytest
+
+from writeadoc import compress
+
+
+@pytest.fixture
+def make_docs(make_docs, tmp_root, monkeypatch):
+    # The same files with or without the `brotli` package installed
+    monkeypatch.setattr(compress, "get_encodings", lambda: ["gzip"])
+    long_text = "Lorem ipsum dolor sit amet. " * 100
+    (tmp_root / "assets" / "main.css").write_text(f"/* {long_text} */")
+    (tmp_root / "assets" / "small.css").write_text("body {}")
+    (tmp_root / "assets" / "logo.png").write_bytes(b"\0" * 2000)
+    (tmp_root / "content" / "one.md").write_text(f"---\ntitle: Page one\n---\n{long_text}")
+    (tmp_root / "content" / "two.md").write_text("---\ntitle: Page two\n---\nHello two")
+
+    return functools.partial(make_docs, pages=("one.md", "two.md"))
+
+
+def test_precompress(make_docs, tmp_root):
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True, precompress=True)
+    build_dir = tmp_root / "build"
+
+    path = build_dir / "docs" / "one" / "index.html"
+    assert gzip.decompress((build_dir / "docs" / "one" / "index.html.gz").read_bytes()) == (
+        path.read_bytes()
+    )
+    assert (build_dir / "assets" / "main.css.gz").exists()
+    # Too small, or not worth compressing
+    assert not (build_dir / "docs" / "two" / "index.html.gz").exists()
+    assert not (build_dir / "assets" / "small.css.gz").exists()
+    assert not (build_dir / "assets" / "logo.png.gz").exists()
+    assert "docs/one/index.html.gz" in docs.changes["added"]
+    assert "assets/main.css.gz" in docs.changes["added"]
+
+
+def test_unchanged_files_are_not_compressed_again(make_docs, tmp_root, mocker):
+    make_docs().cli_build(archive=False, boring=True, precompress=True)
+    spy = mocker.spy(compress, "compress_file")
+
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True, precompress=True)
+
+    spy.assert_not_called()
+    assert docs.changes == {"added": [], "changed": [], "removed": []}
+    assert (tmp_root / "build" / "assets" / "main.css.gz").exists()
+
+    (tmp_root / "content" / "one.md").write_text(
+        "---\ntitle: Page one\n---\n" + "Updated text. " * 100
+    )
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True, precompress=True)
+
+    assert [call.args[0].name for call in spy.call_args_list] == ["index.html"]
+    assert "docs/one/index.html.gz" in docs.changes["changed"]
+
+
+def test_compressed_files_are_removed(make_docs, tmp_root):
+    make_docs().cli_build(archive=False, boring=True, precompress=True)
+    build_dir = tmp_root / "build"
+
+    docs = make_docs(pages=("two.md",))
+    docs.cli_build(archive=False, boring=True, precompress=True)
+    assert "docs/one/index.html.gz" in docs.changes["removed"]
+    assert not (build_dir / "docs" / "one").exists()
+
+    # Without precompressing
+    docs = make_docs()
+    docs.cli_build(archive=False, boring=True)
+    assert docs.changes["removed"] == ["assets/main.css.gz"]
+    assert not (build_dir / "assets" / "main.css.gz").exists()
+
+
+def test_is_compressed():
+    assert compress.is_compressed("assets/main.css.gz")
+    assert compress.is_compressed("docs/index.html.br")
+    assert not compress.is_compressed("assets/archive.tar.gz")
+    assert not compress.is_compressed("assets/main.css")
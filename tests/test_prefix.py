@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import pytest
+
+from writeadoc.main import Docs
+
+
+@pytest.fixture
+def docs(tmp_root, cache_dir):
+    (tmp_root / "assets" / "style.css").write_text("body {}")
+    (tmp_root / "views" / "page.jx").write_text(
+        '<link href="/assets/style.css"><form action="/search/"></form>{{ page.content }}'
+    )
+    (tmp_root / "views" / "not_found.html.jx").write_text('<a href="/docs/one/">Home</a>')
+    (tmp_root / "content" / "es").mkdir()
+    for folder in ("", "es/"):
+        (tmp_root / "content" / f"{folder}one.md").write_text(
+            "---\ntitle: One\n---\n[Two](/docs/two/)"
+        )
+        (tmp_root / "content" / f"{folder}two.md").write_text("---\ntitle: Two\n---\nHi")
+
+    variant = Docs(
+        tmp_root,
+        pages=["one.md", "two.md"],
+        skip_home=True,
+        cache_dir=cache_dir,
+    )
+    return Docs(
+        tmp_root,
+        pages=["one.md", "two.md"],
+        skip_home=True,
+        prefix="v1",
+        variants={"es": variant},
+        cache_dir=cache_dir,
+    )
+
+
+def test_prefixed_urls(docs):
+    docs.build(boring=True)
+    build_dir = docs.build_dir / "v1"
+
+    html = (build_dir / "docs" / "one" / "index.html").read_text()
+    assert '<link href="/v1/assets/style.css">' in html
+    assert '<form action="/v1/search/">' in html
+    assert '<a href="/v1/docs/two/">Two</a>' in html
+
+    # The variants use the assets of the main documentation
+    html = (build_dir / "es" / "docs" / "one" / "index.html").read_text()
+    assert '<link href="/v1/assets/style.css">' in html
+    assert '<form action="/v1/es/search/">' in html
+    assert '<a href="/v1/es/docs/two/">Two</a>' in html
+
+    assert (build_dir / "not_found.html").read_text() == '<a href="/v1/docs/one/">Home</a>'
+
+
+def test_output_is_not_read_back(docs, mocker):
+    spy = mocker.spy(Path, "read_text")
+    docs.build(boring=True)
+
+    read_files = [call.args[0] for call in spy.call_args_list]
+    assert not [path for path in read_files if path.is_relative_to(docs.build_dir)]
@@ -0,0 +1,75 @@
+import json
+import pstats
+
+import pytest
+
+from writeadoc import profiling
+from writeadoc.main import Docs
+
+
+@pytest.fixture
+def docs(tmp_root, cache_dir):
+    (tmp_root / "views" / "search.jx").write_text("{# def store_url='' #}{{ store_url }}")
+    for name in ("one", "two", "three"):
+        (tmp_root / "content" / f"{name}.md").write_text(
+            f"---\ntitle: Page {name}\n---\nHello {name}\n\n```python\nprint('{name}')\n```\n"
+        )
+    return Docs(
+        tmp_root,
+        pages=["one.md", "two.md", "three.md"],
+        skip_home=True,
+        cache_dir=cache_dir,
+    )
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_profile_report(docs, tmp_path, capsys, jobs):
+    report_path = tmp_path / "profile.json"
+    docs.cli_build(archive=False, boring=True, jobs=jobs, profile=report_path, profile_top=2)
+
+    report = json.loads(report_path.read_text())
+    stages = [stage["name"] for stage in report["stages"]]
+    assert "process pages" in stages
+    assert "render pages" in stages
+    # Sorted by when they started
+    assert stages[0] == "build"
+    build_time = report["stages"][0]["wall"]
+
+    assert sorted(page["page"] for page in report["pages"]) == [
+        "/docs/one/", "/docs/three/", "/docs/two/",
+    ]
+    for page in report["pages"]:
+        assert set(page["steps"]) == {
+            "read", "autodoc", "markdown", "highlight", "search", "render", "filters", "write",
+        }
+        # Nothing counted twice
+        assert page["wall"] <= build_time
+
+    out = capsys.readouterr().out
+    assert "Stages:" in out
+    assert "Slowest 2 pages:" in out
+    assert profiling._active is None
+
+
+def test_profile_trace_and_pstats(docs, tmp_path):
+    trace_path = tmp_path / "trace.json"
+    pstats_path = tmp_path / "build.pstats"
+    docs.cli_build(
+        archive=False,
+        boring=True,
+        profile_trace=trace_path,
+        profile_pstats=pstats_path,
+    )
+
+    events = json.loads(trace_path.read_text())["traceEvents"]
+    assert {event["cat"] for event in events} == {"stage", "page"}
+    assert all(event["ph"] == "X" and event["dur"] >= 0 for event in events)
+
+    stats = pstats.Stats(str(pstats_path))
+    assert stats.get_stats_profile().func_profiles
+
+
+def test_no_profile_by_default(docs, mocker):
+    spy = mocker.spy(profiling.Profiler, "stage")
+    docs.cli_build(archive=False, boring=True)
+    spy.assert_not_called()
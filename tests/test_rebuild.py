@@ -0,0 +1,279 @@
+import threading
+
+import pytest
+
+from writeadoc import utils
+from writeadoc.exceptions import BuildCancelled
+from writeadoc.main import Docs
+
+
+@pytest.fixture
+def docs(tmp_root, cache_dir):
+    (tmp_root / "views" / "page.jx").write_text("""
+{# import "./nav.jx" as Nav #}
+<Nav />
+<h1>{{ page.title }}</h1>
+{{ page.content }}
+""")
+    (tmp_root / "views" / "nav.jx").write_text(
+        "<nav>{% for p in site.pages %}{{ p.title }};{% endfor %}</nav>"
+    )
+    (tmp_root / "views" / "other.jx").write_text("<h1>Other {{ page.title }}</h1>")
+    for name in ("one", "two", "three"):
+        (tmp_root / "content" / f"{name}.md").write_text(
+            f"---\ntitle: Page {name}\n---\nHello {name}"
+        )
+    docs = Docs(
+        tmp_root,
+        pages=["one.md", "two.md", "three.md"],
+        skip_home=True,
+        cache_dir=cache_dir,
+    )
+    docs.build(boring=True)
+    return docs
+
+
+def read_page(docs, name):
+    return (docs.build_dir / "docs" / name / "index.html").read_text()
+
+
+def test_rebuild_only_the_changed_page(docs, mocker):
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: Page two\n---\nUpdated")
+
+    docs.rebuild([path])
+
+    assert [call.args[0].url for call in spy.call_args_list] == ["/docs/two/"]
+    assert "<p>Updated</p>" in read_page(docs, "two")
+
+
+def test_rebuild_all_pages_if_the_navigation_changed(docs, mocker):
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: New title\n---\nHello two")
+
+    docs.rebuild([path])
+
+    assert spy.call_count == 3
+    assert "Page one;New title;Page three;" in read_page(docs, "one")
+    assert "Page one;New title;Page three;" in read_page(docs, "three")
+
+
+def test_rebuild_the_pages_using_a_changed_view(docs, mocker):
+    (docs.content_dir / "three.md").write_text(
+        "---\ntitle: Page three\nview: other.jx\n---\nHello three"
+    )
+    docs.build(boring=True)
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.views_dir / "nav.jx"
+    path.write_text("<nav>Updated</nav>")
+
+    docs.rebuild([path])
+
+    assert [call.args[0].url for call in spy.call_args_list] == ["/docs/one/", "/docs/two/"]
+    assert "<nav>Updated</nav>" in read_page(docs, "one")
+
+
+def test_rebuild_renders_the_priority_pages_first(docs, mocker):
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.views_dir / "nav.jx"
+    path.write_text("<nav>Updated</nav>")
+    notified = []
+
+    urls = docs.rebuild(
+        [path],
+        priority=["/docs/three/", "/docs/unknown/", "/docs/two/"],
+        notify=notified.append,
+    )
+
+    assert [call.args[0].url for call in spy.call_args_list] == [
+        "/docs/three/", "/docs/two/", "/docs/one/"
+    ]
+    # The priority pages are reloaded before rendering the rest
+    assert notified == [["/docs/three/", "/docs/two/"]]
+    assert urls == ["/docs/one/"]
+
+
+def test_cancelled_rebuild_is_reprioritized(docs, mocker):
+    path = docs.views_dir / "nav.jx"
+    path.write_text("<nav>Updated</nav>")
+    cancel = threading.Event()
+    cancel.set()
+    with pytest.raises(BuildCancelled):
+        docs.rebuild([path], cancel=cancel)
+
+    spy = mocker.spy(docs, "_render_page_html")
+    docs.rebuild([], priority=["/docs/two/"])
+
+    assert [call.args[0].url for call in spy.call_args_list] == [
+        "/docs/two/", "/docs/one/", "/docs/three/"
+    ]
+
+
+def test_rebuild_ignores_unrelated_files(docs, mocker):
+    spy = mocker.spy(docs, "_render_page_html")
+    path = docs.content_dir / "unused.md"
+    path.write_text("Hello")
+
+    docs.rebuild([path])
+
+    spy.assert_not_called()
+
+
+def test_rebuild_the_pages_including_a_changed_file(docs, mocker):
+    snippet = docs.content_dir / "snippet.md"
+    snippet.write_text("Snippet v1")
+    (docs.content_dir / "two.md").write_text(
+        "---\ntitle: Page two\n---\n::: include snippet.md\n:::\n"
+    )
+    docs.build(boring=True)
+    assert "Snippet v1" in read_page(docs, "two")
+    spy = mocker.spy(docs, "_render_page_html")
+    snippet.write_text("Snippet v2")
+
+    docs.rebuild([snippet])
+
+    assert [call.args[0].url for call in spy.call_args_list] == ["/docs/two/"]
+    assert "Snippet v2" in read_page(docs, "two")
+
+
+def test_cancelled_rebuild_is_completed_by_the_next_one(docs, mocker):
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: New title\n---\nHello two")
+    cancel = threading.Event()
+    cancel.set()
+
+    with pytest.raises(BuildCancelled):
+        docs.rebuild([path], cancel=cancel)
+    assert "New title" not in read_page(docs, "one")
+
+    spy = mocker.spy(docs, "_render_page_html")
+    docs.rebuild([path])
+
+    assert spy.call_count == 3
+    assert "Page one;New title;Page three;" in read_page(docs, "one")
+
+
+def test_rebuild_returns_the_changed_urls(docs):
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: Page two\n---\nUpdated")
+    asset = docs.assets_dir / "style.css"
+    asset.write_text("body {}")
+
+    assert docs.rebuild([path, asset]) == ["/assets/style.css", "/docs/two/"]
+    # Nothing changed this time
+    assert docs.rebuild([path]) == []
+    # A full build
+    assert docs.rebuild([docs.root_dir / "docs.py"]) == ["*"]
+
+
+def test_cancelled_rebuild_urls_are_returned_by_the_next_one(docs):
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: New title\n---\nHello two")
+    cancel = threading.Event()
+
+    original = docs._render_page
+    def render_page(page, **kwargs):
+        original(page, **kwargs)
+        cancel.set()
+
+    docs._render_page = render_page
+    with pytest.raises(BuildCancelled):
+        docs.rebuild([path], cancel=cancel)
+    del docs._render_page
+
+    assert docs.rebuild([path]) == ["/docs/one/", "/docs/three/", "/docs/two/"]
+
+
+def test_livereload_script(docs):
+    docs.livereload = True
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: Page two\n---\nUpdated")
+    docs.rebuild([path])
+
+    assert "/_writeadoc/livereload" in read_page(docs, "two")
+    assert "/_writeadoc/livereload" not in read_page(docs, "one")
+
+
+def test_build_in_memory(docs, monkeypatch, mocker, cache_dir):
+    # Even with many CPUs, the development builds don't fork
+    monkeypatch.setattr("writeadoc.main.os.cpu_count", lambda: 4)
+    spy = mocker.spy(utils, "parallel_map")
+    (docs.assets_dir / "style.css").write_text("body {}")
+    (docs.content_dir / "es").mkdir()
+    for name in ("one", "two", "three"):
+        (docs.content_dir / "es" / f"{name}.md").write_text(
+            f"---\ntitle: Página {name}\n---\nHola {name}"
+        )
+    variant = Docs(
+        docs.root_dir,
+        pages=["one.md", "two.md", "three.md"],
+        skip_home=True,
+        cache_dir=cache_dir,
+    )
+    mem_docs = Docs(
+        docs.root_dir,
+        pages=["one.md", "two.md", "three.md"],
+        skip_home=True,
+        variants={"es": variant},
+        cache_dir=cache_dir,
+    )
+    mem_docs.build_dir = docs.root_dir / "memory"
+    mem_docs.memory_files = variant.memory_files = {}
+    mem_docs.build(boring=True)
+
+    assert not mem_docs.build_dir.exists()
+    assert all(call.kwargs["jobs"] == 1 for call in spy.call_args_list)
+    files = mem_docs.memory_files
+    assert files["docs/one/index.html"].decode() == read_page(docs, "one")
+    assert "Hola one" in files["es/docs/one/index.html"].decode()
+
+    path = docs.content_dir / "two.md"
+    path.write_text("---\ntitle: Page two\n---\nUpdated")
+    assert mem_docs.rebuild([path]) == ["/docs/two/"]
+    assert "<p>Updated</p>" in files["docs/two/index.html"].decode()
+    assert not mem_docs.build_dir.exists()
+
+
+def test_full_rebuild_in_memory_keeps_serving_the_previous_build(docs, monkeypatch):
+    docs.memory_files = {}
+    docs.build(boring=True)
+    served = docs.served_files
+    assert served is docs.memory_files
+    html = served["docs/one/index.html"]
+
+    render_extra = docs._render_extra
+    seen = []
+
+    def spy_render_extra():
+        # The pages are already written, but the previous build is still served
+        seen.append((docs.served_files is served, "docs/one/index.html" in docs.memory_files))
+        render_extra()
+
+    monkeypatch.setattr(docs, "_render_extra", spy_render_extra)
+    assert docs.rebuild([docs.root_dir / "docs.py"]) == ["*"]
+
+    assert seen == [(True, True)]
+    assert served["docs/one/index.html"] == html
+    assert docs.served_files is docs.memory_files
+    assert docs.served_files is not served
+
+
+def test_failed_full_rebuild_in_memory(docs, monkeypatch):
+    docs.memory_files = {}
+    docs.build(boring=True)
+    served = docs.served_files
+
+    def fail():
+        raise RuntimeError("Boom")
+
+    monkeypatch.setattr(docs, "_render_extra", fail)
+    with pytest.raises(RuntimeError):
+        docs.rebuild([docs.root_dir / "docs.py"])
+    assert docs.served_files is served
+
+    # The next change builds everything again
+    monkeypatch.undo()
+    assert docs.rebuild([docs.content_dir / "one.md"]) == ["*"]
+    assert docs.served_files is docs.memory_files
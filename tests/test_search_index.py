@@ -0,0 +1,139 @@
+import json
+
+import pytest
+
+from writeadoc import search
+from writeadoc.main import Docs
+
+
+@pytest.fixture
+def docs(tmp_root, cache_dir):
+    (tmp_root / "views" / "search.jx").write_text(
+        '{# def store_url, index_url="" #}'
+        '<div id="search-results" data-store="{{ store_url }}" data-index="{{ index_url }}"></div>'
+    )
+    (tmp_root / "content" / "test.md").write_text("""
+---
+title: Test Page
+---
+## Components
+
+Reusable template snippets.
+""".strip())
+    return Docs(tmp_root, pages=["test.md"], skip_home=True, cache_dir=cache_dir)
+
+
+def test_search_store_is_a_separate_file(docs):
+    docs.build(boring=True)
+    search_dir = docs.build_dir / "search"
+
+    html = (search_dir / "index.html").read_text()
+    assert 'data-store="/search/store.json"' in html
+    assert "Reusable template snippets" not in html
+
+    raw_store = (search_dir / "store.json").read_text()
+    assert "\n" not in raw_store
+    assert json.loads(raw_store) == docs.site.pages[0].search_data
+
+
+def test_search_index_is_prebuilt(docs):
+    lunr = pytest.importorskip("lunr")
+    docs.build(boring=True)
+    search_dir = docs.build_dir / "search"
+
+    html = (search_dir / "index.html").read_text()
+    assert 'data-index="/search/index.json"' in html
+
+    index = lunr.index.Index.load(json.loads((search_dir / "index.json").read_text()))
+    results = index.search("snippets")
+    assert [result["ref"] for result in results] == ["/docs/test/#components1"]
+
+
+def test_search_index_without_lunr(docs, mocker):
+    mocker.patch("writeadoc.main.search.build_search_index", return_value=None)
+    docs.build(boring=True)
+    search_dir = docs.build_dir / "search"
+
+    html = (search_dir / "index.html").read_text()
+    assert 'data-index=""' in html
+    assert not (search_dir / "index.json").exists()
+    assert (search_dir / "store.json").exists()
+
+
+def test_sharded_search_index(tmp_root, cache_dir):
+    (tmp_root / "views" / "search.jx").write_text(
+        '{# def manifest_url="" #}<div id="search-results" data-manifest="{{ manifest_url }}"></div>'
+    )
+    for name in ("alpha", "beta", "gamma"):
+        (tmp_root / "content" / f"{name}.md").write_text(
+            f"---\ntitle: Page {name}\n---\n## Intro\n\nAbout {name} and apples."
+        )
+    docs = Docs(
+        tmp_root,
+        pages=["alpha.md", "beta.md", "gamma.md"],
+        skip_home=True,
+        search_shard_size=100,
+        cache_dir=cache_dir,
+    )
+    docs.build(boring=True)
+    search_dir = docs.build_dir / "search"
+
+    html = (search_dir / "index.html").read_text()
+    assert 'data-manifest="/search/manifest.json"' in html
+    assert not (search_dir / "store.json").exists()
+
+    manifest = json.loads((search_dir / "manifest.json").read_text())
+    assert len(manifest["terms"]) > 1
+    assert len(manifest["docs"]) > 1
+
+    # The term is only in the shard of its prefix
+    shards = {
+        prefix: json.loads((search_dir / name).read_text())
+        for prefix, name in manifest["terms"].items()
+    }
+    found = [prefix for prefix, shard in shards.items() if "apples" in shard]
+    assert len(found) == 1
+    assert "apples".startswith(found[0])
+    doc_ids = [doc_id for doc_id, _ in shards[found[0]]["apples"]]
+    assert len(doc_ids) == 3
+
+    docs_data = []
+    for _, name in manifest["docs"]:
+        docs_data.extend(json.loads((search_dir / name).read_text()))
+    assert [docs_data[doc_id]["url"] for doc_id in doc_ids] == [
+        "/docs/alpha/#intro", "/docs/beta/#intro", "/docs/gamma/#intro"
+    ]
+
+
+def test_search_data_from_ast(tmp_root, mocker, cache_dir):
+    (tmp_root / "views" / "search.jx").write_text('{# def store_url="" #}')
+    (tmp_root / "views" / "Hello.jx").write_text("<p>From a component</p>")
+    (tmp_root / "content" / "plain.md").write_text(
+        "---\ntitle: Plain\n---\n## Intro\n\nSome text."
+    )
+    (tmp_root / "content" / "mdjx.md").write_text(
+        "---\ntitle: With components\nimports:\n  Hello: Hello.jx\n---\n## Intro\n\n<Hello />"
+    )
+    spy = mocker.spy(search, "extract_search_data")
+    docs = Docs(
+        tmp_root,
+        pages=["plain.md", "mdjx.md"],
+        skip_home=True,
+        search_from_ast=True,
+        cache_dir=cache_dir,
+    )
+    docs.build(boring=True)
+
+    plain, mdjx = docs.site.pages
+    assert plain.search_data == {
+        "/docs/plain/#intro1": {
+            "title": "Intro",
+            "content": "Some text.",
+            "section": "",
+            "url": "/docs/plain/#intro",
+        },
+    }
+    # Pages with components are extracted from their HTML
+    assert [call.args[0] for call in spy.call_args_list] == [mdjx]
+    assert mdjx.search_data is not None
+    assert "From a component" in mdjx.search_data["/docs/mdjx/#intro1"]["content"]
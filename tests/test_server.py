@@ -0,0 +1,219 @@
+import http.client
+import time
+
+import pytest
+
+from writeadoc.server import (
+    LIVERELOAD_URL,
+    LiveReload,
+    RecentPages,
+    insert_livereload_script,
+    start_server,
+)
+
+
+@pytest.fixture
+def server(tmp_path):
+    (tmp_path / "style.css").write_text("body {}")
+    files = {
+        "index.html": b"<h1>Home</h1>",
+        "docs/one/index.html": b"<h1>One</h1>",
+        "search/index.json": b"{}",
+    }
+    livereload = LiveReload()
+    server = start_server(
+        files=files,
+        folders={"/assets/": tmp_path},
+        port=0,
+        livereload=livereload,
+    )
+    yield server, livereload, files
+    livereload.close()
+    server.shutdown()
+    server.server_close()
+
+
+def get_connection(server):
+    return http.client.HTTPConnection("localhost", server.server_address[1], timeout=5)
+
+
+def get(server, url):
+    conn = get_connection(server)
+    conn.request("GET", url)
+    response = conn.getresponse()
+    return response, response.read()
+
+
+def test_serve_files_from_memory(server):
+    server, _, files = server
+
+    response, body = get(server, "/")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/html"
+    assert body == b"<h1>Home</h1>"
+
+    response, body = get(server, "/docs/one/")
+    assert body == b"<h1>One</h1>"
+
+    response, body = get(server, "/search/index.json")
+    assert response.getheader("Content-Type") == "application/json"
+
+    response, _ = get(server, "/docs/one")
+    assert response.status == 301
+    assert response.getheader("Location") == "/docs/one/"
+
+    response, _ = get(server, "/docs/two/")
+    assert response.status == 404
+
+    # The files added after starting the server
+    files["docs/two/index.html"] = b"<h1>Two</h1>"
+    response, body = get(server, "/docs/two/")
+    assert body == b"<h1>Two</h1>"
+
+
+def test_serve_files_from_folders(server):
+    response, body = get(server[0], "/assets/style.css?v=123")
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/css"
+    assert body == b"body {}"
+
+    # Never outside of the folder
+    response, _ = get(server[0], "/assets/../../../etc/hostname")
+    assert response.status == 404
+
+
+def test_livereload_events(server):
+    server, livereload, _ = server
+    conn = get_connection(server)
+    conn.request("GET", LIVERELOAD_URL)
+    response = conn.getresponse()
+    assert response.status == 200
+    assert response.getheader("Content-Type") == "text/event-stream"
+
+    start = time.monotonic()
+    while not livereload._clients:
+        assert time.monotonic() - start < 2, "Timed out"
+        time.sleep(0.01)
+
+    livereload.notify([])
+    livereload.notify(["/docs/two/", "/assets/style.css"])
+    assert response.readline() == b"event: reload\n"
+    assert response.readline() == b'data: ["/assets/style.css", "/docs/two/"]\n'
+    assert response.readline() == b"\n"
+
+    # The connection is closed with the server
+    livereload.close()
+    assert response.readline() == b""
+
+
+def test_insert_livereload_script():
+    html = insert_livereload_script("<html><body><h1>Hi</h1></body></html>")
+    assert html.startswith("<html><body><h1>Hi</h1><script>")
+    assert html.endswith("</script>\n</body></html>")
+    assert LIVERELOAD_URL in html
+
+    assert insert_livereload_script("<h1>Hi</h1>").startswith("<h1>Hi</h1><script>")
+
+
+def test_render_files_on_demand():
+    files = {"index.html": b"<h1>Home</h1>"}
+    rendered = []
+
+    def render(relpath):
+        rendered.append(relpath)
+        if relpath == "docs/one/index.html":
+            files[relpath] = b"<h1>One</h1>"
+            return files[relpath]
+        return None
+
+    server = start_server(files=files, port=0, render=render)
+    try:
+        response, body = get(server, "/")
+        assert body == b"<h1>Home</h1>"
+        assert rendered == []
+
+        response, _ = get(server, "/docs/one")
+        assert response.status == 301
+        response, body = get(server, "/docs/one/")
+        assert body == b"<h1>One</h1>"
+        assert rendered == ["docs/one", "docs/one/index.html"]
+
+        response, _ = get(server, "/docs/two/")
+        assert response.status == 404
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_recent_pages(server):
+    server, _, _ = server
+    recent = RecentPages(size=2)
+    server.RequestHandlerClass.keywords["recent"] = recent
+
+    get(server, "/docs/one/")
+    get(server, "/search/index.json")
+    get(server, "/")
+    get(server, "/docs/two/")
+    assert recent.get() == ["/", "/docs/one/"]
+
+    get(server, "/docs/one/index.html")
+    assert recent.get() == ["/docs/one/", "/"]
+
+
+def test_serve_compressed_files(tmp_path):
+    (tmp_path / "style.css").write_text("body {}")
+    (tmp_path / "style.css.gz").write_bytes(b"gzipped")
+    (tmp_path / "style.css.br").write_bytes(b"brotli")
+    (tmp_path / "docs").mkdir()
+    (tmp_path / "docs" / "index.html").write_text("<h1>Docs</h1>")
+    (tmp_path / "docs" / "index.html.gz").write_bytes(b"gzipped docs")
+    files = {"index.html": b"<h1>Home</h1>"}
+    server = start_server(files=files, folders={"/build/": tmp_path}, port=0)
+
+    def get_encoded(url, accept):
+        conn = get_connection(server)
+        conn.request("GET", url, headers={"Accept-Encoding": accept})
+        response = conn.getresponse()
+        return response, response.read()
+
+    try:
+        response, body = get_encoded("/build/style.css", "gzip, deflate, br")
+        assert body == b"brotli"
+        assert response.getheader("Content-Encoding") == "br"
+        assert response.getheader("Content-Type") == "text/css"
+        assert response.getheader("Vary") == "Accept-Encoding"
+
+        response, body = get_encoded("/build/style.css", "gzip, br;q=0")
+        assert body == b"gzipped"
+        assert response.getheader("Content-Encoding") == "gzip"
+
+        response, body = get_encoded("/build/style.css", "identity")
+        assert body == b"body {}"
+        assert response.getheader("Content-Encoding") is None
+
+        response, body = get_encoded("/build/docs/", "gzip")
+        assert body == b"gzipped docs"
+        assert response.getheader("Content-Type") == "text/html"
+
+        # The files kept in memory are served as they are
+        response, body = get_encoded("/", "gzip, br")
+        assert body == b"<h1>Home</h1>"
+        assert response.getheader("Content-Encoding") is None
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_serve_replaced_files():
+    builds = [{"index.html": b"<h1>Old</h1>"}]
+    server = start_server(files=lambda: builds[-1], port=0)
+    try:
+        response, body = get(server, "/")
+        assert body == b"<h1>Old</h1>"
+
+        builds.append({"index.html": b"<h1>New</h1>"})
+        response, body = get(server, "/")
+        assert body == b"<h1>New</h1>"
+    finally:
+        server.shutdown()
+        server.server_close()
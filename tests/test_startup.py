@@ -0,0 +1,108 @@
+import subprocess
+import sys
+
+import pytest
+
+from writeadoc import main
+from writeadoc.main import Docs
+
+
+# Only needed by some commands or some pages, so they must not be
+# imported by `import writeadoc`.
+LAZY_MODULES = (
+    "cProfile",
+    "concurrent.futures",
+    "multiprocessing",
+    "watchdog",
+    "http.server",
+    "asyncio",
+    "ssl",
+    "pygments",
+    "docstring_parser",
+    "writeadoc.linkcheck",
+    "writeadoc.server",
+    "writeadoc.watcher",
+)
+
+
+def test_lazy_modules_are_not_imported():
+    code = (
+        "import sys, writeadoc\n"
+        f"print(' '.join(name for name in {LAZY_MODULES!r} if name in sys.modules))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    assert result.stdout.split() == []
+
+
+# In seconds. `import writeadoc` takes about 0.3 s on a laptop, so this
+# only catches a big regression, like a heavy module imported eagerly again.
+IMPORT_TIME_BUDGET = 1.5
+
+
+def test_import_time():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import writeadoc"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    # The lines are "import time: self [us] | cumulative [us] | module"
+    # and the last one is the package
+    _, cumulative, name = result.stderr.strip().splitlines()[-1].split("|")
+    assert name.strip() == "writeadoc"
+    assert int(cumulative) / 1_000_000 < IMPORT_TIME_BUDGET
+
+
+@pytest.fixture
+def valid_views(monkeypatch):
+    valid_views = set()
+    monkeypatch.setattr(main, "_valid_views", valid_views)
+    return valid_views
+
+
+def test_views_are_validated_once(tmp_root, valid_views, capsys, cache_dir):
+    Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+    assert "Validating views" in capsys.readouterr().out
+
+    # Variants and repeated builds in the same process
+    Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+    assert "Validating views" not in capsys.readouterr().out
+
+    # Repeated runs
+    valid_views.clear()
+    Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+    assert "Validating views" not in capsys.readouterr().out
+
+    # Changed views
+    (tmp_root / "views" / "page.jx").write_text("<h1>{{ page.title }}</h1>")
+    Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+    assert "Validating views" in capsys.readouterr().out
+
+
+def test_invalid_views_are_validated_every_time(tmp_root, valid_views, capsys, cache_dir):
+    (tmp_root / "views" / "page.jx").write_text(
+        '{#import "missing.jx" as Missing #}<Missing />'
+    )
+    for _ in range(2):
+        Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+        out = capsys.readouterr().out
+        assert "Validating views" in out
+        assert "missing.jx" in out
+
+
+def test_views_are_validated_again_without_cache(tmp_root, valid_views, capsys, cache_dir):
+    Docs(tmp_root, pages=[], cache_dir=cache_dir).check_catalog()
+    valid_views.clear()
+    capsys.readouterr()
+
+    Docs(
+        tmp_root,
+        pages=[],
+        cache_dir=cache_dir,
+    ).cli_build(archive=False, boring=True, no_cache=True)
+    assert "Validating views" in capsys.readouterr().out
@@ -0,0 +1,106 @@
+import os
+
+import pytest
+
+from writeadoc.main import Docs
+from writeadoc.utils import sync_folder
+
+
+@pytest.fixture
+def src(tmp_path):
+    src = tmp_path / "assets"
+    (src / "css").mkdir(parents=True)
+    (src / "images").mkdir()
+    (src / "css" / "main.css").write_text("body {}")
+    (src / "images" / "logo.svg").write_text("<svg></svg>")
+    (src / "favicon.ico").write_bytes(b"ico")
+    return src
+
+
+def test_sync_only_the_changed_files(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+
+    copied, removed = sync_folder(src, dest)
+    assert sorted(copied) == ["css/main.css", "favicon.ico", "images/logo.svg"]
+    assert removed == []
+    assert (dest / "css" / "main.css").read_text() == "body {}"
+
+    assert sync_folder(src, dest) == ([], [])
+
+    (src / "css" / "main.css").write_text("body { color: red }")
+    assert sync_folder(src, dest) == (["css/main.css"], [])
+    assert (dest / "css" / "main.css").read_text() == "body { color: red }"
+
+
+def test_sync_removes_stale_files(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+    sync_folder(src, dest)
+
+    (src / "images" / "logo.svg").unlink()
+    (src / "images").rmdir()
+
+    assert sync_folder(src, dest) == ([], ["images/logo.svg"])
+    assert not (dest / "images").exists()
+    assert (dest / "css" / "main.css").exists()
+
+
+def test_sync_compares_the_content_if_the_mtime_changed(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+    sync_folder(src, dest)
+    path = src / "css" / "main.css"
+    os.utime(path, (1_000_000, 1_000_000))
+
+    assert sync_folder(src, dest) == ([], [])
+    assert (dest / "css" / "main.css").stat().st_mtime == 1_000_000
+
+
+def test_sync_hardlinks(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+
+    sync_folder(src, dest, mode="hardlink")
+    assert (dest / "favicon.ico").samefile(src / "favicon.ico")
+    assert sync_folder(src, dest, mode="hardlink") == ([], [])
+
+    # Switching back to copies never writes through the links
+    copied, _ = sync_folder(src, dest, mode="copy")
+    assert len(copied) == 3
+    assert not (dest / "favicon.ico").samefile(src / "favicon.ico")
+    (dest / "favicon.ico").write_bytes(b"changed")
+    assert (src / "favicon.ico").read_bytes() == b"ico"
+
+
+def test_sync_reflinks_or_copies(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+
+    copied, _ = sync_folder(src, dest, mode="reflink")
+    assert len(copied) == 3
+    assert (dest / "images" / "logo.svg").read_text() == "<svg></svg>"
+    assert sync_folder(src, dest, mode="reflink") == ([], [])
+
+
+def test_sync_replaces_a_symlink(src, tmp_path):
+    dest = tmp_path / "build" / "assets"
+    dest.parent.mkdir()
+    dest.symlink_to(src)
+
+    sync_folder(src, dest)
+
+    assert not dest.is_symlink()
+    assert (dest / "css" / "main.css").read_text() == "body {}"
+    assert (src / "css" / "main.css").exists()
+
+
+def test_build_syncs_the_assets(tmp_root, cache_dir):
+    (tmp_root / "assets" / "old.css").write_text("old")
+    (tmp_root / "content" / "page.md").write_text("---\ntitle: Page\n---\nHello")
+    docs = Docs(tmp_root, pages=["page.md"], skip_home=True, cache_dir=cache_dir)
+    docs.cli_build(archive=False, boring=True)
+    assets = tmp_root / "build" / "assets"
+    assert (assets / "old.css").exists()
+
+    (tmp_root / "assets" / "old.css").unlink()
+    (tmp_root / "assets" / "new.css").write_text("new")
+    docs.cli_build(archive=False, boring=True, assets_mode="hardlink")
+
+    assert not (assets / "old.css").exists()
+    assert (assets / "new.css").samefile(tmp_root / "assets" / "new.css")
@@ -7,7 +7,7 @@ from writeadoc.types import PageData
 
 
 @pytest.fixture
-def docs(tmp_root):
+def docs(tmp_root, cache_dir):
     """Create a minimal Docs instance for testing."""
     (tmp_root / "views" / "index.jx").write_text("<h1>Home</h1>")
     (tmp_root / "views" / "search.jx").write_text("<h1>Search</h1>")
@@ -15,6 +15,7 @@ def docs(tmp_root):
         str(tmp_root),
         pages=[],
         site={"name": "Test"},
+        cache_dir=cache_dir,
     )
 
 
@@ -408,3 +409,52 @@ class TestValidateAnchors:
 
         output = capsys.readouterr().out
         assert "broken anchor" not in output
+
+
+class TestCollectedLinks:
+
+    @pytest.fixture
+    def build(self, tmp_root, capsys, cache_dir):
+        (tmp_root / "assets" / "logo.png").write_bytes(b"")
+
+        def build(one, two="## Details\n\nHello"):
+            (tmp_root / "content" / "one.md").write_text(f"---\ntitle: One\n---\n{one}")
+            (tmp_root / "content" / "two.md").write_text(f"---\ntitle: Two\n---\n{two}")
+            docs = Docs(
+                tmp_root,
+                pages=["one.md", "two.md"],
+                skip_home=True,
+                cache_dir=cache_dir,
+            )
+            docs.build(boring=True)
+            return capsys.readouterr().out
+
+        return build
+
+    def test_valid_links(self, build):
+        output = build(
+            "## Intro\n\n"
+            "[intro](#intro) [two](/docs/two/) [details](/docs/two/#details)\n"
+            "[relative](../two/) ![logo](/assets/logo.png) [ref][r]\n\n"
+            "[r]: /docs/two/"
+        )
+        assert "WARNING" not in output
+
+    def test_broken_links_with_line_numbers(self, build):
+        output = build(
+            "## Intro\n\n"
+            "[missing](/docs/missing/)\n\n"
+            "![logo](/assets/nope.png)\n"
+            "[self](#nope)"
+        )
+        assert "one.md:3 - broken link: /docs/missing/" in output
+        assert "one.md:5 - broken link: /assets/nope.png" in output
+        assert "one.md:6 - broken anchor: #nope" in output
+
+    def test_broken_anchor_in_other_page(self, build):
+        output = build("Text\n\nSee [details](/docs/two/#nope).")
+        assert "one.md:3 - broken anchor: /docs/two/#nope" in output
+
+    def test_reference_links(self, build):
+        output = build("See [this][r].\n\n[r]: /docs/missing/")
+        assert "one.md:3 - broken link: /docs/missing/" in output
@@ -0,0 +1,92 @@
+import threading
+import time
+
+import pytest
+
+from writeadoc.exceptions import BuildCancelled
+from writeadoc.watcher import ChangeScheduler
+
+
+def wait_for(condition, timeout=2):
+    start = time.monotonic()
+    while not condition():
+        assert time.monotonic() - start < timeout, "Timed out"
+        time.sleep(0.01)
+
+
+@pytest.fixture
+def make_scheduler():
+    """Return a function that makes a `ChangeScheduler`, stopped after the test."""
+    schedulers = []
+
+    def make_scheduler(run_callback, **kwargs):
+        scheduler = ChangeScheduler(run_callback, **kwargs)
+        schedulers.append(scheduler)
+        return scheduler
+
+    yield make_scheduler
+    for scheduler in schedulers:
+        scheduler.stop(timeout=2)
+        assert not scheduler._thread.is_alive()
+
+
+def test_burst_of_changes_is_collapsed(make_scheduler):
+    calls = []
+    scheduler = make_scheduler(lambda paths, cancel: calls.append(paths), delay=0.1)
+
+    scheduler.add(["a.md"])
+    scheduler.add(["b.md", "a.md"])
+    scheduler.add(["c.jx"])
+    wait_for(lambda: calls)
+    time.sleep(0.2)
+
+    assert calls == [["a.md", "b.md", "c.jx"]]
+
+
+def test_new_changes_cancel_the_running_build(make_scheduler):
+    calls = []
+    started = threading.Event()
+
+    def run_callback(paths, cancel):
+        calls.append(paths)
+        if len(calls) == 1:
+            started.set()
+            assert cancel.wait(2)
+            raise BuildCancelled()
+
+    scheduler = make_scheduler(run_callback, delay=0.05)
+    scheduler.add(["a.md"])
+    assert started.wait(2)
+    scheduler.add(["b.md"])
+    wait_for(lambda: len(calls) == 2)
+
+    assert calls == [["a.md"], ["a.md", "b.md"]]
+
+
+def test_stop_cancels_the_running_build():
+    started = threading.Event()
+    cancelled = threading.Event()
+
+    def run_callback(paths, cancel):
+        started.set()
+        assert cancel.wait(2)
+        cancelled.set()
+        raise BuildCancelled()
+
+    scheduler = ChangeScheduler(run_callback, delay=0.01)
+    scheduler.add(["a.md"])
+    assert started.wait(2)
+    scheduler.stop(timeout=2)
+
+    assert cancelled.is_set()
+    assert not scheduler._thread.is_alive()
+
+
+def test_stop_while_waiting():
+    calls = []
+    scheduler = ChangeScheduler(lambda paths, cancel: calls.append(paths), delay=10)
+    scheduler.add(["a.md"])
+    scheduler.stop(timeout=2)
+
+    assert not scheduler._thread.is_alive()
+    assert calls == []